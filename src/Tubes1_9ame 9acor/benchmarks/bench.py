@@ -0,0 +1,306 @@
+"""
+Micro benchmarks for the per-tick hot path: decoding a response, building
+the models, the Board helpers and the logic controllers, on synthetic
+boards of several sizes. Run from the project root:
+
+    python -m benchmarks.bench
+    python -m benchmarks.bench --compare benchmarks/results/<commit>.json
+
+Results are written to benchmarks/results/<commit>.json by default so they
+can be compared between commits.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from statistics import mean
+from typing import Callable, Dict, List, Optional, Tuple
+
+from dacite import from_dict
+from decode import decode, loads
+from game.logic.gacorbot import gacorbot
+from game.logic.random import RandomLogic
+from game.models import Board
+from game.serialization import board_from_dict, board_to_dict
+from game.simulator import SimulationConfig, Simulator
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+# Rough time spent timing each benchmark, slow ones get fewer calls
+BUDGET_US = 5e5
+
+
+@dataclass
+class BoardSpec:
+    width: int
+    height: int
+    diamonds: int
+    bots: int
+    teleport_pairs: int = 1
+
+
+SIZES = {
+    "small": BoardSpec(10, 10, diamonds=10, bots=2),
+    "medium": BoardSpec(15, 15, diamonds=22, bots=4),
+    "large": BoardSpec(30, 30, diamonds=90, bots=10, teleport_pairs=2),
+    "huge": BoardSpec(60, 60, diamonds=360, bots=40, teleport_pairs=4),
+}
+
+
+@dataclass
+class Case:
+    name: str
+    fn: Callable
+    # Builds the arguments of one call, outside of the timed region
+    make_args: Callable[[], tuple]
+
+
+def synthetic_board(spec: BoardSpec, seed: int = 0) -> Board:
+    """
+    Board from a few ticks of a simulated game with random bots, so bots are
+    spread out and carry diamonds like in a real game
+    """
+    random.seed(seed)
+    config = SimulationConfig(
+        width=spec.width,
+        height=spec.height,
+        generation_ratio=(spec.diamonds + 0.5) / (spec.width * spec.height),
+        teleport_pairs=spec.teleport_pairs,
+    )
+    simulator = Simulator(config, seed=seed)
+    for i in range(spec.bots):
+        simulator.add_bot("bot{}".format(i), RandomLogic())
+    for _ in range(5):
+        simulator.step()
+    return simulator.board()
+
+
+def cases(board: Board) -> List[Case]:
+    wire = board_to_dict(board)
+    raw = json.dumps({"data": wire}).encode()
+    decoded = decode(wire)
+    board_bot = board.bots[0]
+    logic = gacorbot()
+    random_logic = RandomLogic()
+
+    def fresh_board():
+        return (board_from_dict(decoded),)
+
+    def fresh_move():
+        fresh = board_from_dict(decoded)
+        return fresh.index.bots_by_id[board_bot.id], fresh
+
+    return [
+        Case("decode", decode, lambda: (wire,)),
+        Case("json.loads+decode", lambda r: decode(json.loads(r)), lambda: (raw,)),
+        Case("loads", loads, lambda: (raw,)),
+        Case(
+            "dacite.from_dict",
+            lambda data: from_dict(Board, data),
+            lambda: (decoded,),
+        ),
+        Case("board_from_dict", board_from_dict, lambda: (decoded,)),
+        Case("Board.bots", lambda b: b.bots, fresh_board),
+        Case("Board.diamonds", lambda b: b.diamonds, fresh_board),
+        Case("Board.bots warm", lambda b: b.bots, lambda: (board,)),
+        Case("gacorbot.next_move", logic.next_move, fresh_move),
+        Case("RandomLogic.next_move", random_logic.next_move, fresh_move),
+    ]
+
+
+def measure(case: Case, number: int, warmup: int, alloc_number: int) -> dict:
+    for _ in range(warmup):
+        case.fn(*case.make_args())
+
+    times = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(number):
+            args = case.make_args()
+            start = time.perf_counter_ns()
+            case.fn(*args)
+            times.append(time.perf_counter_ns() - start)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    # Separate pass, tracemalloc itself slows every allocation down.
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(alloc_number):
+            args = case.make_args()
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            result = case.fn(*args)
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+            del result
+    finally:
+        tracemalloc.stop()
+
+    times.sort()
+    return {
+        "calls": number,
+        "mean_us": mean(times) / 1000,
+        "min_us": times[0] / 1000,
+        "p50_us": times[len(times) // 2] / 1000,
+        "p95_us": times[min(len(times) - 1, int(len(times) * 0.95))] / 1000,
+        "peak_bytes": int(mean(peaks)) if peaks else 0,
+    }
+
+
+def run(
+    sizes: List[str], number: int, only: Optional[str] = None
+) -> Dict[str, dict]:
+    results = {}
+    for size in sizes:
+        board = synthetic_board(SIZES[size])
+        for case in cases(board):
+            if only and only not in case.name:
+                continue
+            probe = measure(case, 3, 1, 0)
+            calls = max(20, min(number, int(BUDGET_US / max(probe["mean_us"], 1))))
+            key = "{}/{}".format(size, case.name)
+            results[key] = measure(case, calls, min(calls, 20), min(calls, 50))
+            print_row(key, results[key])
+    return results
+
+
+def print_row(key: str, result: dict):
+    print(
+        "{:<36} {:>10.1f} {:>10.1f} {:>10.1f} {:>12}".format(
+            key,
+            result["p50_us"],
+            result["p95_us"],
+            result["mean_us"],
+            result["peak_bytes"],
+        )
+    )
+
+
+def git_commit() -> Tuple[str, bool]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        dirty = bool(
+            subprocess.run(
+                ["git", "status", "--porcelain", "--untracked-files=no"],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+        )
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+
+def compare(results: Dict[str, dict], baseline: dict, threshold: float) -> int:
+    """
+    Print the p50 ratio of every benchmark against the baseline
+    :return: number of benchmarks that got slower by more than threshold
+    """
+    print(
+        "\nagainst {}{}".format(
+            baseline.get("commit"), " (dirty)" if baseline.get("dirty") else ""
+        )
+    )
+    regressions = 0
+    for key, result in results.items():
+        old = baseline["results"].get(key)
+        if old is None:
+            continue
+        ratio = result["p50_us"] / max(old["p50_us"], 1e-9)
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "slower"
+            regressions += 1
+        elif ratio < 1 - threshold:
+            flag = "faster"
+        print(
+            "{:<36} {:>10.1f} -> {:>10.1f} us {:>6.2f}x {:>12} -> {:>12} B {}".format(
+                key,
+                old["p50_us"],
+                result["p50_us"],
+                ratio,
+                old["peak_bytes"],
+                result["peak_bytes"],
+                flag,
+            )
+        )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Diamonds hot path benchmarks")
+    parser.add_argument(
+        "--size",
+        help="Board sizes to run. Default: all of {}".format(", ".join(SIZES)),
+        choices=list(SIZES),
+        action="append",
+    )
+    parser.add_argument(
+        "--number", help="Calls per benchmark at most", default=1000, type=int
+    )
+    parser.add_argument("--only", help="Only benchmarks whose name contains this")
+    parser.add_argument(
+        "--output",
+        help="Where to save the results. Default: benchmarks/results/<commit>.json",
+    )
+    parser.add_argument("--compare", help="Results file to compare against")
+    parser.add_argument(
+        "--threshold",
+        help="Relative p50 slowdown reported as a regression. Default: 0.1",
+        default=0.1,
+        type=float,
+    )
+    args = parser.parse_args(argv)
+
+    commit, dirty = git_commit()
+    print(
+        "{:<36} {:>10} {:>10} {:>10} {:>12}".format(
+            "benchmark", "p50 us", "p95 us", "mean us", "peak bytes"
+        )
+    )
+    results = run(args.size or list(SIZES), args.number, args.only)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, "{}{}.json".format(commit, "-dirty" if dirty else "")
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(
+            {
+                "commit": commit,
+                "dirty": dirty,
+                "created": time.time(),
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+    print("\nsaved to {}".format(output))
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
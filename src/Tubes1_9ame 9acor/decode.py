@@ -1,47 +1,61 @@
+import json
 import re
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-def _unpack(data):
-    if isinstance(data, dict):
-        return data.items()
-    return data
+_FIRST_CAP = re.compile("(.)([A-Z][a-z]+)")
+_ALL_CAP = re.compile("([a-z0-9])([A-Z])")
 
 
 def _snake_case(value):
     """
-    Convert camel case string to snake case
+    Convert camel case string to snake case.
     :param value: string
     :return: string
     """
-    first_underscore = re.sub("(.)([A-Z][a-z]+)", r"\1_\2", value)
-    return re.sub("([a-z0-9])([A-Z])", r"\1_\2", first_underscore).lower()
+    first_underscore = _FIRST_CAP.sub(r"\1_\2", value)
+    return _ALL_CAP.sub(r"\1_\2", first_underscore).lower()
 
 
-def _keys_to_snake_case(content):
-    """
-    Convert all keys for given dict to snake case
-    :param content: dict
-    :return: dict
-    """
-    return {_snake_case(key): value for key, value in content.items()}
+class _SnakeCaseKeys(dict):
+    # Responses only ever use a handful of distinct keys, so conversions are
+    # memoized. A dict lookup is cheaper than calling an lru_cache.
+    def __missing__(self, key):
+        value = _snake_case(key)
+        if len(self) < 1024:
+            self[key] = value
+        return value
+
+
+_snake_case_key = _SnakeCaseKeys().__getitem__
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        return decode_keys(value)
+    if isinstance(value, list) and value:
+        return [_decode_value(val) for val in value]
+    return value
 
 
 def decode_keys(data):
     """
-    Convert all keys for given dict/list to snake case recursively
+    Convert all keys for given dict/list to snake case recursively, building
+    the result in a single pass
     :param data: dict
     :return: dict
     """
+    snake_case = _snake_case_key
     formatted = {}
-    for key, value in _unpack(_keys_to_snake_case(data)):
+    for key, value in data.items():
         if isinstance(value, dict):
-            formatted[key] = decode_keys(value)
-        elif isinstance(value, list) and len(value) > 0:
-            formatted[key] = []
-            for _, val in enumerate(value):
-                formatted[key].append(decode_keys(val))
-        else:
-            formatted[key] = value
+            value = decode_keys(value)
+        elif isinstance(value, list) and value:
+            value = [_decode_value(val) for val in value]
+        formatted[snake_case(key)] = value
     return formatted
 
 
@@ -49,7 +63,32 @@ def decode(data):
     if isinstance(data, dict):
         return decode_keys(data)
 
-    formatted = []
-    for item in data:
-        formatted.append(decode_keys(item))
-    return formatted
+    return [decode_keys(item) for item in data]
+
+
+def _snake_case_pairs(pairs):
+    snake_case = _snake_case_key
+    return {snake_case(key): value for key, value in pairs}
+
+
+def loads(raw):
+    """
+    Parse a JSON document straight into snake case keys, with orjson when it
+    is installed. The standard library converts every object while parsing
+    it; orjson has no such hook but is fast enough that converting
+    afterwards is still quicker.
+    :param raw: bytes or string
+    :return: parsed document
+    """
+    if orjson is not None:
+        return _decode_value(orjson.loads(raw))
+    return json.loads(raw, object_pairs_hook=_snake_case_pairs)
+
+
+def dumps(data) -> bytes:
+    """
+    Encode a request body, with orjson when it is installed
+    """
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data).encode()
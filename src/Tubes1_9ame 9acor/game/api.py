@@ -1,44 +1,104 @@
-import json
-from dataclasses import dataclass
+import logging
+from dataclasses import dataclass, field
 from typing import List, Optional, Tuple, Union
 
 import requests
-from colorama import Back, Fore, Style, init
-from dacite import from_dict
-from decode import decode
+from decode import dumps, loads
+from game import metrics
 from game.models import Board, Bot
+from game.serialization import board_from_dict, boards_from_list, bot_from_dict
 from requests import Response
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+Body = Union[dict, bytes]
+
+# Bodies that never change are encoded once
+EMPTY_BODY = dumps({})
+MOVE_BODIES = {
+    direction: dumps({"direction": direction})
+    for direction in ("NORTH", "SOUTH", "EAST", "WEST")
+}
+
+
+def encode_body(body: Body) -> bytes:
+    return body if isinstance(body, bytes) else dumps(body)
+
+
+def move_body(direction: str) -> bytes:
+    return MOVE_BODIES.get(direction) or dumps({"direction": direction})
 
 
 @dataclass
 class Api:
     url: str
+    pool_size: int = 10
+    timeout: float = 5.0
+    retries: int = 3
+    backoff_factor: float = 0.1
+    strict: bool = False
+    session: requests.Session = field(init=False, repr=False)
+    last_status: Optional[int] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        # One keep-alive session per Api so every endpoint reuses pooled
+        # connections instead of paying a TCP handshake per request.
+        retry = Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=self.retries,
+            status=self.retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=(502, 503, 504),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            max_retries=retry,
+        )
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close(self):
+        self.session.close()
 
     def _get_url(self, endpoint: str) -> str:
         return "{}{}".format(self.url, endpoint)
 
-    def _req(self, endpoint: str, method: str, body: dict) -> Response:
-        print(
-            ">>> {} {} {}".format(
-                Style.BRIGHT + method.upper() + Style.RESET_ALL,
-                Fore.GREEN + endpoint + Style.RESET_ALL,
-                body,
+    def _req(self, endpoint: str, method: str, body: Body) -> Response:
+        logger.debug(">>> %s %s %s", method.upper(), endpoint, body)
+        with metrics.timer("http"):
+            res = self.session.request(
+                method,
+                self._get_url(endpoint),
+                data=encode_body(body),
+                timeout=self.timeout,
             )
-        )
-        func = getattr(requests, method)
-        headers = {"Content-Type": "application/json"}
-        res = func(self._get_url(endpoint), headers=headers, data=json.dumps(body))
-        if res.status_code == 200:
-            print("<<< {} OK".format(res.status_code))
+        self.last_status = res.status_code
+        if 200 <= res.status_code < 300:
+            logger.debug("<<< %s OK", res.status_code)
         else:
-            print("<<< {} {}".format(res.status_code, res.text))
+            logger.warning(
+                "<<< %s %s %s",
+                res.status_code,
+                endpoint,
+                res.text,
+                extra={"endpoint": endpoint, "status": res.status_code},
+            )
         return res
 
     def bots_get(self, bot_token: str) -> Optional[Bot]:
-        response = self._req("/bots/{}".format(bot_token), "get", {})
+        response = self._req(
+            "/bots/{}".format(bot_token), "get", EMPTY_BODY
+        )
         data, status = self._return_response_and_status(response)
         if status == 200:
-            return from_dict(Bot, data)
+            return bot_from_dict(data, self.strict)
         return None
 
     def bots_register(
@@ -51,14 +111,14 @@ class Api:
         )
         resp, status = self._return_response_and_status(response)
         if status == 200:
-            return from_dict(Bot, resp)
+            return bot_from_dict(resp, self.strict)
         return None
 
     def boards_list(self) -> Optional[List[Board]]:
-        response = self._req("/boards", "get", {})
+        response = self._req("/boards", "get", EMPTY_BODY)
         resp, status = self._return_response_and_status(response)
         if status == 200:
-            return [from_dict(Board, board) for board in resp]
+            return boards_from_list(resp, self.strict)
         return None
 
     def bots_join(self, bot_token: str, board_id: int) -> bool:
@@ -72,21 +132,23 @@ class Api:
         return False
 
     def boards_get(self, board_id: str) -> Optional[Board]:
-        response = self._req("/boards/{}".format(board_id), "get", {})
+        response = self._req(
+            "/boards/{}".format(board_id), "get", EMPTY_BODY
+        )
         resp, status = self._return_response_and_status(response)
         if status == 200:
-            return from_dict(Board, resp)
+            return board_from_dict(resp, self.strict)
         return None
 
     def bots_move(self, bot_token: str, direction: str) -> Optional[Board]:
         response = self._req(
             "/bots/{}/move".format(bot_token),
             "post",
-            {"direction": direction},
+            move_body(direction),
         )
         resp, status = self._return_response_and_status(response)
         if status == 200:
-            return from_dict(Board, resp)
+            return board_from_dict(resp, self.strict)
         return None
 
     def bots_recover(self, email: str, password: str) -> Optional[str]:
@@ -104,10 +166,17 @@ class Api:
     def _return_response_and_status(
         self, response: Response
     ) -> Tuple[Union[dict, List], int]:
-        resp = response.json()
+        with metrics.timer("decode"):
+            data = unwrap(loads(response.content))
+        return data, response.status_code
+
 
-        response_data = resp.get("data") if isinstance(resp, dict) else resp
-        if not response_data:
-            response_data = resp
+def unwrap(resp: Union[dict, List, None]) -> Union[dict, List, None]:
+    """
+    Payload of an already decoded response, i.e. its data if it has any
+    """
+    response_data = resp.get("data") if isinstance(resp, dict) else resp
+    if not response_data:
+        response_data = resp
+    return response_data
 
-        return decode(response_data), response.status_code
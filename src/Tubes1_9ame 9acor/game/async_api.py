@@ -0,0 +1,168 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Union
+
+import aiohttp
+from game import metrics
+from decode import loads
+from game.api import EMPTY_BODY, Body, encode_body, move_body, unwrap
+from game.models import Board, Bot
+from game.serialization import board_from_dict, boards_from_list, bot_from_dict
+
+IDEMPOTENT_METHODS = {"get", "head", "options"}
+RETRY_STATUSES = {502, 503, 504}
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class AsyncApi:
+    url: str
+    pool_size: int = 100
+    timeout: float = 5.0
+    retries: int = 3
+    backoff_factor: float = 0.1
+    strict: bool = False
+    session: Optional[aiohttp.ClientSession] = field(
+        default=None, init=False, repr=False
+    )
+    # Status of the last join or move of each bot token. Bots share one Api,
+    # so a single last status could belong to any of them.
+    last_statuses: Dict[str, int] = field(default_factory=dict, init=False, repr=False)
+
+    def _get_url(self, endpoint: str) -> str:
+        return "{}{}".format(self.url, endpoint)
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Created lazily so the session is bound to the running event loop.
+        # A single session is shared by every bot driven through this Api.
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"Content-Type": "application/json"},
+            )
+        return self.session
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+
+    async def _req(
+        self, endpoint: str, method: str, body: Body
+    ) -> Tuple[Union[dict, List], int]:
+        logger.debug(">>> %s %s %s", method.upper(), endpoint, body)
+        session = self._get_session()
+        attempt = 0
+        while True:
+            try:
+                with metrics.timer("http"):
+                    async with session.request(
+                        method, self._get_url(endpoint), data=encode_body(body)
+                    ) as res:
+                        status = res.status
+                        if (
+                            status in RETRY_STATUSES
+                            and method in IDEMPOTENT_METHODS
+                            and attempt < self.retries
+                        ):
+                            raise _RetryableStatus(status)
+                        raw = await res.read()
+                if 200 <= status < 300:
+                    logger.debug("<<< %s OK", status)
+                else:
+                    logger.warning(
+                        "<<< %s %s %s",
+                        status,
+                        endpoint,
+                        raw.decode(errors="replace"),
+                        extra={"endpoint": endpoint, "status": status},
+                    )
+                with metrics.timer("decode"):
+                    data = loads(raw) if raw.strip() else None
+                    return unwrap(data), status
+            except (
+                aiohttp.ClientConnectorError,
+                _RetryableStatus,
+            ) as e:
+                # Connecting failed before anything was sent, so even a move
+                # can be retried safely.
+                error = e
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if method not in IDEMPOTENT_METHODS:
+                    raise
+                error = e
+            if attempt >= self.retries:
+                raise error
+            await asyncio.sleep(self.backoff_factor * (2**attempt))
+            attempt += 1
+
+    async def bots_get(self, bot_token: str) -> Optional[Bot]:
+        data, status = await self._req(
+            "/bots/{}".format(bot_token), "get", EMPTY_BODY
+        )
+        if status == 200:
+            return bot_from_dict(data, self.strict)
+        return None
+
+    async def bots_register(
+        self, name: str, email: str, password: str, team: str
+    ) -> Optional[Bot]:
+        resp, status = await self._req(
+            "/bots",
+            "post",
+            {"email": email, "name": name, "password": password, "team": team},
+        )
+        if status == 200:
+            return bot_from_dict(resp, self.strict)
+        return None
+
+    async def boards_list(self) -> Optional[List[Board]]:
+        resp, status = await self._req("/boards", "get", EMPTY_BODY)
+        if status == 200:
+            return boards_from_list(resp, self.strict)
+        return None
+
+    async def bots_join(self, bot_token: str, board_id: int) -> bool:
+        resp, status = await self._req(
+            f"/bots/{bot_token}/join", "post", {"preferredBoardId": board_id}
+        )
+        self.last_statuses[bot_token] = status
+        return status == 200
+
+    async def boards_get(self, board_id: str) -> Optional[Board]:
+        resp, status = await self._req(
+            "/boards/{}".format(board_id), "get", EMPTY_BODY
+        )
+        if status == 200:
+            return board_from_dict(resp, self.strict)
+        return None
+
+    async def bots_move(self, bot_token: str, direction: str) -> Optional[Board]:
+        resp, status = await self._req(
+            "/bots/{}/move".format(bot_token),
+            "post",
+            move_body(direction),
+        )
+        self.last_statuses[bot_token] = status
+        if status == 200:
+            return board_from_dict(resp, self.strict)
+        return None
+
+    async def bots_recover(self, email: str, password: str) -> Optional[str]:
+        try:
+            resp, status = await self._req(
+                "/bots/recover", "post", {"email": email, "password": password}
+            )
+            if status == 201:
+                return resp["id"]
+            return None
+        except:
+            return None
+
+
+class _RetryableStatus(Exception):
+    def __init__(self, status: int):
+        super().__init__("Server responded with {}".format(status))
+        self.status = status
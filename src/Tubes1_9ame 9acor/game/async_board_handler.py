@@ -0,0 +1,15 @@
+from dataclasses import dataclass
+from typing import List
+from game.async_api import AsyncApi
+from game.models import Board
+
+
+@dataclass
+class AsyncBoardHandler:
+    api: AsyncApi
+
+    async def list_boards(self) -> List[Board]:
+        return await self.api.boards_list()
+
+    async def get_board(self, board_id: int) -> Board:
+        return await self.api.boards_get(board_id)
@@ -0,0 +1,30 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from game.async_api import AsyncApi
+from game.bot_handler import BotHandler
+from game.models import Board, Bot
+
+
+@dataclass
+class AsyncBotHandler:
+    api: AsyncApi
+
+    async def get_my_info(self, token: str) -> Bot:
+        return await self.api.bots_get(token)
+
+    async def join(self, token: str, board_id: int) -> bool:
+        return await self.api.bots_join(token, board_id)
+
+    async def move(
+        self, token: str, board_id: int, dx: int, dy: int
+    ) -> Optional[Board]:
+        return await self.api.bots_move(token, BotHandler._get_direction(dx, dy))
+
+    async def register(
+        self, name: str, email: str, password: str, team: str
+    ) -> Optional[Bot]:
+        return await self.api.bots_register(name, email, password, team)
+
+    async def recover(self, email: str, password: str) -> Optional[str]:
+        return await self.api.bots_recover(email, password)
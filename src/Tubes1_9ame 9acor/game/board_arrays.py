@@ -0,0 +1,62 @@
+from dataclasses import dataclass
+from typing import Dict
+
+import numpy as np
+from game.models import Board
+
+TYPE_CODES: Dict[str, int] = {
+    "BotGameObject": 0,
+    "BaseGameObject": 1,
+    "DiamondGameObject": 2,
+    "DiamondButtonGameObject": 3,
+    "TeleportGameObject": 4,
+}
+UNKNOWN_TYPE = -1
+
+
+@dataclass(slots=True)
+class BoardArrays:
+    """
+    Columnar view of a board's game objects. Row i of every array describes
+    board.game_objects[i]. Missing points or diamonds are stored as 0.
+    """
+
+    ids: np.ndarray
+    x: np.ndarray
+    y: np.ndarray
+    types: np.ndarray
+    points: np.ndarray
+    diamonds: np.ndarray
+
+    @classmethod
+    def from_board(cls, board: Board) -> "BoardArrays":
+        objects = board.game_objects or []
+        n = len(objects)
+        ids = np.empty(n, dtype=np.int64)
+        x = np.empty(n, dtype=np.int16)
+        y = np.empty(n, dtype=np.int16)
+        types = np.empty(n, dtype=np.int8)
+        points = np.zeros(n, dtype=np.int16)
+        diamonds = np.zeros(n, dtype=np.int16)
+        for i, item in enumerate(objects):
+            ids[i] = item.id
+            x[i] = item.position.x
+            y[i] = item.position.y
+            types[i] = TYPE_CODES.get(item.type, UNKNOWN_TYPE)
+            props = item.properties
+            if props is not None:
+                points[i] = props.points or 0
+                diamonds[i] = props.diamonds or 0
+        return cls(ids, x, y, types, points, diamonds)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def mask(self, type: str) -> np.ndarray:
+        return self.types == TYPE_CODES.get(type, UNKNOWN_TYPE)
+
+    def positions(self) -> np.ndarray:
+        """
+        Positions as an (n, 2) array of (x, y)
+        """
+        return np.stack((self.x, self.y), axis=1)
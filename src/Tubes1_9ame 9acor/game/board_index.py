@@ -0,0 +1,217 @@
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from game.models import GameObject, Position
+
+Predicate = Callable[["GameObject"], bool]
+Cell = Tuple[int, int]
+
+
+class BoardIndex:
+    """
+    Lookup structures for one board snapshot: objects bucketed by type, bots by
+    id and name, per-type coordinate arrays for rectangle queries and a uniform
+    grid of cell_size x cell_size buckets per type for nearest queries. Both
+    are built on first use. Ties are always broken by the order of the objects
+    in game_objects, so results match a linear scan with min().
+    """
+
+    def __init__(
+        self, game_objects: Optional[List["GameObject"]], cell_size: int = 4
+    ):
+        self.cell_size = cell_size
+        self.by_type: Dict[str, List["GameObject"]] = {}
+        self.bots_by_id: Dict[int, "GameObject"] = {}
+        self.bots_by_name: Dict[str, "GameObject"] = {}
+        self._grids: Dict[str, Dict[Cell, List[Tuple[int, "GameObject"]]]] = {}
+        self._bounds: Dict[str, Tuple[int, int, int, int]] = {}
+        self._coordinates: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+        by_type = self.by_type
+        for item in game_objects or ():
+            items = by_type.get(item.type)
+            if items is None:
+                by_type[item.type] = [item]
+            else:
+                items.append(item)
+        self._index_bots()
+
+    def _index_bots(self):
+        for bot in self.by_type.get("BotGameObject", ()):
+            self.bots_by_id[bot.id] = bot
+            if bot.properties and bot.properties.name is not None:
+                self.bots_by_name.setdefault(bot.properties.name, bot)
+
+    def updated(
+        self, game_objects: Optional[List["GameObject"]], changed_types: Set[str]
+    ) -> "BoardIndex":
+        """
+        Index for the next snapshot of the same board. Only the types in
+        changed_types are rebuilt, everything else (including grids and
+        coordinate arrays) is shared with this index, so objects of the other
+        types must be the very same instances in game_objects.
+        :param changed_types: types with any object added, removed or changed
+        :return: BoardIndex
+        """
+        index = BoardIndex(None, self.cell_size)
+        by_type = index.by_type
+        for item in game_objects or []:
+            if item.type in changed_types:
+                items = by_type.get(item.type)
+                if items is None:
+                    by_type[item.type] = [item]
+                else:
+                    items.append(item)
+        for type, items in self.by_type.items():
+            if type in changed_types:
+                continue
+            by_type[type] = items
+            for cache, shared in (
+                (self._grids, index._grids),
+                (self._bounds, index._bounds),
+                (self._coordinates, index._coordinates),
+            ):
+                if type in cache:
+                    shared[type] = cache[type]
+
+        if "BotGameObject" in changed_types:
+            index._index_bots()
+        else:
+            index.bots_by_id = self.bots_by_id
+            index.bots_by_name = self.bots_by_name
+        return index
+
+    def _grid(self, type: str) -> Dict[Cell, List[Tuple[int, "GameObject"]]]:
+        # Grids are only built for the types that are actually queried.
+        grid = self._grids.get(type)
+        if grid is not None:
+            return grid
+
+        grid = {}
+        size = self.cell_size
+        for order, item in enumerate(self.by_type.get(type, ())):
+            cell = (item.position.x // size, item.position.y // size)
+            bucket = grid.get(cell)
+            if bucket is None:
+                grid[cell] = [(order, item)]
+            else:
+                bucket.append((order, item))
+        if grid:
+            xs = [cell[0] for cell in grid]
+            ys = [cell[1] for cell in grid]
+            self._bounds[type] = (min(xs), min(ys), max(xs), max(ys))
+        self._grids[type] = grid
+        return grid
+
+    def _cell(self, x: int, y: int) -> Cell:
+        return x // self.cell_size, y // self.cell_size
+
+    def of_type(self, type: str) -> List["GameObject"]:
+        """
+        All objects of the given type, in board order. The list is shared, do
+        not modify it.
+        """
+        return self.by_type.get(type, [])
+
+    def first(self, type: str) -> Optional["GameObject"]:
+        items = self.by_type.get(type)
+        return items[0] if items else None
+
+    def nearest(
+        self, position: "Position", type: str, predicate: Optional[Predicate] = None
+    ) -> Optional["GameObject"]:
+        """
+        Closest object of the given type by Manhattan distance, optionally
+        restricted to objects matching predicate
+        :param position: Position
+        :param type: string
+        :return: GameObject or None
+        """
+        grid = self._grid(type)
+        if not grid:
+            return None
+
+        px, py = position.x, position.y
+        cx, cy = self._cell(px, py)
+        min_cx, min_cy, max_cx, max_cy = self._bounds[type]
+        max_ring = max(cx - min_cx, max_cx - cx, cy - min_cy, max_cy - cy)
+
+        best = None
+        best_key = None
+        for ring in range(max_ring + 1):
+            for cell in _ring_cells(cx, cy, ring):
+                for order, item in grid.get(cell, ()):
+                    if predicate is not None and not predicate(item):
+                        continue
+                    distance = abs(item.position.x - px) + abs(item.position.y - py)
+                    key = (distance, order)
+                    if best_key is None or key < best_key:
+                        best, best_key = item, key
+            # Anything in the next ring is at least ring * cell_size + 1 away.
+            if best_key is not None and best_key[0] <= ring * self.cell_size:
+                break
+        return best
+
+    def coordinates(self, type: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        x and y arrays of the objects of a type, in board order
+        :param type: string
+        :return: (x, y)
+        """
+        coordinates = self._coordinates.get(type)
+        if coordinates is None:
+            items = self.by_type.get(type, ())
+            n = len(items)
+            x = np.fromiter((item.position.x for item in items), np.int32, n)
+            y = np.fromiter((item.position.y for item in items), np.int32, n)
+            coordinates = self._coordinates[type] = (x, y)
+        return coordinates
+
+    def _rect_mask(
+        self, x0: int, y0: int, x1: int, y1: int, type: str
+    ) -> np.ndarray:
+        x, y = self.coordinates(type)
+        return (x >= x0) & (x <= x1) & (y >= y0) & (y <= y1)
+
+    def within(
+        self,
+        x0: int,
+        y0: int,
+        x1: int,
+        y1: int,
+        type: str,
+        predicate: Optional[Predicate] = None,
+    ) -> List["GameObject"]:
+        """
+        Objects of the given type inside the inclusive rectangle
+        [x0, x1] x [y0, y1], in board order
+        :return: list of GameObject
+        """
+        items = self.by_type.get(type)
+        if not items:
+            return []
+
+        mask = self._rect_mask(x0, y0, x1, y1, type)
+        found = [items[i] for i in np.flatnonzero(mask)]
+        if predicate is not None:
+            found = [item for item in found if predicate(item)]
+        return found
+
+    def any_within(self, x0: int, y0: int, x1: int, y1: int, type: str) -> bool:
+        if not self.by_type.get(type):
+            return False
+        return bool(self._rect_mask(x0, y0, x1, y1, type).any())
+
+
+def _ring_cells(cx: int, cy: int, ring: int):
+    if ring == 0:
+        yield cx, cy
+        return
+    for dx in range(-ring, ring + 1):
+        yield cx + dx, cy - ring
+        yield cx + dx, cy + ring
+    for dy in range(-ring + 1, ring):
+        yield cx - ring, cy + dy
+        yield cx + ring, cy + dy
@@ -0,0 +1,100 @@
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from game.models import Board, GameObject
+
+Listener = Callable[["BoardDiff", Board], None]
+
+
+@dataclass(slots=True)
+class BoardDiff:
+    added: List[GameObject] = field(default_factory=list)
+    removed: List[GameObject] = field(default_factory=list)
+    # (previous, current) pairs
+    moved: List[Tuple[GameObject, GameObject]] = field(default_factory=list)
+    changed: List[Tuple[GameObject, GameObject]] = field(default_factory=list)
+    diamonds_reset: bool = False
+
+    @property
+    def changed_types(self) -> Set[str]:
+        types = {item.type for item in self.added}
+        types.update(item.type for item in self.removed)
+        types.update(current.type for _, current in self.moved)
+        types.update(current.type for _, current in self.changed)
+        return types
+
+    @property
+    def empty(self) -> bool:
+        return not (self.added or self.removed or self.moved or self.changed)
+
+
+class BoardState:
+    """
+    Follows one board across ticks. Each new snapshot is compared with the
+    previous one by object id: objects that did not change are swapped for the
+    previous instances, and only the types that did change are re-indexed, so
+    caches keyed on those objects stay valid. Listeners receive the diff after
+    every update.
+    """
+
+    def __init__(self):
+        self.board: Optional[Board] = None
+        self._by_id: Dict[int, GameObject] = {}
+        self._listeners: List[Listener] = []
+
+    def subscribe(self, listener: Listener):
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def update(self, board: Board) -> BoardDiff:
+        previous = self.board
+        if previous is not None and previous.id != board.id:
+            previous = None
+            self._by_id = {}
+
+        diff = BoardDiff()
+        by_id = {}
+        bots = 0
+        objects = board.game_objects or []
+        for i, item in enumerate(objects):
+            if item.type == "BotGameObject":
+                bots += 1
+            old = self._by_id.get(item.id)
+            if old is None or old.type != item.type:
+                diff.added.append(item)
+            elif old == item:
+                objects[i] = item = old
+            elif old.position != item.position:
+                diff.moved.append((old, item))
+            else:
+                diff.changed.append((old, item))
+            by_id[item.id] = item
+        for item_id, old in self._by_id.items():
+            current = by_id.get(item_id)
+            if current is None or current.type != old.type:
+                diff.removed.append(old)
+        diff.diamonds_reset = previous is not None and _is_diamond_reset(diff, bots)
+
+        if previous is not None and previous._index is not None:
+            board._index = previous._index.updated(objects, diff.changed_types)
+        self.board = board
+        self._by_id = by_id
+
+        for listener in self._listeners:
+            listener(diff, board)
+        return diff
+
+
+def _is_diamond_reset(diff: BoardDiff, bots: int) -> bool:
+    # Pressing the button moves it and regenerates every diamond at once,
+    # while normal play removes at most one diamond per bot per tick.
+    button = "DiamondButtonGameObject"
+    if any(item.type == button for _, item in diff.moved) or any(
+        item.type == button for item in diff.removed
+    ):
+        return True
+    removed = sum(1 for item in diff.removed if item.type == "DiamondGameObject")
+    return removed > max(bots, 1)
@@ -0,0 +1,11 @@
+from game.logic.gacorbot import gacorbot
+from game.logic.mcts import MctsLogic
+from game.logic.planner import PlannerLogic
+from game.logic.random import RandomLogic
+
+CONTROLLERS = {
+    "Random": RandomLogic,
+    "gacorbot": gacorbot,
+    "planner": PlannerLogic,
+    "mcts": MctsLogic,
+}
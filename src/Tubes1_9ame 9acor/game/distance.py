@@ -0,0 +1,119 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+from game.models import Board, GameObject
+
+BOT = 0
+BASE = 1
+
+DIAMOND = "diamond"
+BUTTON = "button"
+ENEMY = "enemy"
+TELEPORTER = "teleporter"
+HOME = "base"
+
+
+class DistanceTable:
+    """
+    Manhattan distances from every source (the bot, its base and each
+    teleporter) to every target (diamonds, buttons, enemy bots, teleporters and
+    the base), computed for one bot on one board in a single batched pass.
+
+    Source rows are BOT, BASE and then one row per teleporter. Target columns
+    are grouped by kind and keep board order within a kind, so ties resolve
+    the same way as min() over the board's object lists. A bot without a base
+    uses its own position as base.
+    """
+
+    def __init__(self, board_bot: GameObject, board: Board):
+        index = board.index
+        self.board = board
+        self.board_bot = board_bot
+        self.diamonds: List[GameObject] = index.of_type("DiamondGameObject")
+        self.buttons: List[GameObject] = index.of_type("DiamondButtonGameObject")
+        self.teleporters: List[GameObject] = index.of_type("TeleportGameObject")
+        self.enemies: List[GameObject] = [
+            bot for bot in index.of_type("BotGameObject") if bot.id != board_bot.id
+        ]
+        self.diamond_points = np.fromiter(
+            (d.properties.points or 0 for d in self.diamonds),
+            dtype=np.int16,
+            count=len(self.diamonds),
+        )
+
+        base = board_bot.properties.base or board_bot.position
+        diamond_x, diamond_y = index.coordinates("DiamondGameObject")
+        button_x, button_y = index.coordinates("DiamondButtonGameObject")
+        teleporter_x, teleporter_y = index.coordinates("TeleportGameObject")
+        enemy_x, enemy_y = _coordinates([bot.position for bot in self.enemies])
+        columns = (
+            (DIAMOND, diamond_x, diamond_y),
+            (BUTTON, button_x, button_y),
+            (ENEMY, enemy_x, enemy_y),
+            (TELEPORTER, teleporter_x, teleporter_y),
+            (HOME, np.array([base.x], np.int32), np.array([base.y], np.int32)),
+        )
+        self._columns = {}
+        start = 0
+        for kind, x, _ in columns:
+            self._columns[kind] = slice(start, start + len(x))
+            start += len(x)
+
+        sx = np.concatenate(([board_bot.position.x, base.x], teleporter_x))
+        sy = np.concatenate(([board_bot.position.y, base.y], teleporter_y))
+        tx = np.concatenate([x for _, x, _ in columns])
+        ty = np.concatenate([y for _, _, y in columns])
+        self.matrix = np.abs(sx[:, None] - tx[None, :]) + np.abs(
+            sy[:, None] - ty[None, :]
+        )
+
+    def distances(self, source: int, kind: str) -> np.ndarray:
+        """
+        Distances from a source row to every target of a kind
+        :param source: BOT, BASE or the row of a teleporter
+        :param kind: DIAMOND, BUTTON, ENEMY, TELEPORTER or HOME
+        :return: array of distances in board order
+        """
+        return self.matrix[source, self._columns[kind]]
+
+    def teleporter_row(self, i: int) -> int:
+        return BASE + 1 + i
+
+    def nearest(
+        self, source: int, kind: str, mask: Optional[np.ndarray] = None
+    ) -> Optional[Tuple[int, int]]:
+        """
+        Index and distance of the closest target of a kind, optionally only
+        among targets where mask is true
+        :return: (index, distance) or None
+        """
+        distances = self.distances(source, kind)
+        if mask is not None:
+            if not mask.any():
+                return None
+            candidates = np.flatnonzero(mask)
+            i = int(candidates[np.argmin(distances[candidates])])
+        elif len(distances) == 0:
+            return None
+        else:
+            i = int(np.argmin(distances))
+        return i, int(distances[i])
+
+    def nearest_diamond(
+        self, points: Optional[int] = None, source: int = BOT
+    ) -> Optional[Tuple[GameObject, int]]:
+        mask = None if points is None else self.diamond_points == points
+        found = self.nearest(source, DIAMOND, mask)
+        if found is None:
+            return None
+        return self.diamonds[found[0]], found[1]
+
+    def to_base(self, source: int) -> int:
+        return int(self.matrix[source, self._columns[HOME]][0])
+
+
+def _coordinates(positions) -> Tuple[np.ndarray, np.ndarray]:
+    n = len(positions)
+    x = np.fromiter((p.x for p in positions), dtype=np.int32, count=n)
+    y = np.fromiter((p.y for p in positions), dtype=np.int32, count=n)
+    return x, y
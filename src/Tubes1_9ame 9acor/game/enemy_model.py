@@ -0,0 +1,335 @@
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from game.board_state import BoardDiff
+from game.models import Board, GameObject, Position
+from game.pathfinding import DIRECTIONS
+
+# Relative weights of an enemy's next move. The direction of its goal is the
+# most likely one, then keeping its last heading, then anything else.
+GOAL_WEIGHT = 6.0
+MOMENTUM_WEIGHT = 3.0
+OTHER_WEIGHT = 1.0
+STAY_WEIGHT = 0.5
+
+Stamp = List[Tuple[int, float]]
+
+
+class Enemy:
+    """
+    What is known about one bot: its recent positions, inventory and base,
+    and its current contribution (stamp) to the threat and opportunity maps.
+    """
+
+    __slots__ = (
+        "id",
+        "name",
+        "history",
+        "diamonds",
+        "inventory_size",
+        "can_tackle",
+        "base",
+        "stamp",
+        "value",
+    )
+
+    def __init__(self, bot: GameObject, history: int):
+        self.id = bot.id
+        self.name = bot.properties.name
+        self.history: Deque[Tuple[int, int]] = deque(maxlen=history)
+        self.stamp: Stamp = []
+        self.value = 0.0
+        self.observe(bot)
+
+    def copy(self) -> "Enemy":
+        clone = object.__new__(Enemy)
+        for name in Enemy.__slots__:
+            setattr(clone, name, getattr(self, name))
+        # The stamp is replaced, never changed, only the history is shared
+        clone.history = deque(self.history, maxlen=self.history.maxlen)
+        return clone
+
+    def observe(self, bot: GameObject):
+        props = bot.properties
+        position = (bot.position.x, bot.position.y)
+        if not self.history or self.history[-1] != position:
+            self.history.append(position)
+        self.diamonds = props.diamonds or 0
+        self.inventory_size = props.inventory_size
+        self.can_tackle = bool(props.can_tackle)
+        self.base = props.base
+
+    @property
+    def position(self) -> Position:
+        x, y = self.history[-1]
+        return Position(y=y, x=x)
+
+    @property
+    def last_move(self) -> Optional[Tuple[int, int]]:
+        if len(self.history) < 2:
+            return None
+        (x0, y0), (x1, y1) = self.history[-2], self.history[-1]
+        move = (x1 - x0, y1 - y0)
+        # Teleports show up as jumps, they tell nothing about the heading
+        return move if move in DIRECTIONS else None
+
+    @property
+    def at_base(self) -> bool:
+        return self.base is not None and self.history[-1] == (self.base.x, self.base.y)
+
+    @property
+    def returning(self) -> bool:
+        """
+        Whether the bot seems to be on its way home: it is full, or it
+        carries diamonds and each of its last moves got it closer to base
+        """
+        if self.base is None or self.at_base or not self.diamonds:
+            return False
+        if self.inventory_size is not None and self.diamonds >= self.inventory_size:
+            return True
+        recent = list(self.history)[-3:]
+        if len(recent) < 3:
+            return False
+        distances = [abs(x - self.base.x) + abs(y - self.base.y) for x, y in recent]
+        return all(a > b for a, b in zip(distances, distances[1:]))
+
+
+class EnemyTracker:
+    """
+    Follows every bot across board snapshots. Subscribe on_board_update to a
+    BoardState: only bots that moved, or whose inventory, base or ability to
+    tackle changed, are looked at again. Every bot's milliseconds_left
+    changes each tick and is ignored, so the cost of a tick grows with the
+    bots that moved, not with the bots on the board.
+
+    For each bot it predicts a distribution over its next cell, leaning
+    towards its base once it seems to be heading home and otherwise towards
+    its last heading. Those predictions are kept summed in two maps:
+    threat, the chance that a bot able to tackle walks into a cell next
+    tick, and opportunity, the diamonds expected to stand on a cell next
+    tick, i.e. what a tackle there could take. Users that never read the
+    opportunity map can turn it off, and our own bot is left out of both
+    with ignore().
+    """
+
+    def __init__(self, history: int = 8, opportunities: bool = True):
+        self.history = history
+        self.opportunities = opportunities
+        self.enemies: Dict[int, Enemy] = {}
+        self.ignored: Set[int] = set()
+        self.width = 0
+        self.height = 0
+        self.threat = np.zeros(0)
+        self.opportunity = np.zeros(0)
+        self._board: Optional[Board] = None
+
+    def copy(self) -> "EnemyTracker":
+        """
+        Tracker that can be updated independently of this one
+        """
+        clone = object.__new__(EnemyTracker)
+        clone.__dict__.update(self.__dict__)
+        clone.enemies = {bot_id: enemy.copy() for bot_id, enemy in self.enemies.items()}
+        clone.ignored = set(self.ignored)
+        clone.threat = self.threat.copy()
+        clone.opportunity = self.opportunity.copy()
+        return clone
+
+    def on_board_update(self, diff: BoardDiff, board: Board) -> None:
+        if board is self._board:
+            # Already seen, e.g. replayed after a speculative decision
+            return
+        self._board = board
+        if (board.width, board.height) != (self.width, self.height):
+            self._reset(board)
+            return
+
+        for item in diff.removed:
+            if item.type == "BotGameObject":
+                self._remove(item.id)
+        changed = [item for item in diff.added if item.type == "BotGameObject"]
+        changed.extend(
+            current for _, current in diff.moved if current.type == "BotGameObject"
+        )
+        changed.extend(
+            current
+            for previous, current in diff.changed
+            if current.type == "BotGameObject"
+            and _observed(previous) != _observed(current)
+        )
+        for bot in changed:
+            self._observe(bot)
+
+    def _reset(self, board: Board):
+        self.width, self.height = board.width, board.height
+        self.threat = np.zeros(board.width * board.height)
+        self.opportunity = np.zeros(board.width * board.height)
+        self.enemies = {}
+        for bot in board.bots:
+            self._observe(bot)
+
+    def ignore(self, bot_id: int):
+        """
+        Leave a bot out of the threat and opportunity maps, e.g. our own
+        """
+        if bot_id in self.ignored:
+            return
+        enemy = self.enemies.get(bot_id)
+        if enemy is not None:
+            self._apply(enemy, -1)
+        self.ignored.add(bot_id)
+
+    def _remove(self, bot_id: int):
+        enemy = self.enemies.pop(bot_id, None)
+        if enemy is not None:
+            self._apply(enemy, -1)
+
+    def _observe(self, bot: GameObject):
+        enemy = self.enemies.get(bot.id)
+        if enemy is None:
+            enemy = self.enemies[bot.id] = Enemy(bot, self.history)
+        else:
+            self._apply(enemy, -1)
+            enemy.observe(bot)
+        enemy.stamp = self._predict(enemy)
+        enemy.value = 0.0 if enemy.at_base else float(enemy.diamonds)
+        self._apply(enemy, 1)
+
+    def _apply(self, enemy: Enemy, sign: int):
+        # Clamped at zero, so removed stamps leave no rounding noise below it
+        if enemy.id in self.ignored:
+            return
+        threat, opportunity = self.threat, self.opportunity
+        for cell, probability in enemy.stamp:
+            if enemy.can_tackle:
+                threat[cell] = max(0.0, threat[cell] + sign * probability)
+            if self.opportunities:
+                opportunity[cell] = max(
+                    0.0, opportunity[cell] + sign * probability * enemy.value
+                )
+
+    def _predict(self, enemy: Enemy) -> Stamp:
+        x, y = enemy.history[-1]
+        goal = None
+        if enemy.returning:
+            goal = (enemy.base.x, enemy.base.y)
+        momentum = enemy.last_move
+
+        weights = [(y * self.width + x, STAY_WEIGHT)]
+        for dx, dy in DIRECTIONS:
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < self.width and 0 <= ny < self.height):
+                continue
+            weight = OTHER_WEIGHT
+            if goal is not None and (
+                abs(goal[0] - nx) + abs(goal[1] - ny)
+                < abs(goal[0] - x) + abs(goal[1] - y)
+            ):
+                weight = GOAL_WEIGHT
+            elif (dx, dy) == momentum:
+                weight = MOMENTUM_WEIGHT
+            weights.append((ny * self.width + nx, weight))
+        total = sum(weight for _, weight in weights)
+        return [(cell, weight / total) for cell, weight in weights]
+
+    def _map(self, values: np.ndarray, exclude: Iterable[int], threat: bool):
+        stamps = [
+            enemy
+            for enemy in map(self.enemies.get, exclude)
+            if enemy is not None
+            and enemy.id not in self.ignored
+            and (enemy.can_tackle or not threat)
+        ]
+        if stamps:
+            values = values.copy()
+            for enemy in stamps:
+                for cell, probability in enemy.stamp:
+                    values[cell] -= probability * (1 if threat else enemy.value)
+            np.clip(values, 0, None, out=values)
+        else:
+            values = values.view()
+            values.flags.writeable = False
+        return values.reshape(self.height, self.width)
+
+    def threat_map(self, exclude: Iterable[int] = ()) -> np.ndarray:
+        """
+        Chance per cell, shaped (height, width), that a bot able to tackle
+        moves into it next tick. A read-only view that follows later updates,
+        unless bots in exclude had to be taken out of a copy; ignore() our
+        own bot instead of excluding it on every call.
+        """
+        return self._map(self.threat, exclude, True)
+
+    def opportunity_map(self, exclude: Iterable[int] = ()) -> np.ndarray:
+        """
+        Expected diamonds per cell, shaped (height, width), carried by bots
+        that may stand on it next tick. A view like threat_map.
+        """
+        return self._map(self.opportunity, exclude, False)
+
+    def threat_at(self, position: Position, exclude: Iterable[int] = ()) -> float:
+        cell = position.y * self.width + position.x
+        value = self.threat[cell]
+        for bot_id in exclude:
+            enemy = self.enemies.get(bot_id)
+            if enemy is not None and enemy.can_tackle and bot_id not in self.ignored:
+                value -= dict(enemy.stamp).get(cell, 0.0)
+        return max(0.0, float(value))
+
+    def predict(self, bot_id: int) -> Optional[Position]:
+        """
+        Most likely cell of the bot next tick
+        """
+        enemy = self.enemies.get(bot_id)
+        if enemy is None or not enemy.stamp:
+            return None
+        cell = max(enemy.stamp, key=lambda item: item[1])[0]
+        return Position(y=cell // self.width, x=cell % self.width)
+
+    def path(self, bot_id: int, steps: int) -> List[Position]:
+        """
+        Most likely cells of the bot over the next steps ticks, following its
+        way home if it is returning, otherwise its last heading
+        """
+        enemy = self.enemies.get(bot_id)
+        if enemy is None:
+            return []
+        x, y = enemy.history[-1]
+        momentum = enemy.last_move
+        goal = (enemy.base.x, enemy.base.y) if enemy.returning else None
+        result = []
+        for _ in range(steps):
+            if goal is not None:
+                if (x, y) == goal:
+                    break
+                if goal[0] != x:
+                    x += 1 if goal[0] > x else -1
+                else:
+                    y += 1 if goal[1] > y else -1
+            elif momentum is not None:
+                nx, ny = x + momentum[0], y + momentum[1]
+                if not (0 <= nx < self.width and 0 <= ny < self.height):
+                    break
+                x, y = nx, ny
+            else:
+                break
+            result.append(Position(y=y, x=x))
+        return result
+
+    def destination(self, bot_id: int) -> Optional[Tuple[Position, int]]:
+        """
+        Base the bot is returning to and the moves it needs to get there,
+        None if it does not seem to be going home
+        """
+        enemy = self.enemies.get(bot_id)
+        if enemy is None or not enemy.returning:
+            return None
+        x, y = enemy.history[-1]
+        return enemy.base, abs(enemy.base.x - x) + abs(enemy.base.y - y)
+
+
+def _observed(bot: GameObject) -> tuple:
+    # What an Enemy reads from a bot besides its position
+    props = bot.properties
+    return (props.diamonds, props.inventory_size, props.can_tackle, props.base)
@@ -0,0 +1,161 @@
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import numpy as np
+from game.models import Board, Position
+
+
+@dataclass(slots=True)
+class Region:
+    # Top left corner and side of a square of cells
+    x: int
+    y: int
+    size: int
+    points: int
+    count: int
+    # Moves from the origin of the query to the closest cell of the region
+    distance: int
+
+    @property
+    def center(self) -> Position:
+        return Position(y=self.y + self.size // 2, x=self.x + self.size // 2)
+
+    def contains(self, position: Position) -> bool:
+        return (
+            self.x <= position.x < self.x + self.size
+            and self.y <= position.y < self.y + self.size
+        )
+
+
+class DiamondHeatmap:
+    """
+    Diamond points and diamond counts of one board as summed-area tables:
+    cell (y, x) of a table holds the total of every cell above and left of
+    it, so the total of any rectangle takes four lookups however many
+    diamonds there are. Build one per snapshot, it never changes afterwards.
+    """
+
+    def __init__(self, board: Board):
+        self.board = board
+        self.width = board.width
+        self.height = board.height
+        diamonds = board.diamonds
+        n = len(diamonds)
+        x = np.fromiter((item.position.x for item in diamonds), np.int64, n)
+        y = np.fromiter((item.position.y for item in diamonds), np.int64, n)
+        points = np.fromiter(
+            (
+                (item.properties.points or 1) if item.properties else 1
+                for item in diamonds
+            ),
+            np.int64,
+            n,
+        )
+        inside = (x >= 0) & (x < self.width) & (y >= 0) & (y < self.height)
+        x, y, points = x[inside], y[inside], points[inside]
+        self.points = self._table(y, x, points)
+        self.counts = self._table(y, x, np.ones_like(points))
+        self._windows: Dict[int, np.ndarray] = {}
+
+    def _table(
+        self, y: np.ndarray, x: np.ndarray, weights: np.ndarray
+    ) -> np.ndarray:
+        grid = np.zeros((self.height, self.width), dtype=np.int64)
+        np.add.at(grid, (y, x), weights)
+        table = np.zeros((self.height + 1, self.width + 1), dtype=np.int64)
+        table[1:, 1:] = grid.cumsum(axis=0).cumsum(axis=1)
+        return table
+
+    def _sum(self, table: np.ndarray, x0: int, y0: int, x1: int, y1: int) -> int:
+        # Inclusive bounds, clipped to the board
+        x0, y0 = max(x0, 0), max(y0, 0)
+        x1, y1 = min(x1, self.width - 1), min(y1, self.height - 1)
+        if x0 > x1 or y0 > y1:
+            return 0
+        return int(
+            table[y1 + 1, x1 + 1]
+            - table[y0, x1 + 1]
+            - table[y1 + 1, x0]
+            + table[y0, x0]
+        )
+
+    def points_in(self, x0: int, y0: int, x1: int, y1: int) -> int:
+        """
+        Points of the diamonds in the rectangle between (x0, y0) and
+        (x1, y1), both included
+        """
+        return self._sum(self.points, x0, y0, x1, y1)
+
+    def count_in(self, x0: int, y0: int, x1: int, y1: int) -> int:
+        return self._sum(self.counts, x0, y0, x1, y1)
+
+    def points_around(self, center: Position, radius: int) -> int:
+        """
+        Points in the square of cells at most radius away from center on
+        both axes
+        """
+        return self.points_in(
+            center.x - radius, center.y - radius, center.x + radius, center.y + radius
+        )
+
+    def count_around(self, center: Position, radius: int) -> int:
+        return self.count_in(
+            center.x - radius, center.y - radius, center.x + radius, center.y + radius
+        )
+
+    def windows(self, size: int) -> np.ndarray:
+        """
+        Points of every size x size square on the board, indexed by the
+        square's top left corner as [y, x]
+        """
+        size = max(1, min(size, self.width, self.height))
+        windows = self._windows.get(size)
+        if windows is None:
+            t = self.points
+            windows = self._windows[size] = (
+                t[size:, size:]
+                - t[:-size, size:]
+                - t[size:, :-size]
+                + t[:-size, :-size]
+            )
+        return windows
+
+    def best_region(
+        self,
+        size: int,
+        origin: Optional[Position] = None,
+        reach: Optional[int] = None,
+    ) -> Optional[Region]:
+        """
+        The size x size square with the most points, only considering squares
+        whose closest cell is at most reach moves from origin. Ties go to the
+        closer square. None if no square within reach holds a diamond.
+        """
+        size = max(1, min(size, self.width, self.height))
+        windows = self.windows(size)
+        if origin is None:
+            distance = np.zeros_like(windows)
+        else:
+            # Moves to the closest cell of each square, per axis
+            xs = np.arange(windows.shape[1])
+            ys = np.arange(windows.shape[0])
+            dx = np.maximum(0, np.maximum(xs - origin.x, origin.x - (xs + size - 1)))
+            dy = np.maximum(0, np.maximum(ys - origin.y, origin.y - (ys + size - 1)))
+            distance = dy[:, None] + dx[None, :]
+        score = windows.astype(np.float64)
+        if reach is not None:
+            score[distance > reach] = -1
+        # Most points first, then the closest
+        score -= distance / (distance.max() + 1.0)
+        y, x = np.unravel_index(int(np.argmax(score)), score.shape)
+        points = int(windows[y, x])
+        if points <= 0 or (reach is not None and distance[y, x] > reach):
+            return None
+        return Region(
+            x=int(x),
+            y=int(y),
+            size=size,
+            points=points,
+            count=self.count_in(x, y, x + size - 1, y + size - 1),
+            distance=int(distance[y, x]),
+        )
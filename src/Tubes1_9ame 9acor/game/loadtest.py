@@ -0,0 +1,173 @@
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from game import metrics
+from game.runner import BotConfig, run_bots
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+@dataclass
+class LoadTestResult:
+    bots: int
+    seconds: float
+    requests: int
+    failed_moves: int
+    # Boards requested from the server and boards served from a shared one
+    board_fetches: int
+    shared_boards: int
+    # Round-trip of one request in milliseconds: p50, p95, p99, max
+    latency_ms: Dict[str, float]
+    cpu_seconds: float
+    # Resident memory growth while the bots ran, None where it can't be read
+    memory_bytes: Optional[int]
+
+    @property
+    def requests_per_second(self) -> float:
+        return self.requests / self.seconds if self.seconds else 0.0
+
+    @property
+    def cpu_per_bot(self) -> float:
+        """
+        Share of one core each bot used on average
+        """
+        if not self.bots or not self.seconds:
+            return 0.0
+        return self.cpu_seconds / self.seconds / self.bots
+
+    @property
+    def memory_per_bot(self) -> Optional[float]:
+        if self.memory_bytes is None or not self.bots:
+            return None
+        return self.memory_bytes / self.bots
+
+    def report(self) -> str:
+        lines = [
+            "bots              {}".format(self.bots),
+            "duration          {:.1f} s".format(self.seconds),
+            "requests          {} ({:.1f}/s)".format(
+                self.requests, self.requests_per_second
+            ),
+            "failed moves      {}".format(self.failed_moves),
+            "boards fetched    {}, {} shared".format(
+                self.board_fetches, self.shared_boards
+            ),
+            "latency ms        p50 {p50:.2f}  p95 {p95:.2f}  p99 {p99:.2f}  "
+            "max {max:.2f}".format(**self.latency_ms),
+            "cpu               {:.2f} s, {:.2%} of a core per bot".format(
+                self.cpu_seconds, self.cpu_per_bot
+            ),
+        ]
+        if self.memory_bytes is not None:
+            lines.append(
+                "memory            {:.1f} MiB, {:.1f} KiB per bot".format(
+                    self.memory_bytes / 2**20, self.memory_per_bot / 2**10
+                )
+            )
+        return "\n".join(lines)
+
+
+def rss_bytes() -> Optional[int]:
+    """
+    Current resident memory of this process
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is None:
+        return None
+    # Peak instead of current, ru_maxrss is in bytes on macOS, KiB elsewhere
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+def bot_configs(
+    count: int, logic: str = "Random", prefix: str = "load", password: str = "123456"
+) -> List[BotConfig]:
+    return [
+        BotConfig(
+            logic=logic,
+            name="{}{}".format(prefix, i),
+            email="{}{}@email.com".format(prefix, i),
+            password=password,
+            team="load",
+        )
+        for i in range(count)
+    ]
+
+
+async def _run(
+    configs: List[BotConfig], host: str, board_id: int, **kwargs
+) -> Optional[int]:
+    # Memory is sampled while the bots run, they are gone once it returns
+    peak = start = rss_bytes()
+
+    async def sample():
+        nonlocal peak
+        while True:
+            await asyncio.sleep(0.2)
+            current = rss_bytes()
+            if current is not None and current > peak:
+                peak = current
+
+    sampler = asyncio.ensure_future(sample())
+    try:
+        await run_bots(configs, host, board_id, **kwargs)
+    finally:
+        sampler.cancel()
+    return None if start is None else peak - start
+
+
+def run_load_test(
+    configs: List[BotConfig],
+    host: str,
+    board_id: int = 1,
+    time_factor: int = 1,
+    pool_size: int = 100,
+) -> LoadTestResult:
+    """
+    Play every bot in configs until its game ends, on one event loop like
+    multi_bot.py, and measure the client side: requests and their latency,
+    CPU time and memory of this process.
+    """
+    previous = metrics.get_registry()
+    registry = metrics.set_registry(metrics.MetricsRegistry())
+    try:
+        cpu = time.process_time()
+        start = time.perf_counter()
+        memory = asyncio.run(
+            _run(
+                configs,
+                host,
+                board_id,
+                time_factor=time_factor,
+                pool_size=pool_size,
+            )
+        )
+        seconds = time.perf_counter() - start
+        cpu = time.process_time() - cpu
+    finally:
+        metrics.set_registry(previous)
+
+    http = registry.histogram("http").summary()
+    return LoadTestResult(
+        bots=len(configs),
+        seconds=seconds,
+        requests=int(http["count"]),
+        failed_moves=int(registry.counters.get("failed_moves", 0)),
+        board_fetches=int(registry.counters.get("board_fetches", 0)),
+        shared_boards=int(registry.counters.get("shared_boards", 0)),
+        latency_ms={
+            key: http[key] * 1000 for key in ("p50", "p95", "p99", "max")
+        },
+        cpu_seconds=cpu,
+        memory_bytes=memory,
+    )
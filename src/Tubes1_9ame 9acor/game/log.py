@@ -0,0 +1,119 @@
+import atexit
+import json
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from colorama import Fore, Style
+
+_LEVEL_STYLES = {
+    logging.DEBUG: Style.DIM,
+    logging.INFO: Fore.BLUE + Style.BRIGHT,
+    logging.WARNING: Fore.YELLOW + Style.BRIGHT,
+    logging.ERROR: Fore.RED + Style.BRIGHT,
+    logging.CRITICAL: Fore.RED + Style.BRIGHT,
+}
+# Attributes every LogRecord has, anything else was passed through extra=
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+
+
+class ColorFormatter(logging.Formatter):
+    """
+    Same look as the old prints: warnings and errors get a coloured
+    "Warn:" / "Error:" prefix, info and debug lines are printed as they are.
+    """
+
+    _LABELS = {
+        logging.WARNING: "Warn:",
+        logging.ERROR: "Error:",
+        logging.CRITICAL: "Error:",
+    }
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        label = self._LABELS.get(record.levelno)
+        if label is None:
+            if record.levelno <= logging.DEBUG:
+                return _LEVEL_STYLES[logging.DEBUG] + message + Style.RESET_ALL
+            return message
+        return "{}{}{} {}".format(
+            _LEVEL_STYLES[record.levelno], label, Style.RESET_ALL, message
+        )
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    One JSON object per record with time, level, logger and message, plus
+    any fields given through extra=
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _LazyQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue never leaves the process, so the record does not need to
+        # be made picklable. Leaving msg % args to the listener thread keeps
+        # all formatting off the caller's path.
+        return record
+
+
+def setup_logging(
+    level: str = "INFO", json_file: Optional[str] = None, stream=None
+) -> QueueListener:
+    """
+    Route every logger through a queue to a background thread that writes
+    to stream (stdout by default) and, if given, to json_file as JSON lines.
+    The listener is stopped, and the queue flushed, when the process exits.
+    :param level: name of the lowest level to log, e.g. DEBUG
+    :return: QueueListener
+    """
+    global _listener
+    stop_logging()
+
+    console = logging.StreamHandler(stream or sys.stdout)
+    console.setFormatter(ColorFormatter())
+    handlers = [console]
+    if json_file:
+        sink = logging.FileHandler(json_file, mode="a", encoding="utf-8")
+        sink.setFormatter(JsonLinesFormatter())
+        handlers.append(sink)
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_LazyQueueHandler(records))
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+
+    _listener = QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
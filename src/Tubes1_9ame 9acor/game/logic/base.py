@@ -1,9 +1,26 @@
 from abc import ABC
-from typing import Tuple
+from typing import Optional, Tuple
 
+from game.board_state import BoardDiff
 from game.models import Board, GameObject
 
 
 class BaseLogic(ABC):
+    # Logics that search for as long as they are allowed set anytime, the
+    # async runner then runs their next_move off the event loop
+    anytime = False
+    # time.monotonic() at which the game loop sends the next move, if known.
+    # Set before every next_move, a search should be done by then.
+    deadline: Optional[float] = None
+    # Whether next_move looks at the other bots. If so, the speculative
+    # pipeline only reuses a decision when they are where it predicted them.
+    reads_bots = True
+
     def next_move(self, board_bot: GameObject, board: Board) -> Tuple[int, int]:
         raise NotImplementedError()
+
+    def on_board_update(self, diff: BoardDiff, board: Board) -> None:
+        """
+        Called with the changes since the previous snapshot every time a new
+        board is received, before next_move
+        """
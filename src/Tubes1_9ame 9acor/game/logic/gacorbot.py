@@ -1,29 +1,84 @@
 from typing import Optional
 from typing import List
+import numpy as np
+from game.board_state import BoardDiff
+from game.distance import BOT, BUTTON, DistanceTable
+from game.enemy_model import EnemyTracker
+from game.heatmap import DiamondHeatmap
 from game.logic.base import BaseLogic
 from game.models import Board, GameObject, Position
+from game.pathfinding import PathFinder
+from game.util import position_equals
+
+# Peluang minimal bot penyerang masuk ke sebuah sel tick berikutnya agar sel
+# itu dihindari selama kita membawa diamond
+BATAS_ANCAMAN = 0.3
 
 class gacorbot(BaseLogic):
-    def __init__(self):
+    def __init__(self, jarak_base: int = 4, jarak_sekitar: int = 2, batas_kejar: int = 3,
+                 batas_diamond: int = 3, pelacak: bool = False, klaster: int = 0,
+                 jangkauan_klaster: int = 8):
+        # Parameter strategi, bisa diubah untuk tuning lewat turnamen
+        self.jarak_base = jarak_base
+        self.jarak_sekitar = jarak_sekitar
+        # Jarak maksimal bot musuh yang dikejar dan diamond yang masih dikejar
+        # saat inventory sudah terisi, dituning terpisah
+        self.batas_kejar = batas_kejar
+        self.batas_diamond = batas_diamond
+        # Dengan pelacak, bot musuh diikuti tiap tick dan dikejar kalau tackle aktif
+        self.pelacak: Optional[EnemyTracker] = (
+            EnemyTracker(opportunities=False) if pelacak else None)
+        # Sisi kotak klaster diamond yang dicari saat inventory kosong, 0 berarti mati
+        self.klaster = klaster
+        # Langkah maksimal ke kotak klaster terdekat
+        self.jangkauan_klaster = jangkauan_klaster
         self.arah = [(1, 0), (0,1), (-1,0), (0, -1)]
         self.goal_position: Optional[Position] = None
-        self.is_teleport = False
         self.langkah = 0
+        # Tick tersisa sebelum boleh mengejar lagi setelah kejaran terlalu lama
+        self.jeda_kejar = 0
         self.arah_saat_ini = 0
-
-    def diamond_dekat_base(self, bot_papan: GameObject, papan: Board, jarak: int = 4):
+        self.tabel: Optional[DistanceTable] = None
+        self.peta: Optional[DiamondHeatmap] = None
+
+    def __copy__(self):
+        # Pipeline spekulatif memakai salinan, pelacak tidak boleh dipakai bersama
+        clone = object.__new__(type(self))
+        clone.__dict__.update(self.__dict__)
+        if self.pelacak is not None:
+            clone.pelacak = self.pelacak.copy()
+        return clone
+
+    def on_board_update(self, diff: BoardDiff, board: Board) -> None:
+        if self.pelacak is not None:
+            self.pelacak.on_board_update(diff, board)
+
+    def tabel_jarak(self, bot_papan: GameObject, papan: Board) -> DistanceTable:
+        # Semua jarak untuk satu papan dihitung sekali lalu dipakai ulang
+        if self.tabel is None or self.tabel.board is not papan or self.tabel.board_bot is not bot_papan:
+            self.tabel = DistanceTable(bot_papan, papan)
+        return self.tabel
+
+    def peta_diamond(self, papan: Board) -> DiamondHeatmap:
+        # Peta kepadatan diamond dibangun sekali per papan, tiap kotak dihitung O(1)
+        if self.peta is None or self.peta.board is not papan:
+            self.peta = DiamondHeatmap(papan)
+        return self.peta
+
+    def diamond_dekat_base(self, bot_papan: GameObject, papan: Board, jarak: Optional[int] = None):
+        jarak = self.jarak_base if jarak is None else jarak
         gcor = bot_papan.properties.base
-        diamond = papan.diamonds
         if not gcor:
             return []
 
         return [
-            diamond.position for diamond in diamond
-            if ((gcor.x - jarak <= diamond.position.x <= gcor.x + jarak) and
-                (gcor.y - jarak <= diamond.position.y <= gcor.y + jarak))
+            diamond.position for diamond in papan.index.within(
+                gcor.x - jarak, gcor.y - jarak, gcor.x + jarak, gcor.y + jarak,
+                "DiamondGameObject")
         ]
     
-    def botsekitarbase(self, bot_papan: GameObject, jarak: int = 4):
+    def botsekitarbase(self, bot_papan: GameObject, jarak: Optional[int] = None):
+        jarak = self.jarak_base if jarak is None else jarak
         gcor = bot_papan.properties.base
         posisi_saat_ini = bot_papan.position
         return ((gcor.x - jarak <= posisi_saat_ini.x <= gcor.x + jarak) and 
@@ -34,43 +89,50 @@ class gacorbot(BaseLogic):
         diamond_terdekat = min(diamonds, key=lambda diamond: abs(diamond.x - posisi_saat_ini.x) + abs(diamond.y - posisi_saat_ini.y))
         return diamond_terdekat
     
-    def diamondsekitarbase(self, bot_papan: GameObject, papan: Board, jarak: int = 2):
-        diamonds = papan.diamonds
+    def diamondsekitarbase(self, bot_papan: GameObject, papan: Board, jarak: Optional[int] = None):
+        jarak = self.jarak_sekitar if jarak is None else jarak
         gcor = bot_papan.properties.base
 
         if not gcor:
             return False  
-        
-        for diamond in diamonds:
-            if ((gcor.x - jarak) <= diamond.position.x <= (gcor.x + jarak) and 
-               (gcor.y - jarak) <= diamond.position.y <= (gcor.y + jarak)):
-                return True  
-        
-        return False
 
-    def diamond_terdekat(self, bot_papan: GameObject, papan: Board):
-        posisi_saat_ini = bot_papan.position
-        diamond_biru = [d for d in papan.diamonds if d.properties.points == 1]
-        if not diamond_biru:
+        return self.peta_diamond(papan).count_around(gcor, jarak) > 0
+
+    def jumlah_diamond_base(self, bot_papan: GameObject, papan: Board, jarak: Optional[int] = None):
+        jarak = self.jarak_base if jarak is None else jarak
+        gcor = bot_papan.properties.base
+        if not gcor:
+            return 0
+        return self.peta_diamond(papan).count_around(gcor, jarak)
+
+    def diamond_klaster(self, bot_papan: GameObject, papan: Board):
+        # Diamond terdekat di kotak klaster x klaster dengan poin terbanyak yang terjangkau
+        daerah = self.peta_diamond(papan).best_region(
+            self.klaster, bot_papan.position, reach=self.jangkauan_klaster)
+        if daerah is None or daerah.count < 2:
             return None
-        
-        return min(diamond_biru, key=lambda d: abs(d.position.x - posisi_saat_ini.x) + abs(d.position.y - posisi_saat_ini.y)).position if diamond_biru else None
+        diamonds = [
+            diamond.position for diamond in papan.index.within(
+                daerah.x, daerah.y, daerah.x + daerah.size - 1, daerah.y + daerah.size - 1,
+                "DiamondGameObject")
+        ]
+        return self.diamonddekatbot(bot_papan, diamonds) if diamonds else None
+
+    def diamond_terdekat(self, bot_papan: GameObject, papan: Board):
+        diamond_biru = self.tabel_jarak(bot_papan, papan).nearest_diamond(1)
+        return diamond_biru[0].position if diamond_biru else None
 
     def jarak_diamond_dekat(self, bot_papan: GameObject, papan: Board):
-        terdekat = self.diamond_terdekat(bot_papan, papan)
-        return 999 if terdekat is None else abs(terdekat.x - bot_papan.position.x) + abs(terdekat.y - bot_papan.position.y)
+        diamond_biru = self.tabel_jarak(bot_papan, papan).nearest_diamond(1)
+        return 999 if diamond_biru is None else diamond_biru[1]
     
     def diamondmerah_terdekat(self, bot_papan: GameObject, papan: Board):
-        posisi_saat_ini = bot_papan.position
-        diamond_merah = [d for d in papan.diamonds if d.properties.points == 2]
-        if not diamond_merah:
-            return None
-
-        return min(diamond_merah, key=lambda d: abs(d.position.x - posisi_saat_ini.x) + abs(d.position.y - posisi_saat_ini.y)).position if diamond_merah else None
+        diamond_merah = self.tabel_jarak(bot_papan, papan).nearest_diamond(2)
+        return diamond_merah[0].position if diamond_merah else None
 
     def jarak_diamondmerah_dekat(self, bot_papan: GameObject, papan: Board):
-        terdekat = self.diamondmerah_terdekat(bot_papan, papan)
-        return 999 if terdekat is None else abs(terdekat.x - bot_papan.position.x) + abs(terdekat.y - bot_papan.position.y)
+        diamond_merah = self.tabel_jarak(bot_papan, papan).nearest_diamond(2)
+        return 999 if diamond_merah is None else diamond_merah[1]
     
     def jarakbase(self, bot_papan: GameObject):
         base, pos = bot_papan.properties.base, bot_papan.position
@@ -86,8 +148,16 @@ class gacorbot(BaseLogic):
                 and bot.properties.diamonds > bot_papan.properties.diamonds]
 
     def kejar_bot_musuh(self, bot_papan: GameObject, papan: Board):
-        if self.jarakbase(bot_papan) > 4 or self.langkah > 5:
-            self.goal_position, self.langkah, self.is_teleport = None, 0, False
+        if self.jeda_kejar > 0:
+            self.jeda_kejar -= 1
+            return False
+        if self.langkah > 5:
+            # Kejaran tidak berhasil, istirahat dulu sebelum mengejar lagi
+            self.jeda_kejar = 5
+            self.goal_position, self.langkah = None, 0
+            return False
+        if self.jarakbase(bot_papan) > self.jarak_base:
+            self.goal_position, self.langkah = None, 0
             return False
 
         for bot in self.caribotlain(bot_papan, papan):
@@ -95,19 +165,30 @@ class gacorbot(BaseLogic):
             if dist == 0:
                 self.goal_position = bot_papan.properties.base  
                 return False
-            elif dist <= 3:
-                self.goal_position = bot.position 
+            elif dist <= self.batas_kejar:
+                self.goal_position = self.titik_cegat(bot_papan, bot)
                 return True
 
         self.goal_position = None
         return False
 
+    def titik_cegat(self, bot_papan: GameObject, bot: GameObject) -> Position:
+        # Tanpa pelacak bot dikejar ke posisinya sekarang. Dengan pelacak, bot
+        # yang pulang dicegat di jalurnya, di titik pertama yang bisa kita
+        # capai lebih dulu; selain itu dikejar ke posisi tebakan berikutnya.
+        if self.pelacak is None:
+            return bot.position
+        for langkah, posisi in enumerate(self.pelacak.path(bot.id, self.batas_kejar * 2), 1):
+            if self.hitungjarak(bot_papan.position, posisi) <= langkah:
+                return posisi
+        return self.pelacak.predict(bot.id) or bot.position
+
     def caritmblmrh(self, papan: Board):
-        return next((item for item in papan.game_objects if item.type == "DiamondButtonGameObject"), None)
+        return papan.index.first("DiamondButtonGameObject")
 
     def hitungjaraktmblmrh(self, bot_papan: GameObject, papan: Board):
-        tmblmrh = self.caritmblmrh(papan)
-        return (abs(tmblmrh.position.x - bot_papan.position.x) + abs(tmblmrh.position.y - bot_papan.position.y)) if tmblmrh else float('inf')
+        jarak = self.tabel_jarak(bot_papan, papan).distances(BOT, BUTTON)
+        return int(jarak[0]) if len(jarak) else float('inf')
 
     def jarak_diamond_tmblmrh(self, bot_papan: GameObject, papan: Board):
         tmblmrh = self.caritmblmrh(papan)
@@ -121,25 +202,30 @@ class gacorbot(BaseLogic):
 
         return self.hitungjaraktmblmrh(bot_papan, papan) < self.jarak_diamond_dekat(bot_papan, papan)
     
-    def cariteleporter(self, bot_papan: GameObject, papan: Board):
-        teleporters = [item for item in papan.game_objects if item.type == "TeleportGameObject"]
-        return sorted(teleporters, key=lambda tele: self.hitungjarak(tele.position, bot_papan.position))
-
-    def teleport_ke_base(self, bot_papan: GameObject, papan: Board):
-        teleporters = self.cariteleporter(bot_papan, papan)
-
-        if len(teleporters) < 2: 
-            return
-
-        teleporter_dekat = teleporters[0]
-        teleporter_baik = min(teleporters, key=lambda tele: self.hitungjarak(tele.position, bot_papan.properties.base))
-
-        jarakkeBase = self.hitungjarak(teleporter_baik.position, bot_papan.properties.base)
-        jarakkebot = self.hitungjarak(bot_papan.position, teleporter_dekat.position)
-
-        if jarakkebot <= 5 and jarakkeBase + jarakkebot < self.jarakbase(bot_papan):
-            self.is_teleport= True
-            self.goal_position = teleporter_dekat.position
+    def langkah_jalur(self, bot_papan: GameObject, papan: Board, tujuan: Position,
+                      hindari: bool = True):
+        # Jalur terpendek lewat teleporter, bot lain dianggap penghalang
+        penghalang = [bot.position for bot in papan.bots
+                      if bot.id != bot_papan.id and not position_equals(bot.position, tujuan)]
+        ancaman = self.sel_ancaman(bot_papan, tujuan) if hindari else []
+        if ancaman:
+            # Sel yang mungkin dimasuki bot penyerang dihindari kalau masih ada jalan lain
+            jalur = PathFinder(papan, penghalang + ancaman).path(bot_papan.position, tujuan)
+            if jalur:
+                return jalur.next_step
+        jalur = PathFinder(papan, penghalang).path(bot_papan.position, tujuan)
+        return jalur.next_step if jalur else None
+
+    def sel_ancaman(self, bot_papan: GameObject, tujuan: Position) -> List[Position]:
+        # Hanya berarti dengan pelacak dan kalau ada diamond yang bisa direbut
+        if self.pelacak is None or not bot_papan.properties.diamonds:
+            return []
+        # Bot sendiri tidak dihitung sebagai ancaman, peta tidak perlu disalin
+        self.pelacak.ignore(bot_papan.id)
+        peta = self.pelacak.threat_map()
+        ys, xs = np.nonzero(peta >= BATAS_ANCAMAN)
+        return [Position(y=int(y), x=int(x)) for y, x in zip(ys, xs)
+                if not (x == tujuan.x and y == tujuan.y)]
 
     def peroleh_jarak(self, current_x, current_y, dest_x, dest_y):
         x = -1 if dest_x < current_x else 1
@@ -153,15 +239,21 @@ class gacorbot(BaseLogic):
         posisi_saat_ini = board_bot.position
         base = gcor.base
 
+        if self.pelacak is not None and gcor.can_tackle and gcor.diamonds < 5 and \
+            self.kejar_bot_musuh(board_bot, board):
+            self.langkah += 1
+            return self.menuju(board_bot, board, self.goal_position, hindari=False)
+        self.langkah = 0
+
         if self.jarakbase(board_bot) in {gcor.milliseconds_left, 2} and gcor.diamonds > 2 or \
             self.jarakbase(board_bot) == 1 and gcor.diamonds > 0 or gcor.diamonds == 5:
             self.goal_position = base
 
         elif gcor.diamonds >= 3:
             if self.diamond_terdekat(board_bot, board) is not None or self.diamondmerah_terdekat(board_bot, board) is not None:
-                if gcor.diamonds == 3 and self.jarak_diamondmerah_dekat(board_bot, board) <= 3:
+                if gcor.diamonds == 3 and self.jarak_diamondmerah_dekat(board_bot, board) <= self.batas_diamond:
                     self.goal_position = self.diamondmerah_terdekat(board_bot, board)
-                elif self.jarak_diamond_dekat(board_bot, board) <= 3:
+                elif self.jarak_diamond_dekat(board_bot, board) <= self.batas_diamond:
                     self.goal_position = self.diamond_terdekat(board_bot, board)
                 else:
                     base = board_bot.properties.base
@@ -174,14 +266,19 @@ class gacorbot(BaseLogic):
                 self.goal_position = base
 
         elif gcor.diamonds < 3:
+            diamond_klaster = None
+            if self.klaster and gcor.diamonds == 0:
+                diamond_klaster = self.diamond_klaster(board_bot, board)
             if (self.diamondsekitarbase(board_bot, board) and self.botsekitarbase(board_bot)) or (
-                self.diamondsekitarbase(board_bot, board) and len(self.diamond_dekat_base(board_bot, board)) >= 3
+                self.diamondsekitarbase(board_bot, board) and self.jumlah_diamond_base(board_bot, board) >= 3
             ):
                 diamond_list = self.diamond_dekat_base(board_bot, board)
                 self.goal_position = self.diamonddekatbot(board_bot, diamond_list)
+            elif diamond_klaster is not None:
+                self.goal_position = diamond_klaster
             elif self.diamondmerah_terdekat(board_bot, board) is not None:
                 if self.diamond_terdekat(board_bot, board) is not None:
-                    if self.jarak_diamondmerah_dekat(board_bot, board) <= 3:
+                    if self.jarak_diamondmerah_dekat(board_bot, board) <= self.batas_diamond:
                         self.goal_position = self.diamondmerah_terdekat(board_bot, board)
                     else:
                         self.goal_position = self.diamond_terdekat(board_bot, board)
@@ -199,12 +296,17 @@ class gacorbot(BaseLogic):
         if self.goal_position is None:
             self.goal_position = base
 
-        if self.goal_position == base and not self.is_teleport:
-            self.teleport_ke_base(board_bot, board)
+        return self.menuju(board_bot, board, self.goal_position)
+
+    def menuju(self, board_bot: GameObject, board: Board, tujuan: Position, hindari: bool = True):
+        posisi_saat_ini = board_bot.position
+        langkah = self.langkah_jalur(board_bot, board, tujuan, hindari)
+        if langkah is not None:
+            return langkah
 
         delta_x, delta_y = self.peroleh_jarak(
             posisi_saat_ini.x, posisi_saat_ini.y,
-            self.goal_position.x, self.goal_position.y
+            tujuan.x, tujuan.y
         )
 
         return delta_x, delta_y
\ No newline at end of file
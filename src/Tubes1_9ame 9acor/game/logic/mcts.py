@@ -0,0 +1,437 @@
+import copy
+import math
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+from game.logic.base import BaseLogic
+from game.models import Board, GameObject, Position
+from game.pathfinding import DIRECTIONS, UNREACHABLE, PathFinder
+from game.util import get_direction
+
+
+class _Node:
+    # State after `ply` moves: our cell, inventory, points delivered so far
+    # and a bitmask of the diamonds we picked up. Ints only, so expanding a
+    # node or playing out from it never copies a board.
+    __slots__ = (
+        "cell",
+        "carried",
+        "delivered",
+        "ours",
+        "ply",
+        "children",
+        "untried",
+        "visits",
+        "value",
+    )
+
+    def __init__(
+        self, cell: int, carried: int, delivered: int, ours: int, ply: int
+    ):
+        self.cell = cell
+        self.carried = carried
+        self.delivered = delivered
+        self.ours = ours
+        self.ply = ply
+        self.children: Dict[int, "_Node"] = {}
+        self.untried: Optional[List[int]] = None
+        self.visits = 0
+        self.value = 0.0
+
+
+class _Model:
+    """
+    Everything about one board that stays fixed while searching: geometry,
+    teleporters, distances to our base, the diamonds present when the tree
+    was built and the predicted moves of the other bots.
+    """
+
+    def __init__(self, board: Board, board_bot: GameObject, plies: int):
+        props = board_bot.properties
+        self.width = board.width
+        self.height = board.height
+        finder = PathFinder(board)
+        self.teleports = finder.teleports
+        base = props.base or board_bot.position
+        self.base = base.y * board.width + base.x
+        self.home = finder.field(Position(y=base.y, x=base.x)).dist
+        self.capacity = props.inventory_size or 5
+
+        diamonds = board.diamonds
+        self.cells = [
+            item.position.y * self.width + item.position.x for item in diamonds
+        ]
+        self.points = [item.properties.points or 1 for item in diamonds]
+        self.index = {cell: i for i, cell in enumerate(self.cells)}
+        self.full = (1 << len(self.cells)) - 1
+
+        # occupied[p]: cells of the other bots when we make move p
+        # taken[p]: diamonds they picked up before move p
+        self.occupied: List[frozenset] = []
+        self.taken: List[int] = []
+        self._predict(board, board_bot, plies)
+
+    def _predict(self, board: Board, board_bot: GameObject, plies: int):
+        # Other bots are assumed to walk straight to their nearest diamond
+        # that fits, or home once full
+        others = []
+        for bot in board.bots:
+            if bot.id == board_bot.id:
+                continue
+            props = bot.properties
+            base = props.base or bot.position
+            others.append(
+                [
+                    bot.position.x,
+                    bot.position.y,
+                    props.diamonds or 0,
+                    props.inventory_size or 5,
+                    base.x,
+                    base.y,
+                ]
+            )
+        taken = 0
+        for _ in range(plies + 1):
+            self.occupied.append(
+                frozenset(y * self.width + x for x, y, *_ in others)
+            )
+            self.taken.append(taken)
+            for other in others:
+                x, y, carried, capacity, base_x, base_y = other
+                goal = None
+                if carried < capacity:
+                    goal = self.nearest(x, y, self.full & ~taken, capacity - carried)
+                if goal is None:
+                    goal_x, goal_y = base_x, base_y
+                else:
+                    goal_x, goal_y = goal % self.width, goal // self.width
+                if (goal_x, goal_y) == (x, y):
+                    continue
+                dx, dy = get_direction(x, y, goal_x, goal_y)
+                cell = self.teleports.get((y + dy) * self.width + x + dx)
+                if cell is None:
+                    x, y = x + dx, y + dy
+                else:
+                    x, y = cell % self.width, cell // self.width
+                i = self.index.get(y * self.width + x)
+                if i is not None and not taken & (1 << i):
+                    if carried + self.points[i] <= capacity:
+                        taken |= 1 << i
+                        carried += self.points[i]
+                if (x, y) == (base_x, base_y):
+                    carried = 0
+                other[:3] = x, y, carried
+
+    def nearest(self, x: int, y: int, available: int, room: int) -> Optional[int]:
+        best, best_distance = None, None
+        for i, cell in enumerate(self.cells):
+            if not available & (1 << i) or self.points[i] > room:
+                continue
+            distance = abs(cell % self.width - x) + abs(cell // self.width - y)
+            if best_distance is None or distance < best_distance:
+                best, best_distance = cell, distance
+        return best
+
+    def actions(self, cell: int, ply: int) -> List[int]:
+        x, y = cell % self.width, cell // self.width
+        occupied = self.occupied[min(ply, len(self.occupied) - 1)]
+        result = []
+        for action, (dx, dy) in enumerate(DIRECTIONS):
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < self.width and 0 <= ny < self.height:
+                if ny * self.width + nx not in occupied:
+                    result.append(action)
+        return result
+
+    def step(
+        self,
+        cell: int,
+        carried: int,
+        delivered: int,
+        ours: int,
+        ply: int,
+        action: int,
+    ) -> Tuple[int, int, int, int]:
+        dx, dy = DIRECTIONS[action]
+        entered = cell + dy * self.width + dx
+        cell = self.teleports.get(entered, entered)
+        i = self.index.get(cell)
+        if i is not None:
+            bit = 1 << i
+            taken = self.taken[min(ply, len(self.taken) - 1)]
+            if (
+                not (ours | taken) & bit
+                and carried + self.points[i] <= self.capacity
+            ):
+                ours |= bit
+                carried += self.points[i]
+        if cell == self.base:
+            delivered += carried
+            carried = 0
+        return cell, carried, delivered, ours
+
+
+class MctsLogic(BaseLogic):
+    """
+    Anytime Monte Carlo tree search over our own moves. Other bots follow a
+    greedy prediction, rollouts are epsilon-greedy: head for the nearest
+    diamond that fits, or home once full. A playout is worth the points it
+    delivers within horizon moves, plus half of what is still carried if
+    there is time to bring it home.
+
+    The search runs until time_budget seconds, by default budget_fraction of
+    the board's minimum delay between moves, i.e. the time the bot would
+    otherwise sleep, and never past the deadline set by the game loop. With
+    iterations set it runs exactly that many playouts
+    instead, which makes games reproducible. The subtree of the chosen move
+    is kept and searched further on the next tick when the board turned out
+    as predicted.
+    """
+
+    anytime = True
+
+    def __init__(
+        self,
+        time_budget: Optional[float] = None,
+        budget_fraction: float = 0.5,
+        iterations: Optional[int] = None,
+        horizon: int = 25,
+        exploration: float = 0.7,
+        epsilon: float = 0.2,
+        seed: Optional[int] = None,
+    ):
+        self.time_budget = time_budget
+        self.budget_fraction = budget_fraction
+        self.iterations = iterations
+        self.horizon = horizon
+        self.exploration = exploration
+        self.epsilon = epsilon
+        self.rng = random.Random(random.getrandbits(32) if seed is None else seed)
+        self.playouts = 0
+        self.reused = 0
+        self._model: Optional[_Model] = None
+        self._root: Optional[_Node] = None
+        self._origin = 0
+        self._moves_left: Optional[int] = None
+
+    def __copy__(self):
+        # The speculative pipeline searches on a copy: it grows its own tree
+        # for the predicted board, within its own budget rather than the
+        # deadline set for the live search
+        clone = object.__new__(type(self))
+        clone.__dict__.update(self.__dict__)
+        clone.rng = copy.copy(self.rng)
+        clone._model = None
+        clone._root = None
+        clone.deadline = None
+        return clone
+
+    def next_move(self, board_bot: GameObject, board: Board) -> Tuple[int, int]:
+        start = time.monotonic()
+        budget = self.time_budget
+        if budget is None:
+            budget = board.minimum_delay_between_moves / 1000 * self.budget_fraction
+        deadline = start + budget
+        if self.deadline is not None:
+            deadline = min(deadline, self.deadline)
+
+        props = board_bot.properties
+        self._moves_left = None
+        if props.milliseconds_left is not None and board.minimum_delay_between_moves:
+            self._moves_left = (
+                props.milliseconds_left // board.minimum_delay_between_moves
+            )
+
+        root = self._reuse(board_bot, board)
+        if root is None:
+            self._model = _Model(board, board_bot, 2 * self.horizon)
+            position = board_bot.position
+            root = _Node(
+                position.y * board.width + position.x, props.diamonds or 0, 0, 0, 0
+            )
+        else:
+            self.reused += 1
+        self._root = root
+        self._origin = root.ply
+
+        end = root.ply + self.horizon
+        if self._moves_left is not None:
+            end = min(end, root.ply + self._moves_left)
+        iterations = 0
+        while True:
+            if self.iterations is not None:
+                if iterations >= self.iterations:
+                    break
+            # At least one batch, also when called past the deadline
+            elif iterations and iterations % 16 == 0 and time.monotonic() > deadline:
+                break
+            self._iterate(root, end)
+            iterations += 1
+        self.playouts += iterations
+
+        if not root.children:
+            # Nothing searched, e.g. less than one move of time left
+            self._root = None
+            return self._fallback(board_bot, board, root)
+        action, child = max(
+            root.children.items(), key=lambda item: (item[1].visits, item[1].value)
+        )
+        self._root = child
+        return DIRECTIONS[action]
+
+    def _fallback(
+        self, board_bot: GameObject, board: Board, root: _Node
+    ) -> Tuple[int, int]:
+        # Towards our base if that is a legal step, else any free neighbour,
+        # else any neighbour on the board: a move is always sent
+        position = board_bot.position
+        base = board_bot.properties.base or position
+        move = get_direction(position.x, position.y, base.x, base.y)
+        if move != (0, 0) and board.is_valid_move(position, *move):
+            return move
+        actions = self._model.actions(root.cell, root.ply)
+        if actions:
+            return DIRECTIONS[actions[0]]
+        for dx, dy in DIRECTIONS:
+            x, y = position.x + dx, position.y + dy
+            if 0 <= x < board.width and 0 <= y < board.height:
+                return dx, dy
+        return DIRECTIONS[0]
+
+    def _reuse(self, board_bot: GameObject, board: Board) -> Optional[_Node]:
+        # The kept subtree is only valid if the board is exactly the one it
+        # was searched for: us, the other bots and the diamonds where predicted
+        model, node = self._model, self._root
+        if model is None or node is None:
+            return None
+        if node.ply + self.horizon >= len(model.taken):
+            return None
+        if model.width != board.width or model.height != board.height:
+            return None
+        bot_position = board_bot.position
+        if (
+            bot_position.y * board.width + bot_position.x != node.cell
+            or (board_bot.properties.diamonds or 0) != node.carried
+        ):
+            return None
+        if model.teleports != PathFinder(board).teleports:
+            return None
+        others = frozenset(
+            bot.position.y * board.width + bot.position.x
+            for bot in board.bots
+            if bot.id != board_bot.id
+        )
+        if others != model.occupied[node.ply]:
+            return None
+        available = model.full & ~(node.ours | model.taken[node.ply])
+        present = 0
+        for diamond in board.diamonds:
+            position = diamond.position
+            i = model.index.get(position.y * board.width + position.x)
+            if i is None or model.points[i] != (diamond.properties.points or 1):
+                return None
+            present |= 1 << i
+        if present != available:
+            return None
+        return node
+
+    def _iterate(self, root: _Node, end: int):
+        model = self._model
+        node = root
+        path = [node]
+        # Selection
+        while node.ply < end:
+            if node.untried is None:
+                node.untried = model.actions(node.cell, node.ply)
+            if node.untried:
+                break
+            if not node.children:
+                break
+            node = self._select(node)
+            path.append(node)
+        # Expansion
+        if node.ply < end and node.untried:
+            action = node.untried.pop(self.rng.randrange(len(node.untried)))
+            cell, carried, delivered, ours = model.step(
+                node.cell, node.carried, node.delivered, node.ours, node.ply, action
+            )
+            child = _Node(cell, carried, delivered, ours, node.ply + 1)
+            node.children[action] = child
+            node = child
+            path.append(node)
+        value = self._rollout(node, end)
+        for visited in path:
+            visited.visits += 1
+            visited.value += value
+
+    def _select(self, node: _Node) -> _Node:
+        log_visits = math.log(node.visits)
+        exploration = self.exploration
+        best, best_score = None, -1.0
+        for child in node.children.values():
+            score = child.value / child.visits + exploration * math.sqrt(
+                log_visits / child.visits
+            )
+            if score > best_score:
+                best, best_score = child, score
+        return best
+
+    def _rollout(self, node: _Node, end: int) -> float:
+        model = self._model
+        rng = self.rng
+        cell, carried, delivered, ours, ply = (
+            node.cell,
+            node.carried,
+            node.delivered,
+            node.ours,
+            node.ply,
+        )
+        while ply < end:
+            actions = model.actions(cell, ply)
+            if not actions:
+                break
+            if rng.random() < self.epsilon:
+                action = rng.choice(actions)
+            else:
+                action = self._greedy(cell, carried, ours, ply, actions)
+            cell, carried, delivered, ours = model.step(
+                cell, carried, delivered, ours, ply, action
+            )
+            ply += 1
+
+        value = float(delivered)
+        home = model.home[cell]
+        if carried and home != UNREACHABLE:
+            # Still carried diamonds count for half, if they can make it home
+            left = self._moves_left
+            if left is None or home <= left - (ply - self._origin):
+                value += 0.5 * carried
+        return value / model.capacity
+
+    def _greedy(
+        self, cell: int, carried: int, ours: int, ply: int, actions: List[int]
+    ) -> int:
+        model = self._model
+        width = model.width
+        x, y = cell % width, cell // width
+        goal = None
+        if carried < model.capacity:
+            taken = model.taken[min(ply, len(model.taken) - 1)]
+            available = model.full & ~(ours | taken)
+            goal = model.nearest(x, y, available, model.capacity - carried)
+        if goal is None:
+            # Home along the real shortest path
+            best, best_distance = actions[0], None
+            for action in actions:
+                dx, dy = DIRECTIONS[action]
+                entered = cell + dy * width + dx
+                distance = model.home[model.teleports.get(entered, entered)]
+                if distance != UNREACHABLE and (
+                    best_distance is None or distance < best_distance
+                ):
+                    best, best_distance = action, distance
+            return best
+        dx, dy = get_direction(x, y, goal % width, goal // width)
+        action = DIRECTIONS.index((dx, dy))
+        return action if action in actions else self.rng.choice(actions)
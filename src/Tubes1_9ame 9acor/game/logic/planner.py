@@ -0,0 +1,279 @@
+import heapq
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+
+from game.board_state import BoardDiff
+from game.logic.base import BaseLogic
+from game.models import Board, GameObject, Position
+from game.pathfinding import (
+    DIRECTIONS,
+    UNREACHABLE,
+    DistanceField,
+    DistanceToField,
+    PathFinder,
+)
+from game.util import get_direction
+
+
+@dataclass(slots=True)
+class _Node:
+    cell: int
+    carried: int
+    moves: int
+    visited: int
+    route: Tuple[int, ...]
+
+
+@dataclass(slots=True)
+class _Target:
+    cell: int
+    points: int
+
+
+class PlannerLogic(BaseLogic):
+    """
+    Plans a short route of pickups followed by the return to base, instead of
+    heading for one greedy target. A beam search over the candidates closest
+    to the bot keeps the routes that would deliver the most points per move,
+    only accepting routes that fit in the inventory and get home before the
+    game ends. The search stops at time_budget seconds with the best route so
+    far.
+
+    The route is kept between ticks and only searched again once it is done
+    or no longer valid: a planned diamond disappeared, our inventory changed
+    unexpectedly, or diamonds were added or reset. Distance fields from and to
+    planned cells are cached for as long as the teleporters stay in place;
+    teleporters are one way per move, so the two directions are kept apart.
+    """
+
+    def __init__(
+        self,
+        time_budget: float = 0.05,
+        beam_width: int = 32,
+        max_depth: int = 5,
+        candidates: int = 12,
+    ):
+        self.time_budget = time_budget
+        self.beam_width = beam_width
+        self.max_depth = max_depth
+        self.candidates = candidates
+        self.plan: List[_Target] = []
+        self.expected_diamonds: Optional[int] = None
+        self.searches = 0
+        self._dirty = True
+        # Keyed by cell and whether the field holds distances to the cell
+        self._fields: Dict[Tuple[int, bool], Union[DistanceField, DistanceToField]] = {}
+        self._field_cost = 0.0
+        self._layout: Optional[tuple] = None
+
+    def __copy__(self):
+        # The speculative pipeline works on a copy, the plan must not be shared
+        clone = object.__new__(type(self))
+        clone.__dict__.update(self.__dict__)
+        clone.plan = list(self.plan)
+        return clone
+
+    def on_board_update(self, diff: BoardDiff, board: Board) -> None:
+        if diff.diamonds_reset or any(
+            item.type == "DiamondGameObject" for item in diff.added
+        ):
+            self._dirty = True
+
+    def next_move(self, board_bot: GameObject, board: Board) -> Tuple[int, int]:
+        # Keep room for building the goal's distance field after the search
+        deadline = time.perf_counter() + self.time_budget - self._field_cost
+        props = board_bot.properties
+        position = board_bot.position
+        finder = PathFinder(board)
+        layout = tuple(sorted(finder.teleports.items()))
+        if layout != self._layout or len(self._fields) > 256:
+            self._layout = layout
+            self._fields = {}
+
+        cell = position.y * board.width + position.x
+        diamonds = props.diamonds or 0
+        if self.plan and self.plan[0].cell == cell:
+            # Reached the next target, it was picked up (or we are home)
+            reached = self.plan.pop(0)
+            if self.expected_diamonds is not None:
+                if reached.points == 0:
+                    self.expected_diamonds = 0
+                else:
+                    self.expected_diamonds += reached.points
+        if self._dirty or not self._plan_valid(board, diamonds):
+            self.plan = self._search(
+                board, board_bot, finder, cell, diamonds, deadline
+            )
+            self.expected_diamonds = diamonds
+            self._dirty = False
+            self.searches += 1
+
+        if self.plan:
+            return self._step(board, board_bot, finder, self.plan[0].cell)
+        return self._roam(board, position)
+
+    def _plan_valid(self, board: Board, diamonds: int) -> bool:
+        if not self.plan or self.expected_diamonds != diamonds:
+            return False
+        for target in self.plan:
+            if target.points == 0:
+                continue
+            x, y = target.cell % board.width, target.cell // board.width
+            found = board.index.within(x, y, x, y, "DiamondGameObject")
+            if not found or (found[0].properties.points or 1) != target.points:
+                return False
+        return True
+
+    def _field(self, finder: PathFinder, cell: int, width: int) -> DistanceField:
+        return self._cached(finder, cell, width, False)
+
+    def _field_to(self, finder: PathFinder, cell: int, width: int) -> DistanceToField:
+        return self._cached(finder, cell, width, True)
+
+    def _cached(self, finder: PathFinder, cell: int, width: int, to: bool):
+        field = self._fields.get((cell, to))
+        if field is None:
+            start = time.perf_counter()
+            position = Position(y=cell // width, x=cell % width)
+            field = self._fields[cell, to] = (
+                finder.field_to(position) if to else finder.field(position)
+            )
+            self._field_cost = time.perf_counter() - start
+        return field
+
+    def _search(
+        self,
+        board: Board,
+        board_bot: GameObject,
+        finder: PathFinder,
+        cell: int,
+        diamonds: int,
+        deadline: float,
+    ) -> List[_Target]:
+        props = board_bot.properties
+        width = board.width
+        base = props.base
+        if base is None:
+            return []
+        base_cell = base.y * width + base.x
+        capacity = props.inventory_size or 5
+        moves_left = None
+        if props.milliseconds_left is not None and board.minimum_delay_between_moves:
+            moves_left = props.milliseconds_left // board.minimum_delay_between_moves
+
+        start = finder.field(Position(y=cell // width, x=cell % width))
+        home = self._field_to(finder, base_cell, width).dist
+
+        # Closest diamonds that could still fit in the inventory
+        reachable = []
+        for diamond in board.diamonds:
+            points = diamond.properties.points or 1
+            target = diamond.position.y * width + diamond.position.x
+            distance = start.dist[target]
+            if distance == UNREACHABLE or diamonds + points > capacity:
+                continue
+            reachable.append((distance, -points, target, points))
+        reachable.sort()
+        targets = [
+            _Target(target, points)
+            for _, _, target, points in reachable[: self.candidates]
+        ]
+
+        best_route: Tuple[int, ...] = ()
+        best_rate = -1.0
+        if diamonds and start.dist[base_cell] != UNREACHABLE:
+            best_rate = diamonds / max(start.dist[base_cell], 1)
+
+        beam = [_Node(cell, diamonds, 0, 0, ())]
+        for _ in range(self.max_depth):
+            children = []
+            for node in beam:
+                # Checked before a node's distance field may have to be built
+                if time.perf_counter() + self._field_cost > deadline:
+                    break
+                dist = (
+                    start.dist
+                    if node.cell == cell
+                    else self._field(finder, node.cell, width).dist
+                )
+                for i, target in enumerate(targets):
+                    if node.visited & (1 << i):
+                        continue
+                    carried = node.carried + target.points
+                    distance = dist[target.cell]
+                    back = home[target.cell]
+                    if (
+                        carried > capacity
+                        or distance == UNREACHABLE
+                        or back == UNREACHABLE
+                    ):
+                        continue
+                    moves = node.moves + distance
+                    if moves_left is not None and moves + back > moves_left:
+                        continue
+                    rate = carried / max(moves + back, 1)
+                    child = _Node(
+                        target.cell,
+                        carried,
+                        moves,
+                        node.visited | (1 << i),
+                        node.route + (i,),
+                    )
+                    if rate > best_rate:
+                        best_rate, best_route = rate, child.route
+                    children.append((rate, carried, len(children), child))
+            if not children or time.perf_counter() > deadline:
+                break
+            beam = [
+                child for *_, child in heapq.nlargest(self.beam_width, children)
+            ]
+
+        if best_rate < 0:
+            return []
+        plan = [targets[i] for i in best_route]
+        if cell != base_cell or plan:
+            plan.append(_Target(base_cell, 0))
+        return plan
+
+    def _step(
+        self, board: Board, board_bot: GameObject, finder: PathFinder, goal: int
+    ) -> Tuple[int, int]:
+        # Walk down the cached distances to the goal, so a step costs a few
+        # lookups instead of a search. Cells with other bots are avoided.
+        width = board.width
+        position = board_bot.position
+        dist = self._field_to(finder, goal, width).dist
+        occupied = {
+            bot.position.y * width + bot.position.x
+            for bot in board.bots
+            if bot.id != board_bot.id
+        }
+        occupied.discard(goal)
+        best = None
+        for dx, dy in DIRECTIONS:
+            x, y = position.x + dx, position.y + dy
+            if not (0 <= x < width and 0 <= y < board.height):
+                continue
+            entered = y * width + x
+            if entered in occupied:
+                continue
+            landed = finder.teleports.get(entered, entered)
+            distance = 0 if goal in (entered, landed) else dist[landed]
+            if distance != UNREACHABLE and (best is None or distance < best[0]):
+                best = (distance, (dx, dy))
+        if best is not None:
+            return best[1]
+        return get_direction(position.x, position.y, goal % width, goal // width)
+
+    def _roam(self, board: Board, position: Position) -> Tuple[int, int]:
+        # Nothing worth planning for, drift towards the middle of the board
+        for dx, dy in sorted(
+            DIRECTIONS,
+            key=lambda d: abs(position.x + d[0] - board.width // 2)
+            + abs(position.y + d[1] - board.height // 2),
+        ):
+            x, y = position.x + dx, position.y + dy
+            if 0 <= x < board.width and 0 <= y < board.height:
+                return dx, dy
+        return 1, 0
@@ -7,6 +7,8 @@ from ..util import get_direction
 
 
 class RandomLogic(BaseLogic):
+    reads_bots = False
+
     def __init__(self):
         self.directions = [(1, 0), (0, 1), (-1, 0), (0, -1)]
         self.goal_position: Optional[Position] = None
@@ -0,0 +1,262 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+Hook = Callable[[str, float], None]
+
+QUANTILES = (0.5, 0.95, 0.99)
+PREFIX = "diamonds_"
+
+
+class Histogram:
+    """
+    Count, sum, min and max of every observation plus a uniform reservoir of
+    at most max_samples values that the quantiles are read from, so memory
+    stays bounded however long the bot runs.
+    """
+
+    __slots__ = (
+        "name",
+        "count",
+        "sum",
+        "min",
+        "max",
+        "max_samples",
+        "_samples",
+        "_rng",
+    )
+
+    def __init__(self, name: str, max_samples: int = 10000):
+        self.name = name
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = float("-inf")
+        self.max_samples = max_samples
+        self._samples: List[float] = []
+        # Own generator, so sampling does not disturb seeded games.
+        self._rng = random.Random(0)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if len(self._samples) < self.max_samples:
+            self._samples.append(value)
+        else:
+            i = self._rng.randrange(self.count)
+            if i < self.max_samples:
+                self._samples[i] = value
+
+    def quantile(self, q: float) -> float:
+        return _quantile(sorted(self._samples), q)
+
+    def summary(self) -> Dict[str, float]:
+        samples = sorted(self._samples)
+        result = {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "min": self.min if self.count else 0.0,
+            "max": self.max if self.count else 0.0,
+        }
+        for q in QUANTILES:
+            result["p{}".format(int(q * 100))] = _quantile(samples, q)
+        return result
+
+
+def _quantile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+class _Timer:
+    __slots__ = ("registry", "name", "start")
+
+    def __init__(self, registry: "MetricsRegistry", name: str):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    """
+    Named histograms (in seconds for timers) and counters. Every observation
+    is also passed to the registered hooks as (name, value).
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, float] = {}
+        self.hooks: List[Hook] = []
+        self._lock = threading.Lock()
+
+    def add_hook(self, hook: Hook):
+        self.hooks.append(hook)
+
+    def histogram(self, name: str) -> Histogram:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(name, Histogram(name))
+        return histogram
+
+    def observe(self, name: str, value: float):
+        self.histogram(name).observe(value)
+        for hook in self.hooks:
+            hook(name, value)
+
+    def timer(self, name: str) -> _Timer:
+        """
+        Context manager that observes the time spent inside it under name
+        """
+        return _Timer(self, name)
+
+    def increment(self, name: str, value: float = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def snapshot(self) -> dict:
+        return {
+            "histograms": {
+                name: histogram.summary()
+                for name, histogram in list(self.histograms.items())
+            },
+            "counters": dict(self.counters),
+        }
+
+    def write_json(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+    def prometheus_text(self) -> str:
+        """
+        Histograms as Prometheus summaries and counters as counters, in the
+        text exposition format
+        """
+        lines = []
+        for name, histogram in sorted(list(self.histograms.items())):
+            metric = PREFIX + name + "_seconds"
+            summary = histogram.summary()
+            lines.append("# TYPE {} summary".format(metric))
+            for q in QUANTILES:
+                lines.append(
+                    '{}{{quantile="{}"}} {}'.format(
+                        metric, q, summary["p{}".format(int(q * 100))]
+                    )
+                )
+            lines.append("{}_sum {}".format(metric, summary["sum"]))
+            lines.append("{}_count {}".format(metric, summary["count"]))
+        for name, value in sorted(self.counters.items()):
+            metric = PREFIX + name + "_total"
+            lines.append("# TYPE {} counter".format(metric))
+            lines.append("{} {}".format(metric, value))
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int, host: str = "") -> ThreadingHTTPServer:
+        """
+        Serve prometheus_text() on http://host:port/metrics from a daemon thread
+        """
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        return server
+
+
+class NullRegistry(MetricsRegistry):
+    """
+    Registry used while metrics are disabled. Every call is a no-op, timers
+    are a shared object that does not even read the clock.
+    """
+
+    enabled = False
+
+    def observe(self, name: str, value: float):
+        pass
+
+    def timer(self, name: str) -> _NullTimer:
+        return _NULL_TIMER
+
+    def increment(self, name: str, value: float = 1):
+        pass
+
+
+_registry: MetricsRegistry = NullRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    return _registry
+
+
+def set_registry(registry: Optional[MetricsRegistry]) -> MetricsRegistry:
+    """
+    Install registry for the whole process, None disables metrics again
+    :return: the installed registry
+    """
+    global _registry
+    _registry = registry if registry is not None else NullRegistry()
+    return _registry
+
+
+def enable() -> MetricsRegistry:
+    if not _registry.enabled:
+        set_registry(MetricsRegistry())
+    return _registry
+
+
+def timer(name: str):
+    return _registry.timer(name)
+
+
+def observe(name: str, value: float):
+    _registry.observe(name, value)
+
+
+def increment(name: str, value: float = 1):
+    _registry.increment(name, value)
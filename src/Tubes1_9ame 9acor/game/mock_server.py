@@ -0,0 +1,336 @@
+import json
+import logging
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple, Union
+
+from game.models import Bot, GameObject
+from game.serialization import bot_to_dict, feature_to_dict, game_object_to_dict
+from game.simulator import SimulationConfig, Simulator
+
+logger = logging.getLogger(__name__)
+
+DIRECTIONS = {"NORTH": (0, -1), "SOUTH": (0, 1), "EAST": (1, 0), "WEST": (-1, 0)}
+
+# Share of the minimum delay a move may arrive early, requests sent on time
+# do not always arrive on time
+EARLY_TOLERANCE = 0.1
+RATE_LIMITED = 429
+
+# Stands in for millisecondsLeft in cached bot fragments
+_TIME_LEFT = -987654321
+
+# data is either JSON-able or already encoded JSON
+Response = Tuple[int, Union[dict, list, bytes, None]]
+
+
+@dataclass
+class _Account:
+    bot: Bot
+    password: str
+    team: str
+
+
+@dataclass
+class _Session:
+    bot_id: int
+    ends: float
+    last_move: float = 0.0
+
+
+class MockEngine:
+    """
+    Stand-in for the Diamonds engine behind its HTTP api, played on a
+    Simulator. Like the engine, a bot plays its own session of
+    config.seconds from the moment it joins and leaves the board when it
+    runs out, and moves are applied as soon as they arrive. Moves sent
+    faster than the minimum delay are refused with 429 unless enforce_delay
+    is off.
+
+    Every method returns (status, data) and is safe to call from the
+    server's threads. Boards are sent as JSON put together from cached
+    fragments of every game object: after a move only the objects that
+    changed are encoded again, and between moves only the time left of each
+    bot.
+    """
+
+    def __init__(
+        self,
+        config: Optional[SimulationConfig] = None,
+        seed: Optional[int] = None,
+        enforce_delay: bool = True,
+    ):
+        self.config = config or SimulationConfig()
+        self.simulator = Simulator(self.config, seed=seed)
+        self.enforce_delay = enforce_delay
+        self._lock = threading.Lock()
+        self._accounts: Dict[str, _Account] = {}
+        self._by_email: Dict[str, str] = {}
+        self._sessions: Dict[str, _Session] = {}
+        self._dirty = True
+        self._head = b""
+        # Encoded game objects of the current board, bots as the parts around
+        # their time left
+        self._parts: List[Union[bytes, Tuple[bytes, int, bytes]]] = []
+        self._fragments: Dict[int, Tuple[GameObject, bytes]] = {}
+
+    # Accounts
+
+    def register(self, body: dict) -> Response:
+        email, name = body.get("email"), body.get("name")
+        if not email or not name:
+            return 400, {"message": "name and email are required"}
+        with self._lock:
+            if email in self._by_email or any(
+                account.bot.name == name for account in self._accounts.values()
+            ):
+                return 409, {"message": "Bot already exists"}
+            token = str(uuid.uuid4())
+            account = _Account(
+                Bot(name=name, email=email, id=token),
+                body.get("password") or "",
+                body.get("team") or "",
+            )
+            self._accounts[token] = account
+            self._by_email[email] = token
+        return 200, bot_to_dict(account.bot)
+
+    def recover(self, body: dict) -> Response:
+        with self._lock:
+            token = self._by_email.get(body.get("email"))
+            if token is None or self._accounts[token].password != body.get(
+                "password"
+            ):
+                return 404, {"message": "Bot not found"}
+        return 201, {"id": token}
+
+    def bot(self, token: str) -> Response:
+        account = self._accounts.get(token)
+        if account is None:
+            return 404, {"message": "Bot not found"}
+        return 200, bot_to_dict(account.bot)
+
+    # Game
+
+    def join(self, token: str, body: dict) -> Response:
+        board_id = body.get("preferredBoardId")
+        if board_id is not None and str(board_id) != str(self.simulator.board_id):
+            return 404, {"message": "Board not found"}
+        with self._lock:
+            account = self._accounts.get(token)
+            if account is None:
+                return 404, {"message": "Bot not found"}
+            self._expire()
+            if token in self._sessions:
+                return 409, {"message": "Bot is already playing"}
+            try:
+                bot_id = self.simulator.add_bot(account.bot.name)
+            except ValueError:
+                return 409, {"message": "Board is full"}
+            self._sessions[token] = _Session(
+                bot_id, time.monotonic() + self.config.seconds
+            )
+            self._dirty = True
+            return 200, self._board_json()
+
+    def move(self, token: str, body: dict) -> Response:
+        delta = DIRECTIONS.get(str(body.get("direction", "")).upper())
+        if delta is None:
+            return 400, {"message": "Invalid direction"}
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(token)
+            if session is None:
+                return 403, {"message": "Bot is not playing"}
+            now = time.monotonic()
+            delay = self.config.minimum_delay_between_moves / 1000
+            if (
+                self.enforce_delay
+                and now - session.last_move < delay * (1 - EARLY_TOLERANCE)
+            ):
+                return RATE_LIMITED, {"message": "Move too early"}
+            session.last_move = now
+            if self.simulator.apply_move(session.bot_id, *delta):
+                self._dirty = True
+            return 200, self._board_json()
+
+    def boards(self) -> Response:
+        with self._lock:
+            self._expire()
+            return 200, b"[" + self._board_json() + b"]"
+
+    def board(self, board_id: str) -> Response:
+        if board_id != str(self.simulator.board_id):
+            return 404, {"message": "Board not found"}
+        with self._lock:
+            self._expire()
+            return 200, self._board_json()
+
+    def _expire(self):
+        now = time.monotonic()
+        ended = [
+            token for token, session in self._sessions.items() if session.ends <= now
+        ]
+        for token in ended:
+            session = self._sessions.pop(token)
+            self.simulator.remove_bot(session.bot_id)
+            self._dirty = True
+
+    def _rebuild(self):
+        board = self.simulator.board()
+        head = json.dumps(
+            {
+                "id": board.id,
+                "width": board.width,
+                "height": board.height,
+                "features": [feature_to_dict(feature) for feature in board.features],
+                "minimumDelayBetweenMoves": board.minimum_delay_between_moves,
+            }
+        )
+        self._head = head[:-1].encode() + b', "gameObjects": ['
+        fragments = {}
+        parts = []
+        for item in board.game_objects:
+            cached = self._fragments.get(item.id)
+            if cached is None or cached[0] is not item and cached[0] != item:
+                data = game_object_to_dict(item)
+                if item.type == "BotGameObject":
+                    data["properties"]["millisecondsLeft"] = _TIME_LEFT
+                cached = (item, json.dumps(data).encode())
+            fragments[item.id] = cached
+            encoded = cached[1]
+            if item.type == "BotGameObject":
+                before, _, after = encoded.partition(str(_TIME_LEFT).encode())
+                parts.append((before, item.id, after))
+            else:
+                parts.append(encoded)
+        self._fragments = fragments
+        self._parts = parts
+        self._dirty = False
+
+    def _board_json(self) -> bytes:
+        if self._dirty:
+            self._rebuild()
+        now = time.monotonic()
+        ends = {session.bot_id: session.ends for session in self._sessions.values()}
+        out = []
+        for part in self._parts:
+            if isinstance(part, bytes):
+                out.append(part)
+            else:
+                before, bot_id, after = part
+                left = max(0, int((ends.get(bot_id, now) - now) * 1000))
+                out.append(before + str(left).encode() + after)
+        return self._head + b", ".join(out) + b"]}"
+
+    def handle(self, method: str, path: str, body: dict) -> Response:
+        """
+        Route one request. The api prefix, e.g. /api, is optional.
+        """
+        path = path.split("?")[0].rstrip("/")
+        path = re.sub(r"^/api(?=/|$)", "", path)
+        parts = path.strip("/").split("/")
+        if method == "GET":
+            if parts == ["boards"]:
+                return self.boards()
+            if len(parts) == 2 and parts[0] == "boards":
+                return self.board(parts[1])
+            if len(parts) == 2 and parts[0] == "bots":
+                return self.bot(parts[1])
+        elif method == "POST":
+            if parts == ["bots"]:
+                return self.register(body)
+            if parts == ["bots", "recover"]:
+                return self.recover(body)
+            if len(parts) == 3 and parts[0] == "bots":
+                if parts[2] == "join":
+                    return self.join(parts[1], body)
+                if parts[2] == "move":
+                    return self.move(parts[1], body)
+        return 404, {"message": "Not found"}
+
+
+class _Server(ThreadingHTTPServer):
+    # Hundreds of clients may connect at once
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+def make_server(engine: MockEngine, port: int, host: str = "") -> ThreadingHTTPServer:
+    """
+    HTTP server for engine on host:port with keep-alive connections, call
+    serve_forever on it or use serve for a background thread
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _handle(self, method: str):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            try:
+                body = json.loads(raw) if raw.strip() else {}
+            except ValueError:
+                body = None
+            if not isinstance(body, dict):
+                status, data = 400, {"message": "Invalid JSON body"}
+            else:
+                try:
+                    status, data = engine.handle(method, self.path, body)
+                except Exception:
+                    logger.exception("%s %s failed", method, self.path)
+                    status, data = 500, {"message": "Internal error"}
+            if isinstance(data, bytes):
+                payload = b'{"data": ' + data + b"}"
+            else:
+                payload = json.dumps({"data": data}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            self._handle("GET")
+
+        def do_POST(self):
+            self._handle("POST")
+
+        def log_message(self, format, *args):
+            logger.debug("%s %s", self.address_string(), format % args)
+
+    return _Server((host, port), Handler)
+
+
+def serve(engine: MockEngine, port: int, host: str = "") -> ThreadingHTTPServer:
+    """
+    Serve engine from a daemon thread
+    """
+    server = make_server(engine, port, host)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def run_server(
+    config: SimulationConfig,
+    port: int,
+    host: str = "",
+    seed: Optional[int] = None,
+    enforce_delay: bool = True,
+):
+    """
+    Serve a new engine until interrupted. Importable, so it can be the
+    target of a separate process.
+    """
+    server = make_server(MockEngine(config, seed, enforce_delay), port, host)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -1,26 +1,29 @@
-from dataclasses import dataclass
+import logging
+from dataclasses import dataclass, field
 from typing import List, Optional, Union
-from colorama import Fore, Style
+from game.board_index import BoardIndex
 
+logger = logging.getLogger(__name__)
 
-@dataclass
+
+@dataclass(slots=True)
 class Bot:
     name: str
     email: str
     id: str
 
 
-@dataclass
+@dataclass(slots=True)
 class Position:
     y: int
     x: int
 
 
-@dataclass
+@dataclass(slots=True)
 class Base(Position): ...
 
 
-@dataclass
+@dataclass(slots=True)
 class Properties:
     points: Optional[int] = None
     pair_id: Optional[str] = None
@@ -34,7 +37,7 @@ class Properties:
     base: Optional[Base] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class GameObject:
     id: int
     position: Position
@@ -42,7 +45,7 @@ class GameObject:
     properties: Optional[Properties] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Config:
     generation_ratio: Optional[float] = None
     min_ratio_for_generation: Optional[float] = None
@@ -53,13 +56,13 @@ class Config:
     can_tackle: Optional[bool] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Feature:
     name: str
     config: Optional[Config] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Board:
     id: int
     width: int
@@ -67,50 +70,45 @@ class Board:
     features: List[Feature]
     minimum_delay_between_moves: int
     game_objects: Optional[List[GameObject]]
+    _index: Optional[BoardIndex] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    @property
+    def index(self) -> BoardIndex:
+        # Built once per snapshot, game_objects must not change afterwards.
+        if self._index is None:
+            self._index = BoardIndex(self.game_objects)
+        return self._index
 
     @property
     def bots(self) -> List[GameObject]:
-        return [d for d in self.game_objects if d.type == "BotGameObject"]
+        return self.index.of_type("BotGameObject")
 
     @property
     def diamonds(self) -> List[GameObject]:
-        return [d for d in self.game_objects if d.type == "DiamondGameObject"]
+        return self.index.of_type("DiamondGameObject")
 
     def get_bot(self, bot: Bot) -> Optional[GameObject]:
-        for b in self.bots:
-            if b.properties.name == bot.name:
-                return b
-        return None
+        return self.index.bots_by_name.get(bot.name)
 
     def is_valid_move(
         self, current_position: Position, delta_x: int, delta_y: int
     ) -> bool:
         if not (-1 <= delta_x <= 1) or not (-1 <= delta_y <= 1):
-            print(
-                Fore.RED + Style.BRIGHT + "Invalid move:" + Style.RESET_ALL,
-                "Delta values must be between -1 and 1 inclusive",
-            )
+            logger.warning("Invalid move: Delta values must be between -1 and 1 inclusive")
             return False
 
         if delta_x == delta_y:
-            print(
-                Fore.RED + Style.BRIGHT + "Invalid move:" + Style.RESET_ALL,
-                "Delta_x and delta_y cannot be equal",
-            )
+            logger.warning("Invalid move: Delta_x and delta_y cannot be equal")
             return False
 
         if not (0 <= current_position.x + delta_x < self.width):
-            print(
-                Fore.RED + Style.BRIGHT + "Invalid move:" + Style.RESET_ALL,
-                "X-coordinate out of bounds",
-            )
+            logger.warning("Invalid move: X-coordinate out of bounds")
             return False
 
         if not (0 <= current_position.y + delta_y < self.height):
-            print(
-                Fore.RED + Style.BRIGHT + "Invalid move:" + Style.RESET_ALL,
-                "Y-coordinate out of bounds",
-            )
+            logger.warning("Invalid move: Y-coordinate out of bounds")
             return False
 
         return True
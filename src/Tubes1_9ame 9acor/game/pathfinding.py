@@ -0,0 +1,232 @@
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from game.models import Board, Position
+
+DIRECTIONS = ((1, 0), (0, 1), (-1, 0), (0, -1))
+UNREACHABLE = -1
+
+
+@dataclass(slots=True)
+class Path:
+    next_step: Tuple[int, int]
+    length: int
+
+
+class DistanceField:
+    """
+    Shortest number of moves from one start cell to every cell of a board,
+    together with the first move of a shortest path to it. Stepping onto a
+    teleporter lands the bot on its pair as part of the same move, so the
+    teleporter cell itself is reachable (and costs a move) but search carries
+    on from the paired cell.
+
+    With goal set the search stops once goal is reached: only the path to
+    goal is complete, cells further away may be left unreachable.
+    """
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        start: Position,
+        teleports: Dict[int, int],
+        blocked: Iterable[int] = (),
+        goal: Optional[Position] = None,
+    ):
+        self.width = width
+        self.height = height
+        self.start = start
+        size = width * height
+        self.dist: List[int] = [UNREACHABLE] * size
+        self.first: List[int] = [UNREACHABLE] * size
+
+        blocked = set(blocked)
+        origin = start.y * width + start.x
+        if not 0 <= origin < size:
+            return
+        self.dist[origin] = 0
+        target = None
+        if goal is not None and 0 <= goal.x < width and 0 <= goal.y < height:
+            target = goal.y * width + goal.x
+
+        dist, first = self.dist, self.first
+        # Cells the bot can actually stand on. A teleporter cell entered on
+        # foot is reached, but the bot ends the move on the paired cell.
+        visited = {origin: (0, UNREACHABLE)}
+        queue = deque((origin,))
+        while queue:
+            cell = queue.popleft()
+            x, y = cell % width, cell // width
+            steps, via = visited[cell]
+            steps += 1
+            for direction, (dx, dy) in enumerate(DIRECTIONS):
+                nx, ny = x + dx, y + dy
+                if not (0 <= nx < width and 0 <= ny < height):
+                    continue
+                entered = ny * width + nx
+                if entered in blocked:
+                    continue
+                move = direction if cell == origin else via
+                landed = teleports.get(entered, entered)
+                if dist[entered] == UNREACHABLE:
+                    dist[entered] = steps
+                    first[entered] = move
+                if landed in visited:
+                    continue
+                visited[landed] = (steps, move)
+                if dist[landed] == UNREACHABLE:
+                    dist[landed] = steps
+                    first[landed] = move
+                queue.append(landed)
+            if target is not None and dist[target] != UNREACHABLE:
+                # The first move to a cell is final once it is reached
+                break
+
+    def _cell(self, position: Position) -> Optional[int]:
+        if not (0 <= position.x < self.width and 0 <= position.y < self.height):
+            return None
+        return position.y * self.width + position.x
+
+    def distance(self, position: Position) -> Optional[int]:
+        """
+        Moves needed to reach position, None if it cannot be reached
+        """
+        cell = self._cell(position)
+        if cell is None or self.dist[cell] == UNREACHABLE:
+            return None
+        return self.dist[cell]
+
+    def path_to(self, position: Position) -> Optional[Path]:
+        """
+        First move and length of a shortest path to position. None if the
+        position is unreachable or is the start itself.
+        """
+        cell = self._cell(position)
+        if cell is None or self.dist[cell] in (UNREACHABLE, 0):
+            return None
+        return Path(DIRECTIONS[self.first[cell]], self.dist[cell])
+
+
+class DistanceToField:
+    """
+    Shortest number of moves from every cell of a board to one goal cell, the
+    reverse of DistanceField. Teleporters carry a bot one way per move, so
+    the distance to a cell differs from the distance from it: a bot standing
+    on the exit of a pair first has to step off and back on to use it.
+    """
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        goal: Position,
+        teleports: Dict[int, int],
+        blocked: Iterable[int] = (),
+    ):
+        self.width = width
+        self.height = height
+        self.goal = goal
+        size = width * height
+        self.dist: List[int] = [UNREACHABLE] * size
+
+        blocked = set(blocked)
+        if not (0 <= goal.x < width and 0 <= goal.y < height):
+            return
+        target = goal.y * width + goal.x
+        dist = self.dist
+        dist[target] = 0
+        queue = deque((target,))
+        while queue:
+            cell = queue.popleft()
+            steps = dist[cell] + 1
+            # Cells whose entering ends the move on cell. Entering the goal
+            # also counts when it is a teleporter that carries the bot away.
+            paired = teleports.get(cell)
+            if paired is None:
+                entries = (cell,)
+            elif cell == target:
+                entries = (cell, paired)
+            else:
+                entries = (paired,)
+            for entered in entries:
+                if entered in blocked:
+                    continue
+                x, y = entered % width, entered // width
+                for dx, dy in DIRECTIONS:
+                    nx, ny = x - dx, y - dy
+                    if not (0 <= nx < width and 0 <= ny < height):
+                        continue
+                    origin = ny * width + nx
+                    if dist[origin] == UNREACHABLE:
+                        dist[origin] = steps
+                        queue.append(origin)
+
+    def distance(self, position: Position) -> Optional[int]:
+        """
+        Moves needed to reach the goal from position, None if the goal
+        cannot be reached from there
+        """
+        if not (0 <= position.x < self.width and 0 <= position.y < self.height):
+            return None
+        distance = self.dist[position.y * self.width + position.x]
+        return None if distance == UNREACHABLE else distance
+
+
+class PathFinder:
+    """
+    Teleporter-aware breadth-first search over one board snapshot. Cells in
+    blocked (for instance other bots) are never entered.
+    """
+
+    def __init__(self, board: Board, blocked: Iterable[Position] = ()):
+        self.width = board.width
+        self.height = board.height
+        self.teleports = teleport_pairs(board)
+        self.blocked = {
+            position.y * board.width + position.x
+            for position in blocked
+            if 0 <= position.x < board.width and 0 <= position.y < board.height
+        }
+
+    def field(self, start: Position, goal: Optional[Position] = None) -> DistanceField:
+        return DistanceField(
+            self.width, self.height, start, self.teleports, self.blocked, goal
+        )
+
+    def field_to(self, goal: Position) -> DistanceToField:
+        return DistanceToField(
+            self.width, self.height, goal, self.teleports, self.blocked
+        )
+
+    def path(self, start: Position, goal: Position) -> Optional[Path]:
+        return self.field(start, goal).path_to(goal)
+
+
+def teleport_pairs(board: Board) -> Dict[int, int]:
+    teleporters = board.index.of_type("TeleportGameObject")
+    by_id = {str(teleporter.id): teleporter for teleporter in teleporters}
+    pairs: Dict[str, List[Position]] = {}
+    for teleporter in teleporters:
+        pair_id = teleporter.properties.pair_id if teleporter.properties else None
+        other = by_id.get(str(pair_id))
+        if other is not None and other is not teleporter:
+            # pair_id names the other teleporter of the pair
+            key = "-".join(sorted((str(teleporter.id), str(other.id))))
+        else:
+            # pair_id is shared by both teleporters of the pair
+            key = pair_id
+        pairs.setdefault(key, []).append(teleporter.position)
+    if None in pairs and len(teleporters) == 2:
+        # Without pair ids the engine's single pair is the only option.
+        pairs = {None: [teleporter.position for teleporter in teleporters]}
+
+    teleports = {}
+    for positions in pairs.values():
+        if len(positions) != 2:
+            continue
+        a, b = (p.y * board.width + p.x for p in positions)
+        teleports[a] = b
+        teleports[b] = a
+    return teleports
@@ -0,0 +1,180 @@
+import copy
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Optional, Tuple
+
+from game.board_state import BoardDiff
+from game.logic.base import BaseLogic
+from game.models import Board, GameObject, Position
+from game.pathfinding import teleport_pairs
+from game.util import position_equals
+
+
+@dataclass(slots=True)
+class Speculation:
+    board: Board
+    board_bot: GameObject
+    logic: BaseLogic
+    move: Tuple[int, int]
+
+
+def predict_board(board: Board, board_bot: GameObject, dx: int, dy: int) -> Board:
+    """
+    Board as it should look after our own move, assuming nothing else changes:
+    teleporters are taken, a diamond is picked up if it fits in the inventory
+    and diamonds are deposited at the base. Objects other than our bot and the
+    picked diamond are shared with board.
+    :return: Board
+    """
+    props = board_bot.properties
+    x, y = board_bot.position.x + dx, board_bot.position.y + dy
+
+    landed = teleport_pairs(board).get(y * board.width + x)
+    if landed is not None:
+        x, y = landed % board.width, landed // board.width
+
+    diamonds = props.diamonds or 0
+    score = props.score or 0
+    picked = None
+    for diamond in board.index.within(x, y, x, y, "DiamondGameObject"):
+        points = diamond.properties.points or 0
+        capacity = props.inventory_size
+        if capacity is None or diamonds + points <= capacity:
+            diamonds += points
+            picked = diamond
+        break
+    if props.base is not None and position_equals(props.base, Position(y, x)):
+        score += diamonds
+        diamonds = 0
+
+    milliseconds_left = props.milliseconds_left
+    if milliseconds_left is not None:
+        milliseconds_left -= board.minimum_delay_between_moves
+        milliseconds_left = max(0, milliseconds_left)
+    predicted_bot = replace(
+        board_bot,
+        position=Position(y, x),
+        properties=replace(
+            props, diamonds=diamonds, score=score, milliseconds_left=milliseconds_left
+        ),
+    )
+    game_objects = [
+        predicted_bot if item is board_bot else item
+        for item in board.game_objects or []
+        if item is not picked
+    ]
+    return replace(board, game_objects=game_objects)
+
+
+def prediction_matches(
+    predicted: Board,
+    predicted_bot: GameObject,
+    board: Board,
+    board_bot: GameObject,
+    strict: bool = False,
+) -> bool:
+    """
+    Whether a decision made on predicted can be used for board. Our bot must
+    be in the predicted place with the predicted inventory and every diamond,
+    button and teleporter must be where it was predicted. Other bots are only
+    compared when strict is set.
+    """
+    if not position_equals(predicted_bot.position, board_bot.position):
+        return False
+    if (
+        predicted_bot.properties.diamonds != board_bot.properties.diamonds
+        or predicted_bot.properties.score != board_bot.properties.score
+    ):
+        return False
+    return _layout(predicted, board_bot.id, strict) == _layout(
+        board, board_bot.id, strict
+    )
+
+
+def _layout(board: Board, own_id: int, strict: bool) -> set:
+    return {
+        (item.id, item.type, item.position.x, item.position.y)
+        for item in board.game_objects or []
+        if item.id != own_id and (strict or item.type != "BotGameObject")
+    }
+
+
+class MovePipeline:
+    """
+    Overlaps deciding the next move with the current move request and the
+    pacing delay. Right before a move is sent, speculate() starts computing
+    the following move in a background thread, on a copy of the logic and on
+    the board predicted from our own move. When the real board arrives,
+    next_move() keeps that result if the prediction held and otherwise
+    discards it and decides again on the real board.
+
+    The logic is copied with copy.copy, so a logic that mutates containers
+    in next_move or on_board_update should define __copy__: the copy runs in
+    the background while the original keeps receiving board updates. Other
+    bots must be where predicted too unless strict is False, by default only
+    for logics that don't read them. With speculative=False this is a plain
+    pass-through to the logic.
+    """
+
+    def __init__(
+        self,
+        logic: BaseLogic,
+        speculative: bool = True,
+        strict: Optional[bool] = None,
+    ):
+        self.logic = logic
+        self.speculative = speculative
+        self.strict = logic.reads_bots if strict is None else strict
+        self.hits = 0
+        self.misses = 0
+        self._executor = None
+        if speculative:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pending: Optional[Future] = None
+        self._diff: Optional[BoardDiff] = None
+
+    def on_board_update(self, diff: BoardDiff, board: Board) -> None:
+        self._diff = diff
+        self.logic.on_board_update(diff, board)
+
+    def speculate(self, board: Board, board_bot: GameObject, dx: int, dy: int):
+        if not self.speculative:
+            return
+        self._pending = self._executor.submit(
+            self._speculate, board, board_bot, copy.copy(self.logic), dx, dy
+        )
+
+    @staticmethod
+    def _speculate(
+        board: Board, board_bot: GameObject, logic: BaseLogic, dx: int, dy: int
+    ) -> Speculation:
+        predicted = predict_board(board, board_bot, dx, dy)
+        predicted_bot = predicted.index.bots_by_id[board_bot.id]
+        move = logic.next_move(predicted_bot, predicted)
+        return Speculation(predicted, predicted_bot, logic, move)
+
+    def next_move(self, board_bot: GameObject, board: Board) -> Tuple[int, int]:
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            try:
+                speculation = pending.result()
+            except Exception:
+                speculation = None
+            if speculation is not None and prediction_matches(
+                speculation.board,
+                speculation.board_bot,
+                board,
+                board_bot,
+                self.strict,
+            ):
+                self.hits += 1
+                self.logic = speculation.logic
+                if self._diff is not None:
+                    self.logic.on_board_update(self._diff, board)
+                return speculation.move
+            self.misses += 1
+        return self.logic.next_move(board_bot, board)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
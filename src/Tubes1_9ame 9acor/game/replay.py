@@ -0,0 +1,336 @@
+import json
+import mmap
+import struct
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from game.board_state import BoardState
+from game.logic.base import BaseLogic
+from game.models import Base, Board, GameObject, Position, Properties
+from game.serialization import feature_from_dict
+
+# File layout, all little endian:
+#   MAGIC, version (B), header length (I), JSON header with the board constants
+#   then a sequence of records, each starting with a tag (B):
+#   STRING: length (H), utf-8 bytes. Strings are numbered in order of
+#           appearance and referenced by number from frames.
+#   FRAME:  payload length (I), FRAME_HEADER, then per game object
+#           OBJECT_HEADER followed by the properties present in its mask.
+# Records are only ever appended, so a file cut short by a crash is still
+# readable up to its last complete record.
+MAGIC = b"DMRP"
+VERSION = 1
+STRING = 1
+FRAME = 2
+
+_PREAMBLE = struct.Struct("<4sBI")
+_TAG = struct.Struct("<B")
+_STRING_LENGTH = struct.Struct("<H")
+_FRAME_LENGTH = struct.Struct("<I")
+# time, id of our bot (-1 if not on the board), dx, dy, number of objects
+FRAME_HEADER = struct.Struct("<dqbbH")
+# id, type (string), x, y, properties mask
+OBJECT_HEADER = struct.Struct("<qIhhH")
+
+HAS_PROPERTIES = 1 << 15
+# Properties fields in mask bit order, with their struct codes. Strings are
+# stored as string numbers, base as x, y.
+_FIELDS = (
+    ("points", "i"),
+    ("pair_id", "I"),
+    ("diamonds", "i"),
+    ("score", "i"),
+    ("name", "I"),
+    ("inventory_size", "i"),
+    ("can_tackle", "B"),
+    ("milliseconds_left", "i"),
+    ("time_joined", "I"),
+    ("base", "hh"),
+)
+
+
+@dataclass(slots=True)
+class Frame:
+    index: int
+    time: float
+    board: Board
+    bot_id: Optional[int]
+    move: Tuple[int, int]
+
+    @property
+    def board_bot(self) -> Optional[GameObject]:
+        if self.bot_id is None:
+            return None
+        return self.board.index.bots_by_id.get(self.bot_id)
+
+
+@dataclass(slots=True)
+class ReplayStep:
+    frame: Frame
+    move: Tuple[int, int]
+
+    @property
+    def matches(self) -> bool:
+        return tuple(self.move) == tuple(self.frame.move)
+
+
+class ReplayWriter:
+    """
+    Appends every board snapshot together with the move chosen on it. The
+    board constants are written once in the header when the first frame is
+    recorded, strings (types, names, pair ids) are stored once and referred
+    to by number, and each game object takes a fixed 18 bytes plus its
+    properties.
+    """
+
+    def __init__(self, path: str, metadata: Optional[dict] = None):
+        self.path = path
+        self.metadata = metadata or {}
+        self.frames = 0
+        self._file = open(path, "wb")
+        self._strings: Dict[str, int] = {}
+        self._header_written = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def _string(self, value: str, out: bytearray) -> int:
+        number = self._strings.get(value)
+        if number is None:
+            number = self._strings[value] = len(self._strings)
+            data = value.encode("utf-8")
+            out += _TAG.pack(STRING) + _STRING_LENGTH.pack(len(data)) + data
+        return number
+
+    def _write_header(self, board: Board):
+        header = json.dumps(
+            {
+                "board_id": board.id,
+                "width": board.width,
+                "height": board.height,
+                "minimum_delay_between_moves": board.minimum_delay_between_moves,
+                "features": [asdict(feature) for feature in board.features],
+                "metadata": self.metadata,
+            }
+        ).encode("utf-8")
+        self._file.write(_PREAMBLE.pack(MAGIC, VERSION, len(header)) + header)
+        self._header_written = True
+
+    def record(
+        self,
+        board: Board,
+        board_bot: Optional[GameObject],
+        delta_x: int,
+        delta_y: int,
+        timestamp: Optional[float] = None,
+    ):
+        if not self._header_written:
+            self._write_header(board)
+
+        strings = bytearray()
+        objects = board.game_objects or []
+        payload = bytearray(
+            FRAME_HEADER.pack(
+                time.time() if timestamp is None else timestamp,
+                board_bot.id if board_bot is not None else -1,
+                delta_x,
+                delta_y,
+                len(objects),
+            )
+        )
+        for item in objects:
+            props = item.properties
+            mask = 0
+            values = []
+            if props is not None:
+                mask = HAS_PROPERTIES
+                for bit, (name, _) in enumerate(_FIELDS):
+                    value = getattr(props, name)
+                    if value is None:
+                        continue
+                    mask |= 1 << bit
+                    if name == "base":
+                        values.extend((value.x, value.y))
+                    elif name in ("pair_id", "name", "time_joined"):
+                        values.append(self._string(str(value), strings))
+                    else:
+                        values.append(int(value))
+            payload += OBJECT_HEADER.pack(
+                item.id,
+                self._string(item.type, strings),
+                item.position.x,
+                item.position.y,
+                mask,
+            )
+            if values:
+                payload += _properties_struct(mask).pack(*values)
+
+        self._file.write(
+            strings + _TAG.pack(FRAME) + _FRAME_LENGTH.pack(len(payload)) + payload
+        )
+        self._file.flush()
+        self.frames += 1
+
+    def close(self):
+        self._file.close()
+
+
+_STRUCTS: Dict[int, struct.Struct] = {}
+
+
+def _properties_struct(mask: int) -> struct.Struct:
+    compiled = _STRUCTS.get(mask)
+    if compiled is None:
+        codes = "".join(
+            code for bit, (_, code) in enumerate(_FIELDS) if mask & (1 << bit)
+        )
+        compiled = _STRUCTS[mask] = struct.Struct("<" + codes)
+    return compiled
+
+
+class ReplayReader:
+    """
+    Memory-maps a recorded game. Opening it only walks the record headers to
+    find the frames, boards are decoded when a frame is accessed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError("{} is empty".format(path))
+        magic, version, length = _PREAMBLE.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError("{} is not a version {} replay".format(path, VERSION))
+        start = _PREAMBLE.size
+        self.header = json.loads(bytes(self._map[start : start + length]))
+        self.metadata = self.header.get("metadata", {})
+        self._features = [
+            feature_from_dict(feature) for feature in self.header["features"]
+        ]
+        self._strings: List[str] = []
+        self._frames: List[int] = []
+        self._scan(start + length)
+
+    def _scan(self, offset: int):
+        data = self._map
+        size = len(data)
+        while offset < size:
+            tag = data[offset]
+            offset += 1
+            if tag == STRING:
+                if offset + _STRING_LENGTH.size > size:
+                    break
+                (length,) = _STRING_LENGTH.unpack_from(data, offset)
+                offset += _STRING_LENGTH.size
+                if offset + length > size:
+                    break
+                self._strings.append(data[offset : offset + length].decode("utf-8"))
+                offset += length
+            elif tag == FRAME:
+                if offset + _FRAME_LENGTH.size > size:
+                    break
+                (length,) = _FRAME_LENGTH.unpack_from(data, offset)
+                offset += _FRAME_LENGTH.size
+                if offset + length > size:
+                    break
+                self._frames.append(offset)
+                offset += length
+            else:
+                raise ValueError("Corrupt replay record at {}".format(offset - 1))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def __getitem__(self, index: int) -> Frame:
+        if index < 0:
+            index += len(self._frames)
+        return self._decode(index, self._frames[index])
+
+    def __iter__(self) -> Iterator[Frame]:
+        for index, offset in enumerate(self._frames):
+            yield self._decode(index, offset)
+
+    def _decode(self, index: int, offset: int) -> Frame:
+        data = self._map
+        strings = self._strings
+        timestamp, bot_id, dx, dy, count = FRAME_HEADER.unpack_from(data, offset)
+        offset += FRAME_HEADER.size
+        objects = []
+        for _ in range(count):
+            item_id, type_number, x, y, mask = OBJECT_HEADER.unpack_from(
+                data, offset
+            )
+            offset += OBJECT_HEADER.size
+            properties = None
+            if mask:
+                compiled = _properties_struct(mask)
+                values = iter(compiled.unpack_from(data, offset))
+                offset += compiled.size
+                fields = {}
+                for bit, (name, _) in enumerate(_FIELDS):
+                    if not mask & (1 << bit):
+                        continue
+                    if name == "base":
+                        base_x = next(values)
+                        fields[name] = Base(y=next(values), x=base_x)
+                    elif name in ("pair_id", "name", "time_joined"):
+                        fields[name] = strings[next(values)]
+                    elif name == "can_tackle":
+                        fields[name] = bool(next(values))
+                    else:
+                        fields[name] = next(values)
+                properties = Properties(**fields)
+            objects.append(
+                GameObject(
+                    id=item_id,
+                    position=Position(y=y, x=x),
+                    type=strings[type_number],
+                    properties=properties,
+                )
+            )
+        header = self.header
+        board = Board(
+            id=header["board_id"],
+            width=header["width"],
+            height=header["height"],
+            features=self._features,
+            minimum_delay_between_moves=header["minimum_delay_between_moves"],
+            game_objects=objects,
+        )
+        return Frame(index, timestamp, board, None if bot_id < 0 else bot_id, (dx, dy))
+
+    def replay(self, logic: BaseLogic) -> Iterator[ReplayStep]:
+        """
+        Feed every frame to logic as if it was received from the engine and
+        yield the move it decides next to the recorded one. Frames in which
+        our bot is not on the board are skipped.
+        """
+        state = BoardState()
+        state.subscribe(logic.on_board_update)
+        for frame in self:
+            state.update(frame.board)
+            board_bot = frame.board_bot
+            if board_bot is None:
+                continue
+            yield ReplayStep(frame, logic.next_move(board_bot, frame.board))
+
+    def close(self):
+        self._map.close()
+        self._file.close()
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import List, Optional
+
+from game import metrics
+from game.async_api import AsyncApi
+from game.async_board_handler import AsyncBoardHandler
+from game.async_bot_handler import AsyncBotHandler
+from game.board_state import BoardState
+from game.controllers import CONTROLLERS
+from game.logic.base import BaseLogic
+from game.scheduler import MoveScheduler
+from game.snapshots import SnapshotService
+from game.supervisor import AsyncSupervisor
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BotConfig:
+    logic: str
+    name: Optional[str] = None
+    email: Optional[str] = None
+    password: Optional[str] = None
+    team: Optional[str] = None
+    token: Optional[str] = None
+
+
+async def _get_token(config: BotConfig, bot_handler: AsyncBotHandler) -> Optional[str]:
+    if config.token:
+        return config.token
+    token = await bot_handler.recover(config.email, config.password)
+    if token:
+        return token
+    bot = await bot_handler.register(
+        config.name, config.email, config.password, config.team
+    )
+    return bot.id if bot else None
+
+
+async def run_bot(
+    config: BotConfig,
+    bot_handler: AsyncBotHandler,
+    board_handler: AsyncBoardHandler,
+    board_id: int,
+    time_factor: int = 1,
+    snapshots: Optional[SnapshotService] = None,
+) -> None:
+    """
+    Play one game with one bot. Mirrors the game loop in main.py, but yields
+    to the event loop while waiting on the engine so other bots can run.
+    :param config: BotConfig
+    :param board_id: int
+    :param snapshots: boards shared with the other bots of this process
+    """
+    if snapshots is None:
+        snapshots = SnapshotService(board_handler)
+    label = config.name or config.token
+    if config.logic not in CONTROLLERS:
+        logger.error("Invalid logic controller for %s", label)
+        return
+
+    token = await _get_token(config, bot_handler)
+    if not token:
+        logger.error("Unable to register bot %s", label)
+        return
+
+    bot = await bot_handler.get_my_info(token)
+    if not bot or not bot.name:
+        logger.error("Bot %s does not exist", label)
+        return
+
+    if not await bot_handler.join(bot.id, board_id):
+        logger.error("%s was unable to join board %s", bot.name, board_id)
+        return
+    logger.info("Welcome back, %s", bot.name)
+
+    bot_logic: BaseLogic = CONTROLLERS[config.logic]()
+    # Only a board requested after joining is sure to show the bot
+    board = await snapshots.get(board_id, since=snapshots.clock())
+    if not board:
+        logger.error("Unable to get board %s for %s", board_id, bot.name)
+        return
+    move_delay = board.minimum_delay_between_moves / 1000
+    board_state = BoardState()
+    board_state.subscribe(bot_logic.on_board_update)
+    board_state.update(board)
+    scheduler = MoveScheduler(move_delay, time_factor)
+    supervisor = AsyncSupervisor(
+        bot_handler, snapshots, bot, board_id, interval=scheduler.interval
+    )
+
+    while True:
+        board_bot = board.get_bot(bot)
+        if not board_bot:
+            break
+
+        bot_logic.deadline = scheduler.next_send()
+        with metrics.timer("next_move"):
+            if bot_logic.anytime:
+                # A search would hold up every other bot on the event loop
+                delta_x, delta_y = await asyncio.get_running_loop().run_in_executor(
+                    None, bot_logic.next_move, board_bot, board
+                )
+            else:
+                delta_x, delta_y = bot_logic.next_move(board_bot, board)
+        if not board.is_valid_move(board_bot.position, delta_x, delta_y):
+            metrics.increment("invalid_moves")
+            logger.warning(
+                "%s: invalid move (%s, %s) will be ignored",
+                bot.name,
+                delta_x,
+                delta_y,
+            )
+            scheduler.defer()
+            await scheduler.wait_async()
+            # Decide again on a fresh board, the same one would give the same
+            # move
+            board = await supervisor.skip(board_bot)
+            if not board:
+                break
+            board_state.update(board)
+            continue
+
+        await scheduler.wait_async()
+        scheduler.sent()
+        sent = snapshots.clock()
+        # After a fault the supervisor reads the board again
+        result = await supervisor.move(board_bot, delta_x, delta_y)
+        if result.fault:
+            metrics.increment("failed_moves")
+            scheduler.failed(result.fault.status)
+        else:
+            metrics.increment("moves")
+            scheduler.succeeded()
+            snapshots.offer(board_id, result.board, sent)
+        board = result.board
+        if not board:
+            break
+        board_state.update(board)
+
+    logger.info("Game over! %s", bot.name)
+    if supervisor.lost_ticks:
+        logger.info(
+            "%s lost %d ticks to faults, joined again %d times",
+            bot.name,
+            supervisor.lost_ticks,
+            supervisor.rejoins,
+        )
+
+
+async def run_bots(
+    configs: List[BotConfig],
+    host: str,
+    board_id: int,
+    time_factor: int = 1,
+    pool_size: int = 100,
+    strict: bool = False,
+) -> None:
+    """
+    Drive every bot in configs concurrently on one event loop, sharing a single
+    connection pool to the engine and the board snapshots.
+    :param configs: list of BotConfig
+    :param host: base url of the engine api
+    """
+    api = AsyncApi(host, pool_size=pool_size, strict=strict)
+    bot_handler = AsyncBotHandler(api)
+    board_handler = AsyncBoardHandler(api)
+    snapshots = SnapshotService(board_handler)
+    try:
+        results = await asyncio.gather(
+            *(
+                run_bot(
+                    config,
+                    bot_handler,
+                    board_handler,
+                    board_id,
+                    time_factor,
+                    snapshots,
+                )
+                for config in configs
+            ),
+            return_exceptions=True,
+        )
+        for config, result in zip(configs, results):
+            if isinstance(result, Exception):
+                logger.error(
+                    "%s stopped: %r",
+                    config.name or config.token,
+                    result,
+                    exc_info=result,
+                )
+    finally:
+        await api.close()
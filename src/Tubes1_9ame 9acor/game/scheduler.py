@@ -0,0 +1,82 @@
+import asyncio
+import time
+from typing import Callable, Optional
+
+from game import metrics
+
+RATE_LIMITED = 429
+
+
+class MoveScheduler:
+    """
+    Paces moves at the board's minimum delay using monotonic deadlines. The
+    next deadline is measured from the moment the previous move was sent, so
+    time spent on the request and on deciding the next move is not waited
+    again. Failed moves push the deadline back exponentially, up to
+    max_backoff seconds, until a move succeeds.
+    """
+
+    def __init__(
+        self,
+        min_delay: float,
+        time_factor: float = 1,
+        margin: float = 0.0,
+        max_backoff: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.interval = min_delay * time_factor + margin
+        self.max_backoff = max_backoff
+        self.clock = clock
+        self.backoff = 0.0
+        self._deadline = clock()
+        self._last_sent: Optional[float] = None
+
+    def remaining(self) -> float:
+        """
+        Seconds until the next move may be sent
+        """
+        return max(0.0, self._deadline - self.clock())
+
+    def next_send(self) -> float:
+        """
+        clock() at which the next move may be sent
+        """
+        return self._deadline
+
+    def wait(self):
+        with metrics.timer("sleep"):
+            delay = self.remaining()
+            if delay > 0:
+                time.sleep(delay)
+
+    async def wait_async(self):
+        with metrics.timer("sleep"):
+            delay = self.remaining()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    def sent(self):
+        now = self.clock()
+        if self._last_sent is not None:
+            # Time between consecutive moves, i.e. the real tick length
+            metrics.observe("tick", now - self._last_sent)
+        self._last_sent = now
+        self._deadline = now + self.interval + self.backoff
+
+    def succeeded(self):
+        self.backoff = 0.0
+
+    def failed(self, status: Optional[int] = None):
+        """
+        Back off after a rejected or failed move. A rate limited response
+        starts from a longer delay than other errors.
+        """
+        start = self.interval * (4 if status == RATE_LIMITED else 1)
+        self.backoff = min(self.max_backoff, max(start, self.backoff * 2))
+        self._deadline = max(self._deadline, self.clock() + self.backoff)
+
+    def defer(self):
+        """
+        Skip one slot without sending a move, e.g. after an invalid move
+        """
+        self._deadline = max(self._deadline, self.clock() + self.interval)
@@ -0,0 +1,177 @@
+from typing import List, Optional
+
+from dacite import from_dict
+from game import metrics
+from game.models import (
+    Base,
+    Board,
+    Bot,
+    Config,
+    Feature,
+    GameObject,
+    Position,
+    Properties,
+)
+
+# Hand-written constructors for the decoded (snake_case) responses. They know
+# the schema up front, so unlike dacite.from_dict they do no type reflection
+# per field. Pass strict=True to go through dacite and get full validation.
+
+
+def position_from_dict(data: dict) -> Position:
+    return Position(y=data["y"], x=data["x"])
+
+
+def properties_from_dict(data: Optional[dict]) -> Optional[Properties]:
+    if data is None:
+        return None
+    get = data.get
+    base = get("base")
+    return Properties(
+        points=get("points"),
+        pair_id=get("pair_id"),
+        diamonds=get("diamonds"),
+        score=get("score"),
+        name=get("name"),
+        inventory_size=get("inventory_size"),
+        can_tackle=get("can_tackle"),
+        milliseconds_left=get("milliseconds_left"),
+        time_joined=get("time_joined"),
+        base=Base(y=base["y"], x=base["x"]) if base else None,
+    )
+
+
+def game_object_from_dict(data: dict) -> GameObject:
+    position = data["position"]
+    return GameObject(
+        id=data["id"],
+        position=Position(y=position["y"], x=position["x"]),
+        type=data["type"],
+        properties=properties_from_dict(data.get("properties")),
+    )
+
+
+def config_from_dict(data: Optional[dict]) -> Optional[Config]:
+    if data is None:
+        return None
+    get = data.get
+    return Config(
+        generation_ratio=get("generation_ratio"),
+        min_ratio_for_generation=get("min_ratio_for_generation"),
+        red_ratio=get("red_ratio"),
+        seconds=get("seconds"),
+        pairs=get("pairs"),
+        inventory_size=get("inventory_size"),
+        can_tackle=get("can_tackle"),
+    )
+
+
+def feature_from_dict(data: dict) -> Feature:
+    return Feature(name=data["name"], config=config_from_dict(data.get("config")))
+
+
+def board_from_dict(data: dict, strict: bool = False) -> Board:
+    with metrics.timer("from_dict"):
+        if strict:
+            return from_dict(Board, data)
+        game_objects = data.get("game_objects")
+        return Board(
+            id=data["id"],
+            width=data["width"],
+            height=data["height"],
+            features=[feature_from_dict(feature) for feature in data["features"]],
+            minimum_delay_between_moves=data["minimum_delay_between_moves"],
+            game_objects=(
+                None
+                if game_objects is None
+                else [game_object_from_dict(item) for item in game_objects]
+            ),
+        )
+
+
+def boards_from_list(data: List[dict], strict: bool = False) -> List[Board]:
+    return [board_from_dict(board, strict) for board in data]
+
+
+def bot_from_dict(data: dict, strict: bool = False) -> Bot:
+    if strict:
+        return from_dict(Bot, data)
+    return Bot(name=data["name"], email=data["email"], id=data["id"])
+
+
+# Encoders back to the engine's camelCase wire format, e.g. for a mock engine
+# or for benchmarks that need realistic responses. Fields that are None are
+# left out, like the engine does.
+
+_PROPERTY_KEYS = (
+    ("points", "points"),
+    ("pair_id", "pairId"),
+    ("diamonds", "diamonds"),
+    ("score", "score"),
+    ("name", "name"),
+    ("inventory_size", "inventorySize"),
+    ("can_tackle", "canTackle"),
+    ("milliseconds_left", "millisecondsLeft"),
+    ("time_joined", "timeJoined"),
+)
+_CONFIG_KEYS = (
+    ("generation_ratio", "generationRatio"),
+    ("min_ratio_for_generation", "minRatioForGeneration"),
+    ("red_ratio", "redRatio"),
+    ("seconds", "seconds"),
+    ("pairs", "pairs"),
+    ("inventory_size", "inventorySize"),
+    ("can_tackle", "canTackle"),
+)
+
+
+def properties_to_dict(properties: Properties) -> dict:
+    data = {}
+    for field, key in _PROPERTY_KEYS:
+        value = getattr(properties, field)
+        if value is not None:
+            data[key] = value
+    if properties.base is not None:
+        data["base"] = {"x": properties.base.x, "y": properties.base.y}
+    return data
+
+
+def game_object_to_dict(item: GameObject) -> dict:
+    data = {
+        "id": item.id,
+        "position": {"x": item.position.x, "y": item.position.y},
+        "type": item.type,
+    }
+    if item.properties is not None:
+        data["properties"] = properties_to_dict(item.properties)
+    return data
+
+
+def feature_to_dict(feature: Feature) -> dict:
+    data = {"name": feature.name}
+    if feature.config is not None:
+        data["config"] = {
+            key: getattr(feature.config, field)
+            for field, key in _CONFIG_KEYS
+            if getattr(feature.config, field) is not None
+        }
+    return data
+
+
+def board_to_dict(board: Board) -> dict:
+    return {
+        "id": board.id,
+        "width": board.width,
+        "height": board.height,
+        "features": [feature_to_dict(feature) for feature in board.features],
+        "minimumDelayBetweenMoves": board.minimum_delay_between_moves,
+        "gameObjects": (
+            None
+            if board.game_objects is None
+            else [game_object_to_dict(item) for item in board.game_objects]
+        ),
+    }
+
+
+def bot_to_dict(bot: Bot) -> dict:
+    return {"name": bot.name, "email": bot.email, "id": bot.id}
@@ -0,0 +1,417 @@
+import random
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from game.board_state import BoardState
+from game.logic.base import BaseLogic
+from game.models import (
+    Base,
+    Board,
+    Config,
+    Feature,
+    GameObject,
+    Position,
+    Properties,
+)
+
+Cell = Tuple[int, int]
+
+
+@dataclass
+class SimulationConfig:
+    width: int = 15
+    height: int = 15
+    seconds: int = 60
+    minimum_delay_between_moves: int = 1000
+    inventory_size: int = 5
+    can_tackle: bool = False
+    # Diamonds are kept at generation_ratio * width * height and refilled once
+    # fewer than min_ratio_for_generation of that are left.
+    generation_ratio: float = 0.1
+    min_ratio_for_generation: float = 0.5
+    red_ratio: float = 0.2
+    teleport_pairs: int = 1
+    diamond_button: bool = True
+
+    @property
+    def ticks(self) -> int:
+        return self.seconds * 1000 // self.minimum_delay_between_moves
+
+
+@dataclass
+class BotResult:
+    name: str
+    score: int = 0
+    moves: int = 0
+    invalid_moves: int = 0
+    errors: int = 0
+    diamonds_collected: int = 0
+    tackles: int = 0
+
+
+@dataclass
+class SimulationResult:
+    ticks: int
+    bots: List[BotResult]
+
+    def winner(self) -> Optional[BotResult]:
+        best = max((bot.score for bot in self.bots), default=None)
+        winners = [bot for bot in self.bots if bot.score == best]
+        return winners[0] if len(winners) == 1 else None
+
+
+@dataclass
+class _SimBot:
+    id: int
+    base_id: int
+    name: str
+    logic: Optional[BaseLogic]
+    base: Cell
+    cell: Cell
+    diamonds: int = 0
+    result: Optional[BotResult] = None
+
+
+@dataclass
+class _Diamond:
+    id: int
+    cell: Cell
+    points: int
+    # Diamonds never change, their snapshot is built once
+    game_object: Optional[GameObject] = None
+
+
+class Simulator:
+    """
+    Local, headless implementation of the Diamonds rules. Every tick each bot
+    gets the same Board snapshot (built from the same models as the engine's
+    responses) and its move is applied immediately, in a random order that
+    depends only on seed. Moves follow the engine: a bot picks up a diamond
+    when it fits in its inventory, deposits everything on its own base, is
+    carried to the paired cell by a teleporter unless a bot stands there,
+    resets all diamonds on the button and, when can_tackle is on, tackles a
+    bot it walks into, taking its diamonds and sending it home, or next to
+    it if its base is taken. Two bots never share a cell. There is no
+    network and no sleeping, milliseconds_left is derived from the tick
+    count.
+    """
+
+    def __init__(
+        self, config: Optional[SimulationConfig] = None, seed: Optional[int] = None
+    ):
+        self.config = config or SimulationConfig()
+        self.rng = random.Random(seed)
+        self.tick = 0
+        self.board_id = 1
+        self.state = BoardState()
+        self._next_id = 1
+        self._bots: List[_SimBot] = []
+        self._diamonds: Dict[Cell, _Diamond] = {}
+        self._teleports: Dict[Cell, Cell] = {}
+        self._teleport_ids: Dict[Cell, Tuple[int, str]] = {}
+        self._button: Optional[Tuple[int, Cell]] = None
+        # Snapshots of bases, teleporters and the button by object id
+        self._static: Dict[int, GameObject] = {}
+
+        for pair in range(self.config.teleport_pairs):
+            a = self._free_cell()
+            self._teleports[a] = a
+            b = self._free_cell()
+            self._teleports[a], self._teleports[b] = b, a
+            pair_id = str(pair + 1)
+            self._teleport_ids[a] = (self._new_id(), pair_id)
+            self._teleport_ids[b] = (self._new_id(), pair_id)
+        if self.config.diamond_button:
+            self._button = (self._new_id(), self._free_cell())
+        self._generate_diamonds()
+
+    def _new_id(self) -> int:
+        self._next_id += 1
+        return self._next_id - 1
+
+    def _occupied(self) -> set:
+        cells = set(self._diamonds)
+        cells.update(self._teleports)
+        cells.update(bot.cell for bot in self._bots)
+        cells.update(bot.base for bot in self._bots)
+        if self._button is not None:
+            cells.add(self._button[1])
+        return cells
+
+    def _free_cell(self) -> Cell:
+        occupied = self._occupied()
+        free = [
+            (x, y)
+            for x in range(self.config.width)
+            for y in range(self.config.height)
+            if (x, y) not in occupied
+        ]
+        if not free:
+            raise ValueError("Board is full")
+        return self.rng.choice(free)
+
+    def _generate_diamonds(self):
+        config = self.config
+        target = int(config.width * config.height * config.generation_ratio)
+        while len(self._diamonds) < target:
+            cell = self._free_cell()
+            points = 2 if self.rng.random() < config.red_ratio else 1
+            self._diamonds[cell] = _Diamond(self._new_id(), cell, points)
+
+    def add_bot(self, name: str, logic: Optional[BaseLogic] = None) -> int:
+        """
+        Join a bot to the game. Its base is placed on a free cell and the bot
+        starts on it. Without a logic the bot is driven from outside through
+        apply_move, e.g. by the mock server, and skipped by step.
+        :return: id of the bot game object
+        """
+        base = self._free_cell()
+        bot = _SimBot(
+            id=self._new_id(),
+            base_id=self._new_id(),
+            name=name,
+            logic=logic,
+            base=base,
+            cell=base,
+            result=BotResult(name),
+        )
+        self._bots.append(bot)
+        if logic is not None:
+            self.state.subscribe(logic.on_board_update)
+        return bot.id
+
+    def remove_bot(self, bot_id: int) -> Optional[BotResult]:
+        """
+        Take a bot and its base off the board, e.g. when its session ended
+        """
+        for i, bot in enumerate(self._bots):
+            if bot.id == bot_id:
+                del self._bots[i]
+                self._static.pop(bot.base_id, None)
+                if bot.logic is not None:
+                    self.state.unsubscribe(bot.logic.on_board_update)
+                return bot.result
+        return None
+
+    @property
+    def milliseconds_left(self) -> int:
+        elapsed = self.tick * self.config.minimum_delay_between_moves
+        return max(0, self.config.seconds * 1000 - elapsed)
+
+    @property
+    def finished(self) -> bool:
+        return self.milliseconds_left <= 0
+
+    def board(self) -> Board:
+        """
+        Snapshot of the current state using the engine's models
+        """
+        config = self.config
+        static = self._static
+        milliseconds_left = self.milliseconds_left
+        objects = []
+        for bot in self._bots:
+            base = static.get(bot.base_id)
+            if base is None:
+                base = static[bot.base_id] = GameObject(
+                    id=bot.base_id,
+                    position=Position(bot.base[1], bot.base[0]),
+                    type="BaseGameObject",
+                    properties=Properties(name=bot.name),
+                )
+            objects.append(base)
+            objects.append(
+                GameObject(
+                    id=bot.id,
+                    position=Position(bot.cell[1], bot.cell[0]),
+                    type="BotGameObject",
+                    properties=Properties(
+                        diamonds=bot.diamonds,
+                        score=bot.result.score,
+                        name=bot.name,
+                        inventory_size=config.inventory_size,
+                        can_tackle=config.can_tackle,
+                        milliseconds_left=milliseconds_left,
+                        time_joined="",
+                        base=Base(bot.base[1], bot.base[0]),
+                    ),
+                )
+            )
+        for cell, (teleport_id, pair_id) in self._teleport_ids.items():
+            teleport = static.get(teleport_id)
+            if teleport is None:
+                teleport = static[teleport_id] = GameObject(
+                    id=teleport_id,
+                    position=Position(cell[1], cell[0]),
+                    type="TeleportGameObject",
+                    properties=Properties(pair_id=pair_id),
+                )
+            objects.append(teleport)
+        if self._button is not None:
+            button_id, cell = self._button
+            button = static.get(button_id)
+            if button is None or button.position != Position(cell[1], cell[0]):
+                button = static[button_id] = GameObject(
+                    id=button_id,
+                    position=Position(cell[1], cell[0]),
+                    type="DiamondButtonGameObject",
+                )
+            objects.append(button)
+        for diamond in self._diamonds.values():
+            if diamond.game_object is None:
+                diamond.game_object = GameObject(
+                    id=diamond.id,
+                    position=Position(diamond.cell[1], diamond.cell[0]),
+                    type="DiamondGameObject",
+                    properties=Properties(points=diamond.points),
+                )
+            objects.append(diamond.game_object)
+        return Board(
+            id=self.board_id,
+            width=config.width,
+            height=config.height,
+            features=[
+                Feature(
+                    "DiamondsFeature",
+                    Config(
+                        generation_ratio=config.generation_ratio,
+                        min_ratio_for_generation=config.min_ratio_for_generation,
+                        red_ratio=config.red_ratio,
+                    ),
+                ),
+                Feature(
+                    "InventoryFeature", Config(inventory_size=config.inventory_size)
+                ),
+                Feature("TeleportFeature", Config(pairs=config.teleport_pairs)),
+                Feature("SessionFeature", Config(seconds=config.seconds)),
+                Feature("TackleFeature", Config(can_tackle=config.can_tackle)),
+            ],
+            minimum_delay_between_moves=config.minimum_delay_between_moves,
+            game_objects=objects,
+        )
+
+    def _is_valid_move(self, bot: _SimBot, dx: int, dy: int) -> bool:
+        if not (-1 <= dx <= 1) or not (-1 <= dy <= 1) or abs(dx) + abs(dy) != 1:
+            return False
+        x, y = bot.cell[0] + dx, bot.cell[1] + dy
+        return 0 <= x < self.config.width and 0 <= y < self.config.height
+
+    def move(self, bot: _SimBot, dx: int, dy: int) -> bool:
+        """
+        Apply one move for bot. Returns False if the move was ignored.
+        """
+        if not self._is_valid_move(bot, dx, dy):
+            bot.result.invalid_moves += 1
+            return False
+
+        cell = (bot.cell[0] + dx, bot.cell[1] + dy)
+        other = self._bot_at(cell, bot)
+        if other is not None:
+            if not self.config.can_tackle:
+                bot.result.invalid_moves += 1
+                return False
+            stolen = min(other.diamonds, self.config.inventory_size - bot.diamonds)
+            bot.diamonds += stolen
+            other.diamonds = 0
+            # Sent home, or next to it when another bot stands on its base
+            other.cell = self._free_near(other.base, other, cell)
+            bot.result.tackles += 1
+
+        # Bots never share a cell, a teleporter whose pair is taken does nothing
+        paired = self._teleports.get(cell)
+        if paired is not None and self._bot_at(paired, bot) is None:
+            cell = paired
+        bot.cell = cell
+        bot.result.moves += 1
+
+        diamond = self._diamonds.get(cell)
+        capacity = self.config.inventory_size
+        if diamond is not None and bot.diamonds + diamond.points <= capacity:
+            bot.diamonds += diamond.points
+            bot.result.diamonds_collected += diamond.points
+            del self._diamonds[cell]
+
+        if self._button is not None and self._button[1] == cell:
+            self._diamonds.clear()
+            self._button = (self._button[0], self._free_cell())
+            self._generate_diamonds()
+
+        if cell == bot.base:
+            bot.result.score += bot.diamonds
+            bot.diamonds = 0
+        return True
+
+    def _bot_at(self, cell: Cell, exclude: _SimBot) -> Optional[_SimBot]:
+        return next(
+            (item for item in self._bots if item is not exclude and item.cell == cell),
+            None,
+        )
+
+    def _free_near(self, cell: Cell, bot: _SimBot, reserved: Cell) -> Cell:
+        # Closest cell to cell, in a fixed order, that no other bot stands on
+        # and that is not reserved for the bot moving there
+        width, height = self.config.width, self.config.height
+        taken = {item.cell for item in self._bots if item is not bot}
+        taken.add(reserved)
+        x, y = cell
+        for distance in range(width + height):
+            for dx in range(-distance, distance + 1):
+                rest = distance - abs(dx)
+                for dy in sorted({-rest, rest}):
+                    candidate = (x + dx, y + dy)
+                    if (
+                        0 <= candidate[0] < width
+                        and 0 <= candidate[1] < height
+                        and candidate not in taken
+                    ):
+                        return candidate
+        raise ValueError("Board is full")
+
+    def apply_move(self, bot_id: int, dx: int, dy: int) -> bool:
+        """
+        Move a bot right away instead of waiting for the next tick, refilling
+        diamonds afterwards like a tick would
+        """
+        bot = next((item for item in self._bots if item.id == bot_id), None)
+        if bot is None:
+            return False
+        moved = self.move(bot, dx, dy)
+        self._refill()
+        return moved
+
+    def _refill(self):
+        config = self.config
+        target = int(config.width * config.height * config.generation_ratio)
+        if len(self._diamonds) < target * config.min_ratio_for_generation:
+            self._generate_diamonds()
+
+    def step(self) -> bool:
+        """
+        Play one tick. Returns False once the game is over.
+        """
+        if self.finished:
+            return False
+
+        board = self.board()
+        self.state.update(board)
+        order = list(self._bots)
+        self.rng.shuffle(order)
+        for bot in order:
+            if bot.logic is None:
+                continue
+            board_bot = board.index.bots_by_id[bot.id]
+            try:
+                dx, dy = bot.logic.next_move(board_bot, board)
+            except Exception:
+                bot.result.errors += 1
+                continue
+            self.move(bot, dx, dy)
+
+        self._refill()
+        self.tick += 1
+        return not self.finished
+
+    def run(self) -> SimulationResult:
+        while self.step():
+            pass
+        return SimulationResult(self.tick, [bot.result for bot in self._bots])
@@ -0,0 +1,126 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+from game import metrics
+from game.async_board_handler import AsyncBoardHandler
+from game.models import Board
+
+
+@dataclass(slots=True)
+class Snapshot:
+    board: Board
+    # When the request that returned the board was sent, the board shows the
+    # game as it was at that moment or later
+    sent: float
+
+
+@dataclass(slots=True)
+class _Fetch:
+    future: asyncio.Future
+    sent: float
+
+
+class SnapshotService:
+    """
+    Board snapshots shared by the bots of one process. Bots that need the
+    board at the same time wait for a single request, whose response is
+    decoded once, and a board that any bot received is reused by the others
+    as long as it is recent enough for them. Boards from move responses can
+    be offered too, a bot keeps using its own move response.
+
+    Every caller gets its own view: a Board with its own list of the shared,
+    never modified game objects, so each bot's BoardState can index and
+    update it without affecting the others.
+    """
+
+    def __init__(
+        self,
+        board_handler: AsyncBoardHandler,
+        max_age: float = 0.1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.board_handler = board_handler
+        self.max_age = max_age
+        self.clock = clock
+        self.fetches = 0
+        self.shared = 0
+        self._latest: Dict[int, Snapshot] = {}
+        self._pending: Dict[int, _Fetch] = {}
+
+    def latest(self, board_id: int) -> Optional[Snapshot]:
+        return self._latest.get(board_id)
+
+    def offer(self, board_id: int, board: Board, sent: float) -> bool:
+        """
+        Keep board as the latest snapshot if it is newer than the current one.
+        A view of board is kept, so the caller can go on updating board.
+        :param sent: clock() when the request returning board was sent
+        """
+        current = self._latest.get(board_id)
+        if current is not None and current.sent >= sent:
+            return False
+        self._latest[board_id] = Snapshot(view(board), sent)
+        return True
+
+    async def get(
+        self, board_id: int, since: Optional[float] = None
+    ) -> Optional[Board]:
+        """
+        Board of board_id as of since or later, by default any board at most
+        max_age old. Only requested from the engine if no such snapshot is
+        known or on its way.
+        """
+        if since is None:
+            since = self.clock() - self.max_age
+        snapshot = self._latest.get(board_id)
+        if snapshot is not None and snapshot.sent >= since:
+            self.shared += 1
+            metrics.increment("shared_boards")
+            return view(snapshot.board)
+
+        fetch = self._pending.get(board_id)
+        if fetch is not None and fetch.sent >= since:
+            self.shared += 1
+            metrics.increment("shared_boards")
+        else:
+            fetch = _Fetch(asyncio.get_running_loop().create_future(), self.clock())
+            self._pending[board_id] = fetch
+            asyncio.ensure_future(self._fetch(board_id, fetch))
+        # A waiter being cancelled must not cancel the request for the others
+        board = await asyncio.shield(fetch.future)
+        return None if board is None else view(board)
+
+    async def _fetch(self, board_id: int, fetch: _Fetch):
+        try:
+            board = await self.board_handler.get_board(board_id)
+        except Exception as e:
+            fetch.future.set_exception(e)
+            # Retrieved here, so an error nobody waits for is not reported
+            fetch.future.exception()
+        else:
+            self.fetches += 1
+            metrics.increment("board_fetches")
+            if board is not None:
+                self.offer(board_id, board, fetch.sent)
+            fetch.future.set_result(board)
+        finally:
+            if self._pending.get(board_id) is fetch:
+                del self._pending[board_id]
+
+
+def view(board: Board) -> Board:
+    """
+    Board sharing the game objects of board but not its list or index
+    """
+    return Board(
+        id=board.id,
+        width=board.width,
+        height=board.height,
+        features=board.features,
+        minimum_delay_between_moves=board.minimum_delay_between_moves,
+        game_objects=(
+            None if board.game_objects is None else list(board.game_objects)
+        ),
+    )
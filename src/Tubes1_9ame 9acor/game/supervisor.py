@@ -0,0 +1,353 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import aiohttp
+import requests
+from game import metrics
+from game.async_bot_handler import AsyncBotHandler
+from game.board_handler import BoardHandler
+from game.bot_handler import BotHandler
+from game.models import Board, Bot, GameObject
+from game.snapshots import SnapshotService
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Kinds of faults
+# The request or the engine hiccupped, trying again later should work
+TRANSIENT = "transient"
+# The engine refused this move, e.g. an invalid direction
+REJECTED = "rejected"
+# The engine no longer knows the bot as playing
+DISCONNECTED = "disconnected"
+# A bug on our side or an answer we can't handle, retrying won't help
+FATAL = "fatal"
+
+TRANSIENT_STATUSES = frozenset((408, 425, 429, 500, 502, 503, 504))
+DISCONNECTED_STATUSES = frozenset((401, 403, 404))
+# Broken connections, timeouts and bodies that are not JSON, e.g. an error
+# page of a proxy
+TRANSIENT_ERRORS = (
+    requests.RequestException,
+    aiohttp.ClientError,
+    asyncio.TimeoutError,
+    ValueError,
+)
+
+
+@dataclass(slots=True)
+class Fault:
+    kind: str
+    status: Optional[int] = None
+    error: Optional[BaseException] = None
+
+
+def classify(
+    status: Optional[int] = None, error: Optional[BaseException] = None
+) -> Fault:
+    """
+    Kind of a failed request, from the exception it raised or the status it
+    returned
+    """
+    if error is not None:
+        if isinstance(error, TRANSIENT_ERRORS):
+            return Fault(TRANSIENT, status, error)
+        return Fault(FATAL, status, error)
+    if status is None or status in TRANSIENT_STATUSES or status >= 500:
+        return Fault(TRANSIENT, status)
+    if status in DISCONNECTED_STATUSES:
+        return Fault(DISCONNECTED, status)
+    return Fault(REJECTED, status)
+
+
+@dataclass(slots=True)
+class MoveResult:
+    # Board to go on with: the response to the move or, after a fault, the
+    # board read again. None when the game can't go on.
+    board: Optional[Board]
+    fault: Optional[Fault] = None
+
+
+class Supervisor:
+    """
+    Keeps the game loop of one bot going through faults. Reads are retried
+    with jittered exponential backoff, a failed move is not sent again but
+    followed by a fresh board so the next move is decided on the real state,
+    and a bot that dropped off the board while it still had time left joins
+    again, at most max_rejoins times.
+
+    Ticks lost to faults or skipped moves, the tick itself and every move
+    interval spent recovering, are counted as lost_ticks, also in the
+    metrics.
+    """
+
+    def __init__(
+        self,
+        bot_handler: BotHandler,
+        board_handler: BoardHandler,
+        bot: Bot,
+        board_id: int,
+        interval: float = 0.0,
+        attempts: int = 4,
+        base_delay: float = 0.05,
+        max_delay: float = 1.0,
+        max_rejoins: int = 3,
+        rng: Optional[random.Random] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        :param interval: seconds between two moves, time lost to faults is
+            counted in these
+        :param attempts: tries of a read before giving up
+        """
+        self.bot_handler = bot_handler
+        self.board_handler = board_handler
+        self.bot = bot
+        self.board_id = board_id
+        self.interval = interval
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_rejoins = max_rejoins
+        self.rng = rng or random.Random()
+        self.sleep = sleep
+        self.clock = clock
+        self.lost_ticks = 0
+        self.retries = 0
+        self.resyncs = 0
+        self.rejoins = 0
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Delay before retry number attempt, at least half of the exponential
+        delay so retries of many bots spread out without any being immediate
+        """
+        delay = min(self.max_delay, self.base_delay * 2**attempt)
+        return self.rng.uniform(delay / 2, delay)
+
+    def read(self, name: str, fn: Callable[..., Optional[T]], *args) -> Optional[T]:
+        """
+        Result of fn(*args), tried again after transient faults and empty
+        results. Only for requests that can safely be repeated.
+        """
+        for attempt in range(self.attempts):
+            if attempt:
+                self.retries += 1
+                metrics.increment("read_retries")
+                self.sleep(self.backoff(attempt - 1))
+            try:
+                result = fn(*args)
+            except Exception as e:
+                if classify(error=e).kind == FATAL:
+                    raise
+                logger.warning("%s failed: %r", name, e)
+                continue
+            if result is not None:
+                return result
+            if classify(self._last_status()).kind == DISCONNECTED:
+                # Asking again won't change the answer
+                return None
+        logger.error("%s failed %d times", name, self.attempts)
+        return None
+
+    def board(self) -> Optional[Board]:
+        return self.read("Board", self.board_handler.get_board, self.board_id)
+
+    def join(self) -> bool:
+        return bool(self.read("Join", self._join))
+
+    def _join(self) -> Optional[bool]:
+        # None instead of False, so a refused join is tried again
+        return self.bot_handler.join(self.bot.id, self.board_id) or None
+
+    def move(self, board_bot: GameObject, dx: int, dy: int) -> MoveResult:
+        """
+        Send one move of board_bot. After a fault the board is read again,
+        and the bot joins again if it vanished from it with time left.
+        """
+        failed = self.clock()
+        try:
+            board = self.bot_handler.move(self.bot.id, self.board_id, dx, dy)
+        except Exception as e:
+            fault = classify(error=e)
+            if fault.kind == FATAL:
+                logger.exception("Move failed")
+                return MoveResult(None, fault)
+        else:
+            if board is not None:
+                return MoveResult(board)
+            fault = classify(self._last_status())
+
+        self._report(fault)
+        board = self.resync(board_bot)
+        self._count_lost(board, failed)
+        return MoveResult(board, fault)
+
+    def skip(self, board_bot: GameObject) -> Optional[Board]:
+        """
+        Board after a tick in which no move was sent, e.g. because the logic
+        chose an invalid one. Deciding again on the old board would likely
+        repeat it. The tick counts as lost.
+        """
+        skipped = self.clock()
+        board = self.resync(board_bot)
+        self._count_lost(board, skipped)
+        return board
+
+    def _report(self, fault: Fault):
+        metrics.increment("faults_{}".format(fault.kind))
+        logger.warning("Move failed (%s, status %s)", fault.kind, fault.status)
+
+    def _count_lost(self, board: Optional[Board], since: float):
+        # The tick of the fault and every move interval spent recovering,
+        # nothing when the game turned out to be over
+        if board is not None and board.get_bot(self.bot) is None:
+            return
+        lost = 1
+        if self.interval:
+            lost += int((self.clock() - since) / self.interval)
+        self.lost_ticks += lost
+        metrics.increment("lost_ticks", lost)
+
+    def resync(self, board_bot: GameObject) -> Optional[Board]:
+        """
+        Current board after a fault, None if it can't be read. The bot is
+        missing from it when its game is over.
+        """
+        self.resyncs += 1
+        metrics.increment("resyncs")
+        board = self.board()
+        if not self._should_rejoin(board, board_bot) or not self.join():
+            return board
+        return self.board()
+
+    def _should_rejoin(self, board: Optional[Board], board_bot: GameObject) -> bool:
+        if board is None or board.get_bot(self.bot) is not None:
+            return False
+        if not self._has_time_left(board_bot):
+            # Off the board because its game ended
+            return False
+        if self.rejoins >= self.max_rejoins:
+            logger.error("Bot left the board, not joining again")
+            return False
+        self.rejoins += 1
+        metrics.increment("rejoins")
+        logger.warning("Bot left the board early, joining again")
+        return True
+
+    def _has_time_left(self, board_bot: GameObject) -> bool:
+        left = board_bot.properties.milliseconds_left
+        # Some moves worth of time, the last ones may be lost to the fault
+        return left is not None and left > 3 * self.interval * 1000
+
+    def _last_status(self) -> Optional[int]:
+        return self.bot_handler.api.last_status
+
+
+class AsyncSupervisor(Supervisor):
+    """
+    Supervisor for the asyncio runner, with the same fault kinds, backoff,
+    rejoins and lost ticks. It waits without blocking the event loop and
+    reads boards through the SnapshotService shared by the bots of the
+    process, never older than the moment it asks.
+    """
+
+    def __init__(
+        self,
+        bot_handler: AsyncBotHandler,
+        snapshots: SnapshotService,
+        bot: Bot,
+        board_id: int,
+        interval: float = 0.0,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+        **kwargs,
+    ):
+        super().__init__(
+            bot_handler,
+            snapshots.board_handler,
+            bot,
+            board_id,
+            interval,
+            sleep=sleep,
+            clock=snapshots.clock,
+            **kwargs,
+        )
+        self.snapshots = snapshots
+
+    async def read(
+        self, name: str, fn: Callable[..., Awaitable[Optional[T]]], *args
+    ) -> Optional[T]:
+        for attempt in range(self.attempts):
+            if attempt:
+                self.retries += 1
+                metrics.increment("read_retries")
+                await self.sleep(self.backoff(attempt - 1))
+            try:
+                result = await fn(*args)
+            except Exception as e:
+                if classify(error=e).kind == FATAL:
+                    raise
+                logger.warning("%s failed: %r", name, e)
+                continue
+            if result is not None:
+                return result
+            if classify(self._last_status()).kind == DISCONNECTED:
+                return None
+        logger.error("%s failed %d times", name, self.attempts)
+        return None
+
+    async def board(self) -> Optional[Board]:
+        return await self.read("Board", self._board)
+
+    async def _board(self) -> Optional[Board]:
+        return await self.snapshots.get(self.board_id, since=self.clock())
+
+    async def join(self) -> bool:
+        return bool(await self.read("Join", self._join))
+
+    async def _join(self) -> Optional[bool]:
+        return await self.bot_handler.join(self.bot.id, self.board_id) or None
+
+    async def move(self, board_bot: GameObject, dx: int, dy: int) -> MoveResult:
+        failed = self.clock()
+        try:
+            board = await self.bot_handler.move(self.bot.id, self.board_id, dx, dy)
+        except Exception as e:
+            fault = classify(error=e)
+            if fault.kind == FATAL:
+                logger.exception("Move failed")
+                return MoveResult(None, fault)
+        else:
+            if board is not None:
+                return MoveResult(board)
+            fault = classify(self._last_status())
+
+        self._report(fault)
+        board = await self.resync(board_bot)
+        self._count_lost(board, failed)
+        return MoveResult(board, fault)
+
+    async def skip(self, board_bot: GameObject) -> Optional[Board]:
+        skipped = self.clock()
+        board = await self.resync(board_bot)
+        self._count_lost(board, skipped)
+        return board
+
+    async def resync(self, board_bot: GameObject) -> Optional[Board]:
+        self.resyncs += 1
+        metrics.increment("resyncs")
+        board = await self.board()
+        if not self._should_rejoin(board, board_bot) or not await self.join():
+            return board
+        return await self.board()
+
+    def _last_status(self) -> Optional[int]:
+        # The Api is shared by every bot of the process, so statuses are kept
+        # per bot
+        return self.bot_handler.api.last_statuses.get(self.bot.id)
@@ -0,0 +1,156 @@
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from statistics import mean, stdev
+from typing import Dict, List, Optional, Tuple
+
+from game.controllers import CONTROLLERS
+from game.simulator import SimulationConfig, SimulationResult, Simulator
+
+Z_95 = 1.96
+
+
+@dataclass
+class Entrant:
+    name: str
+    logic: str
+    params: Dict[str, object] = field(default_factory=dict)
+
+
+@dataclass
+class Standing:
+    name: str
+    games: int
+    mean_score: float
+    score_ci: Tuple[float, float]
+    diamonds_per_move: float
+    win_rate: float
+    win_rate_ci: Tuple[float, float]
+    invalid_moves: int
+    errors: int
+
+
+def play_game(
+    seed: int, entrants: List[Entrant], config: SimulationConfig
+) -> SimulationResult:
+    """
+    Play one simulated game. Both the simulator and the random module used by
+    logics such as RandomLogic are seeded, so a seed always replays the same
+    game.
+    """
+    random.seed(seed)
+    simulator = Simulator(config, seed=seed)
+    for entrant in entrants:
+        simulator.add_bot(entrant.name, CONTROLLERS[entrant.logic](**entrant.params))
+    return simulator.run()
+
+
+def _play_games(
+    seeds: List[int], entrants: List[Entrant], config: SimulationConfig
+) -> List[SimulationResult]:
+    return [play_game(seed, entrants, config) for seed in seeds]
+
+
+def run_tournament(
+    entrants: List[Entrant],
+    games: int,
+    seed: int = 0,
+    config: Optional[SimulationConfig] = None,
+    workers: Optional[int] = None,
+) -> List[Standing]:
+    """
+    Play games simulated games between entrants, seeded seed, seed + 1, ...,
+    spread over a process pool, and aggregate the results per entrant
+    :param workers: number of processes, defaults to every core
+    :return: list of Standing, best mean score first
+    """
+    names = [entrant.name for entrant in entrants]
+    if len(set(names)) != len(names):
+        raise ValueError("Entrant names must be unique")
+    for entrant in entrants:
+        if entrant.logic not in CONTROLLERS:
+            raise ValueError("Unknown logic controller {}".format(entrant.logic))
+
+    config = config or SimulationConfig()
+    workers = workers or os.cpu_count() or 1
+    seeds = list(range(seed, seed + games))
+    # A few chunks per worker keeps the pool busy without pickling every game.
+    size = max(1, math.ceil(games / (workers * 4)))
+    chunks = [seeds[i : i + size] for i in range(0, games, size)]
+
+    results: List[SimulationResult] = []
+    if workers == 1:
+        for chunk in chunks:
+            results.extend(_play_games(chunk, entrants, config))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_play_games, chunk, entrants, config)
+                for chunk in chunks
+            ]
+            for future in futures:
+                results.extend(future.result())
+    return aggregate(entrants, results)
+
+
+def aggregate(
+    entrants: List[Entrant], results: List[SimulationResult]
+) -> List[Standing]:
+    standings = []
+    for entrant in entrants:
+        bots = [
+            next(bot for bot in result.bots if bot.name == entrant.name)
+            for result in results
+        ]
+        scores = [bot.score for bot in bots]
+        wins = sum(
+            1
+            for result in results
+            if result.winner() is not None and result.winner().name == entrant.name
+        )
+        moves = sum(bot.moves for bot in bots)
+        collected = sum(bot.diamonds_collected for bot in bots)
+        standings.append(
+            Standing(
+                name=entrant.name,
+                games=len(results),
+                mean_score=mean(scores) if scores else 0.0,
+                score_ci=mean_interval(scores),
+                diamonds_per_move=collected / moves if moves else 0.0,
+                win_rate=wins / len(results) if results else 0.0,
+                win_rate_ci=wilson_interval(wins, len(results)),
+                invalid_moves=sum(bot.invalid_moves for bot in bots),
+                errors=sum(bot.errors for bot in bots),
+            )
+        )
+    standings.sort(key=lambda standing: standing.mean_score, reverse=True)
+    return standings
+
+
+def mean_interval(values: List[float], z: float = Z_95) -> Tuple[float, float]:
+    """
+    Normal approximation confidence interval for the mean
+    """
+    if not values:
+        return 0.0, 0.0
+    center = mean(values)
+    if len(values) < 2:
+        return center, center
+    half = z * stdev(values) / math.sqrt(len(values))
+    return center - half, center + half
+
+
+def wilson_interval(successes: int, trials: int, z: float = Z_95) -> Tuple[float, float]:
+    """
+    Wilson score interval for a proportion, well behaved near 0 and 1
+    """
+    if trials == 0:
+        return 0.0, 0.0
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    center = (p + z * z / (2 * trials)) / denominator
+    half = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials))
+    half /= denominator
+    return max(0.0, center - half), min(1.0, center + half)
@@ -0,0 +1,115 @@
+import argparse
+import json
+import multiprocessing
+import socket
+import time
+from dataclasses import asdict
+
+import requests
+from game.controllers import CONTROLLERS
+from game.loadtest import bot_configs, run_load_test
+from game.log import setup_logging
+from game.mock_server import run_server
+from game.simulator import SimulationConfig
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url: str, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            requests.get(url + "/boards", timeout=1)
+            return
+        except requests.ConnectionError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Play many bots against a Diamonds server and measure the client side"
+    )
+    parser.add_argument("--bots", help="Number of bots", default=100, type=int)
+    parser.add_argument(
+        "--logic",
+        help="Logic controller of the bots. Valid options are: {}".format(
+            ", ".join(list(CONTROLLERS.keys()))
+        ),
+        default="Random",
+    )
+    parser.add_argument(
+        "--host",
+        help="Api of a running server. Default: start a mock server in a separate process",
+    )
+    parser.add_argument("--board", help="Id of the board to join", default=1, type=int)
+    parser.add_argument(
+        "--pool-size", help="Connections shared by all bots", default=100, type=int
+    )
+    parser.add_argument("--output", help="Also write the results as JSON to this file")
+    parser.add_argument("--log-level", default="ERROR")
+    group = parser.add_argument_group("Mock server board")
+    group.add_argument("--width", default=40, type=int)
+    group.add_argument("--height", default=40, type=int)
+    group.add_argument("--seconds", help="Session length of a bot", default=10, type=int)
+    group.add_argument(
+        "--delay", help="Minimum delay between moves in ms", default=100, type=int
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    setup_logging(args.log_level)
+    server = None
+    host = args.host
+    if host is None:
+        config = SimulationConfig(
+            width=args.width,
+            height=args.height,
+            seconds=args.seconds,
+            minimum_delay_between_moves=args.delay,
+        )
+        port = free_port()
+        # Own process, so the server's CPU is not counted as the bots'
+        server = multiprocessing.Process(
+            target=run_server, args=(config, port, "127.0.0.1"), daemon=True
+        )
+        server.start()
+        host = "http://127.0.0.1:{}/api".format(port)
+        wait_for(host)
+
+    try:
+        result = run_load_test(
+            bot_configs(args.bots, args.logic),
+            host,
+            args.board,
+            pool_size=args.pool_size,
+        )
+    finally:
+        if server is not None:
+            server.terminate()
+            server.join()
+
+    print(result.report())
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                dict(
+                    asdict(result),
+                    requests_per_second=result.requests_per_second,
+                    cpu_per_bot=result.cpu_per_bot,
+                    memory_per_bot=result.memory_per_bot,
+                ),
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,23 @@
 import argparse
-from time import sleep
+import logging
 
-from colorama import Back, Fore, Style, init
+from colorama import init
+from game import metrics
 from game.api import Api
 from game.board_handler import BoardHandler
+from game.board_state import BoardState
+from game.log import setup_logging
+from game.pipeline import MovePipeline
+from game.replay import ReplayWriter
+from game.scheduler import MoveScheduler
+from game.supervisor import Supervisor
 from game.bot_handler import BotHandler
-from game.logic.random import RandomLogic
-from game.logic.gacorbot import gacorbot
+from game.controllers import CONTROLLERS
 from game.util import *
 from game.logic.base import BaseLogic
 init()
 BASE_URL = "http://localhost:3000/api"
 DEFAULT_BOARD_ID = 1
-CONTROLLERS = {
-    "Random": RandomLogic,
-    "gacorbot": gacorbot,
-}
 
 ###############################################################################
 #
@@ -44,6 +46,16 @@ parser.add_argument(
     default=1,
     action="store",
 )
+parser.add_argument(
+    "--pipeline",
+    help="Decide the next move in the background while the current one is sent, using the board predicted from it",
+    action="store_true",
+)
+parser.add_argument(
+    "--record",
+    help="Record every board and the move chosen on it to this replay file",
+    action="store",
+)
 parser.add_argument(
     "--logic",
     help="The logic controller to use. Valid options are: {}".format(
@@ -55,10 +67,69 @@ group = parser.add_argument_group("API connection")
 group.add_argument(
     "--host", action="store", default=BASE_URL, help="Default: {}".format(BASE_URL)
 )
+group.add_argument(
+    "--pool-size",
+    help="Number of keep-alive connections kept open to the engine. Default: 10",
+    default=10,
+    action="store",
+)
+group.add_argument(
+    "--timeout",
+    help="Seconds to wait for the engine before a request fails. Default: 5",
+    default=5,
+    action="store",
+)
+group.add_argument(
+    "--retries",
+    help="How many times a failed request is retried with backoff. Default: 3",
+    default=3,
+    action="store",
+)
+group.add_argument(
+    "--strict",
+    help="Validate every response with dacite. Slower, useful for debugging",
+    action="store_true",
+)
+group = parser.add_argument_group("Logging")
+group.add_argument(
+    "--log-level",
+    help="DEBUG also shows every request and response. Default: INFO",
+    default="INFO",
+    action="store",
+)
+group.add_argument(
+    "--log-file",
+    help="Also append every log record to this file as JSON lines",
+    action="store",
+)
+group = parser.add_argument_group("Metrics")
+group.add_argument(
+    "--metrics-file",
+    help="Write latency percentiles and counters as JSON to this file when the game ends",
+    action="store",
+)
+group.add_argument(
+    "--metrics-port",
+    help="Serve metrics in the Prometheus text format on this port",
+    action="store",
+)
 args = parser.parse_args()
 
+setup_logging(args.log_level, args.log_file)
+logger = logging.getLogger("main")
+if args.metrics_file or args.metrics_port:
+    metrics.enable()
+if args.metrics_port:
+    metrics.get_registry().serve(int(args.metrics_port))
+
 time_factor = int(args.time_factor)
-api = Api(args.host)
+api = Api(
+    args.host,
+    pool_size=int(args.pool_size),
+    timeout=float(args.timeout),
+    retries=int(args.retries),
+    strict=args.strict,
+)
 bot_handler = BotHandler(api)
 board_handler = BoardHandler(api)
 
@@ -73,21 +144,10 @@ if not args.token:
     if not recovered_token:
         bot = bot_handler.register(args.name, args.email, args.password, args.team)
         if bot:
-            print("")
-            print(
-                Style.BRIGHT
-                + "Bot registered. Token: {}".format(bot.id)
-                + Style.RESET_ALL
-            )
+            logger.info("Bot registered. Token: %s", bot.id)
             args.token = bot.id
         else:
-            print(
-                Fore.RED
-                + Style.BRIGHT
-                + "Error: "
-                + Style.RESET_ALL
-                + "Unable to register bot"
-            )
+            logger.error("Unable to register bot")
             exit(1)
 
 ###############################################################################
@@ -98,19 +158,13 @@ if not args.token:
 bot = bot_handler.get_my_info(args.token)
 logic_controller = args.logic
 if logic_controller not in CONTROLLERS:
-    print(
-        Fore.RED
-        + Style.BRIGHT
-        + "Error: "
-        + Style.RESET_ALL
-        + "Invalid logic controller"
-    )
+    logger.error("Invalid logic controller")
     exit(1)
 
 if not bot.name:
-    print(Fore.RED + Style.BRIGHT + "Error: " + Style.RESET_ALL + "Bot does not exist")
+    logger.error("Bot does not exist")
     exit(1)
-print(Fore.BLUE + Style.BRIGHT + "Welcome back, " + Style.RESET_ALL + bot.name)
+logger.info("Welcome back, %s", bot.name)
 
 # Setup variables
 logic_class = CONTROLLERS[logic_controller]
@@ -145,13 +199,7 @@ else:
 
 # Did we manage to join a board?
 if not current_board_id:
-    print(
-        Fore.RED
-        + Style.BRIGHT
-        + "Error: "
-        + Style.RESET_ALL
-        + "Unable to find any boards to join"
-    )
+    logger.error("Unable to find any boards to join")
     exit(1)
 
 ###############################################################################
@@ -159,8 +207,21 @@ if not current_board_id:
 # Prepare state from current board
 #
 ###############################################################################
-board = board_handler.get_board(current_board_id)
+supervisor = Supervisor(bot_handler, board_handler, bot, current_board_id)
+board = supervisor.board()
+if not board:
+    logger.error("Unable to get board %s", current_board_id)
+    exit(1)
 move_delay = board.minimum_delay_between_moves / 1000
+pipeline = MovePipeline(bot_logic, speculative=args.pipeline)
+board_state = BoardState()
+board_state.subscribe(pipeline.on_board_update)
+board_state.update(board)
+scheduler = MoveScheduler(move_delay, time_factor)
+supervisor.interval = scheduler.interval
+recorder = None
+if args.record:
+    recorder = ReplayWriter(args.record, {"logic": logic_controller, "bot": bot.name})
 
 ###############################################################################
 #
@@ -175,26 +236,49 @@ while True:
         break
 
     # Calculate next move
-    delta_x, delta_y = bot_logic.next_move(board_bot, board)
+    pipeline.logic.deadline = scheduler.next_send()
+    with metrics.timer("next_move"):
+        delta_x, delta_y = pipeline.next_move(board_bot, board)
     # delta_x, delta_y = (1, 0)
+    if recorder:
+        recorder.record(board, board_bot, delta_x, delta_y)
     if not board.is_valid_move(board_bot.position, delta_x, delta_y):
-        print(
-            Fore.YELLOW + Style.BRIGHT + "Warn:" + Style.RESET_ALL,
-            "Invalid move will be ignored."
-            + f" Your move: ({delta_x}, {delta_y}). Your position: ({board_bot.position.x}, {board_bot.position.y})",
+        metrics.increment("invalid_moves")
+        logger.warning(
+            "Invalid move will be ignored. Your move: (%s, %s). Your position: (%s, %s)",
+            delta_x,
+            delta_y,
+            board_bot.position.x,
+            board_bot.position.y,
         )
-        sleep(1)
+        scheduler.defer()
+        scheduler.wait()
+        # Decide again on a fresh board, the same one would give the same move
+        board = supervisor.skip(board_bot)
+        if not board:
+            break
+        board_state.update(board)
         continue
 
-    try:
-        # Try to perform move
-        board = bot_handler.move(bot.id, current_board_id, delta_x, delta_y)
-    except Exception as e:
-        break
+    # Work out the following move while this one is paced and sent
+    pipeline.speculate(board, board_bot, delta_x, delta_y)
 
+    # Don't spam the board more than it allows!
+    scheduler.wait()
+    scheduler.sent()
+    # Try to perform move, after a fault the supervisor reads the board again
+    result = supervisor.move(board_bot, delta_x, delta_y)
+    if result.fault:
+        # Slow down and go on with the new board state
+        metrics.increment("failed_moves")
+        scheduler.failed(result.fault.status)
+    else:
+        metrics.increment("moves")
+        scheduler.succeeded()
+    board = result.board
     if not board:
-        # Read new board state
-        board = board_handler.get_board(current_board_id)
+        break
+    board_state.update(board)
 
     # Get new state
     board_bot = board.get_bot(bot)
@@ -202,14 +286,22 @@ while True:
         # Managed to get game over after move
         break
 
-    # Don't spam the board more than it allows!
-    # sleep(move_delay * time_factor)
-    sleep(1)
-
 
 ###############################################################################
 #
 # Game over!
 #
 ###############################################################################
-print(Fore.BLUE + Style.BRIGHT + "Game over!" + Style.RESET_ALL)
+logger.info("Game over!")
+if supervisor.lost_ticks:
+    logger.info(
+        "Lost %d ticks to faults, joined again %d times",
+        supervisor.lost_ticks,
+        supervisor.rejoins,
+    )
+pipeline.close()
+api.close()
+if recorder:
+    recorder.close()
+if args.metrics_file:
+    metrics.get_registry().write_json(args.metrics_file)
@@ -0,0 +1,51 @@
+import argparse
+
+from game.log import setup_logging
+from game.mock_server import run_server
+from game.simulator import SimulationConfig
+
+###############################################################################
+#
+# Parse command line arguments
+#
+###############################################################################
+parser = argparse.ArgumentParser(
+    description="Local stand-in for the Diamonds engine, played on the simulator"
+)
+parser.add_argument("--port", help="Default: 3000", default=3000, type=int)
+parser.add_argument("--host", help="Interface to listen on", default="127.0.0.1")
+parser.add_argument("--seed", help="Seed of the board layout", default=None, type=int)
+parser.add_argument(
+    "--no-delay",
+    help="Accept moves sent faster than the minimum delay",
+    action="store_true",
+)
+parser.add_argument(
+    "--log-level",
+    help="DEBUG also shows every request. Default: INFO",
+    default="INFO",
+)
+group = parser.add_argument_group("Board")
+group.add_argument("--width", default=15, type=int)
+group.add_argument("--height", default=15, type=int)
+group.add_argument("--seconds", help="Session length of a bot", default=60, type=int)
+group.add_argument(
+    "--delay", help="Minimum delay between moves in ms", default=1000, type=int
+)
+group.add_argument("--inventory-size", default=5, type=int)
+group.add_argument("--teleport-pairs", default=1, type=int)
+group.add_argument("--can-tackle", action="store_true")
+args = parser.parse_args()
+
+setup_logging(args.log_level)
+config = SimulationConfig(
+    width=args.width,
+    height=args.height,
+    seconds=args.seconds,
+    minimum_delay_between_moves=args.delay,
+    inventory_size=args.inventory_size,
+    teleport_pairs=args.teleport_pairs,
+    can_tackle=args.can_tackle,
+)
+print("Serving on http://{}:{}/api".format(args.host, args.port))
+run_server(config, args.port, args.host, args.seed, not args.no_delay)
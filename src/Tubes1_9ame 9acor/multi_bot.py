@@ -0,0 +1,130 @@
+import argparse
+import asyncio
+import json
+
+from colorama import init
+from game import metrics
+from game.controllers import CONTROLLERS
+from game.log import setup_logging
+from game.runner import BotConfig, run_bots
+
+init()
+BASE_URL = "http://localhost:3000/api"
+DEFAULT_BOARD_ID = 1
+
+###############################################################################
+#
+# Parse command line arguments
+#
+###############################################################################
+parser = argparse.ArgumentParser(
+    description="Run many Diamonds bots concurrently in a single process"
+)
+parser.add_argument(
+    "--bots",
+    help="JSON file with a list of bots, each with logic and either token or name, email, password and team",
+    action="store",
+)
+parser.add_argument(
+    "--count",
+    help="Number of bots to generate when no --bots file is given",
+    default=1,
+    action="store",
+)
+parser.add_argument(
+    "--logic",
+    help="The logic controller for generated bots. Valid options are: {}".format(
+        ", ".join(list(CONTROLLERS.keys()))
+    ),
+    default="Random",
+    action="store",
+)
+parser.add_argument(
+    "--name-prefix", help="Prefix for generated bot names", default="bot", action="store"
+)
+parser.add_argument(
+    "--password", help="Password for generated bots", default="123456", action="store"
+)
+parser.add_argument("--team", help="Team for generated bots", default="etimo", action="store")
+parser.add_argument(
+    "--board", help="Id of the board to join", default=DEFAULT_BOARD_ID, action="store"
+)
+parser.add_argument(
+    "--time-factor",
+    help="A factor to multiply each move command with.",
+    default=1,
+    action="store",
+)
+group = parser.add_argument_group("API connection")
+group.add_argument(
+    "--host", action="store", default=BASE_URL, help="Default: {}".format(BASE_URL)
+)
+group.add_argument(
+    "--pool-size",
+    help="Connections shared by all bots. Default: 100",
+    default=100,
+    action="store",
+)
+group.add_argument(
+    "--strict",
+    help="Validate every response with dacite. Slower, useful for debugging",
+    action="store_true",
+)
+group = parser.add_argument_group("Logging")
+group.add_argument(
+    "--log-level",
+    help="DEBUG also shows every request and response. Default: INFO",
+    default="INFO",
+    action="store",
+)
+group.add_argument(
+    "--log-file",
+    help="Also append every log record to this file as JSON lines",
+    action="store",
+)
+group = parser.add_argument_group("Metrics")
+group.add_argument(
+    "--metrics-file",
+    help="Write latency percentiles and counters of all bots as JSON to this file at the end",
+    action="store",
+)
+group.add_argument(
+    "--metrics-port",
+    help="Serve metrics in the Prometheus text format on this port",
+    action="store",
+)
+args = parser.parse_args()
+
+setup_logging(args.log_level, args.log_file)
+if args.metrics_file or args.metrics_port:
+    metrics.enable()
+if args.metrics_port:
+    metrics.get_registry().serve(int(args.metrics_port))
+
+if args.bots:
+    with open(args.bots) as f:
+        configs = [BotConfig(**bot) for bot in json.load(f)]
+else:
+    configs = [
+        BotConfig(
+            logic=args.logic,
+            name="{}{}".format(args.name_prefix, i),
+            email="{}{}@email.com".format(args.name_prefix, i),
+            password=args.password,
+            team=args.team,
+        )
+        for i in range(int(args.count))
+    ]
+
+asyncio.run(
+    run_bots(
+        configs,
+        args.host,
+        int(args.board),
+        time_factor=int(args.time_factor),
+        pool_size=int(args.pool_size),
+        strict=args.strict,
+    )
+)
+if args.metrics_file:
+    metrics.get_registry().write_json(args.metrics_file)
@@ -0,0 +1,56 @@
+import argparse
+import time
+
+from colorama import Fore, Style, init
+from game.controllers import CONTROLLERS
+from game.replay import ReplayReader
+
+init()
+
+###############################################################################
+#
+# Parse command line arguments
+#
+###############################################################################
+parser = argparse.ArgumentParser(
+    description="Replay recorded games through a logic controller and compare its moves with the recorded ones"
+)
+parser.add_argument("replays", help="Files recorded with main.py --record", nargs="+")
+parser.add_argument(
+    "--logic",
+    help="The logic controller to replay. Valid options are: {}".format(
+        ", ".join(list(CONTROLLERS.keys()))
+    ),
+    required=True,
+    choices=list(CONTROLLERS.keys()),
+)
+args = parser.parse_args()
+
+print(
+    Fore.BLUE
+    + Style.BRIGHT
+    + "{:<32} {:>8} {:>8} {:>12}".format("replay", "frames", "same", "ms/move")
+    + Style.RESET_ALL
+)
+total_steps = total_same = 0
+for path in args.replays:
+    with ReplayReader(path) as reader:
+        steps = same = 0
+        start = time.perf_counter()
+        for step in reader.replay(CONTROLLERS[args.logic]()):
+            steps += 1
+            same += step.matches
+        elapsed = time.perf_counter() - start
+    total_steps += steps
+    total_same += same
+    print(
+        "{:<32} {:>8} {:>7.1%} {:>12.3f}".format(
+            path[-32:], steps, same / steps if steps else 0, elapsed * 1000 / max(steps, 1)
+        )
+    )
+if len(args.replays) > 1:
+    print(
+        "{:<32} {:>8} {:>7.1%}".format(
+            "total", total_steps, total_same / total_steps if total_steps else 0
+        )
+    )
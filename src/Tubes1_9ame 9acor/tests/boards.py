@@ -0,0 +1,64 @@
+from typing import List, Optional
+
+from game.models import Base, Board, GameObject, Position, Properties
+
+
+def bot(
+    id: int,
+    name: str,
+    x: int,
+    y: int,
+    base: Optional[Position] = None,
+    diamonds: int = 0,
+    milliseconds_left: int = 60000,
+    can_tackle: bool = False,
+) -> GameObject:
+    base = base or Position(y=y, x=x)
+    return GameObject(
+        id=id,
+        position=Position(y=y, x=x),
+        type="BotGameObject",
+        properties=Properties(
+            name=name,
+            diamonds=diamonds,
+            score=0,
+            inventory_size=5,
+            can_tackle=can_tackle,
+            milliseconds_left=milliseconds_left,
+            base=Base(y=base.y, x=base.x),
+        ),
+    )
+
+
+def diamond(id: int, x: int, y: int, points: int = 1) -> GameObject:
+    return GameObject(
+        id=id,
+        position=Position(y=y, x=x),
+        type="DiamondGameObject",
+        properties=Properties(points=points),
+    )
+
+
+def teleporter(id: int, x: int, y: int, pair_id: int) -> GameObject:
+    return GameObject(
+        id=id,
+        position=Position(y=y, x=x),
+        type="TeleportGameObject",
+        properties=Properties(pair_id=str(pair_id)),
+    )
+
+
+def board(
+    game_objects: List[GameObject],
+    width: int = 10,
+    height: int = 10,
+    delay: int = 200,
+) -> Board:
+    return Board(
+        id=1,
+        width=width,
+        height=height,
+        features=[],
+        minimum_delay_between_moves=delay,
+        game_objects=game_objects,
+    )
@@ -0,0 +1,67 @@
+import copy
+
+from game.board_state import BoardState
+from game.models import Position
+from tests.boards import board, bot, diamond
+
+
+def _next_tick(first):
+    # A new response: equal objects, but fresh instances
+    return board(copy.deepcopy(first.game_objects))
+
+
+def test_diff_across_two_ticks():
+    state = BoardState()
+    first = board(
+        [bot(1, "me", 0, 0), bot(2, "other", 5, 5), diamond(3, 2, 2), diamond(4, 7, 7)]
+    )
+    diff = state.update(first)
+    assert [item.id for item in diff.added] == [1, 2, 3, 4]
+    assert not (diff.removed or diff.moved or diff.changed)
+
+    second = _next_tick(first)
+    second.game_objects[0].position = Position(y=0, x=1)
+    second.game_objects[1].properties.diamonds = 1
+    del second.game_objects[3]
+    second.game_objects.append(diamond(5, 9, 9))
+    diff = state.update(second)
+
+    assert [item.id for item in diff.added] == [5]
+    assert [item.id for item in diff.removed] == [4]
+    assert [(old.id, old.position, new.position) for old, new in diff.moved] == [
+        (1, Position(y=0, x=0), Position(y=0, x=1))
+    ]
+    assert [(old.id, new.properties.diamonds) for old, new in diff.changed] == [
+        (2, 1)
+    ]
+    assert not diff.diamonds_reset
+    assert diff.changed_types == {"BotGameObject", "DiamondGameObject"}
+
+
+def test_unchanged_objects_keep_their_identity():
+    state = BoardState()
+    first = board([bot(1, "me", 0, 0), diamond(3, 2, 2), diamond(4, 7, 7)])
+    state.update(first)
+    kept = first.game_objects[1]
+    assert first.diamonds == [kept, first.game_objects[2]]
+
+    second = _next_tick(first)
+    second.game_objects[0].position = Position(y=1, x=0)
+    diff = state.update(second)
+
+    assert second.game_objects[1] is kept
+    assert second.game_objects[2] is first.game_objects[2]
+    assert second.game_objects[0] is not first.game_objects[0]
+    assert diff.changed_types == {"BotGameObject"}
+    # The index is carried over and only the moved bot is re-indexed
+    assert second.diamonds[0] is kept
+    assert second.bots[0].position == Position(y=1, x=0)
+
+
+def test_unchanged_tick_gives_empty_diff():
+    state = BoardState()
+    first = board([bot(1, "me", 0, 0), diamond(3, 2, 2)])
+    state.update(first)
+    diff = state.update(_next_tick(first))
+    assert diff.empty
+    assert state.board.game_objects == first.game_objects
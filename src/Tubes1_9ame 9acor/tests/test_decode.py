@@ -0,0 +1,92 @@
+import json
+import random
+import re
+
+import decode as decode_module
+from decode import decode, dumps, loads
+from game.models import Config, Feature
+from game.serialization import board_from_dict, board_to_dict
+from tests.boards import board, bot, diamond, teleporter
+
+
+def _original_snake_case(value):
+    first_underscore = re.sub("(.)([A-Z][a-z]+)", r"\1_\2", value)
+    return re.sub("([a-z0-9])([A-Z])", r"\1_\2", first_underscore).lower()
+
+
+def _original_decode_keys(data):
+    # decode_keys as it was before the conversions were memoized
+    formatted = {}
+    for key, value in {_original_snake_case(k): v for k, v in data.items()}.items():
+        if isinstance(value, dict):
+            formatted[key] = _original_decode_keys(value)
+        elif isinstance(value, list) and len(value) > 0:
+            formatted[key] = [_original_decode_keys(val) for val in value]
+        else:
+            formatted[key] = value
+    return formatted
+
+
+def _response(rng):
+    objects = [
+        diamond(i, rng.randrange(15), rng.randrange(15), rng.choice((1, 2)))
+        for i in range(20)
+    ]
+    objects += [
+        bot(100 + i, "bot{}".format(i), rng.randrange(15), rng.randrange(15))
+        for i in range(4)
+    ]
+    objects += [teleporter(200, 1, 1, 201), teleporter(201, 9, 9, 200)]
+    b = board(objects, width=15, height=15)
+    b.features = [
+        Feature(name="DiamondButtonFeature"),
+        Feature(
+            name="DiamondsFeature",
+            config=Config(generation_ratio=0.1, min_ratio_for_generation=0.01),
+        ),
+    ]
+    return board_to_dict(b)
+
+
+def test_decode_matches_original():
+    rng = random.Random(3)
+    for _ in range(20):
+        data = _response(rng)
+        assert decode(data) == _original_decode_keys(data)
+        assert decode([data, data]) == [_original_decode_keys(data)] * 2
+
+
+def test_decode_converts_keys_in_nested_lists():
+    data = {
+        "gameObjects": [
+            {"pairId": "1", "nestedItems": [{"innerKey": [{"deepestKey": 1}]}]}
+        ],
+        "emptyList": [],
+        "numberList": [1, 2],
+    }
+    assert decode(data) == {
+        "game_objects": [
+            {"pair_id": "1", "nested_items": [{"inner_key": [{"deepest_key": 1}]}]}
+        ],
+        "empty_list": [],
+        "number_list": [1, 2],
+    }
+
+
+def test_fast_board_from_dict_matches_strict():
+    rng = random.Random(4)
+    for _ in range(20):
+        data = decode(_response(rng))
+        assert board_from_dict(data) == board_from_dict(data, strict=True)
+
+
+def test_loads_matches_json_and_decode(monkeypatch):
+    rng = random.Random(5)
+    raw = dumps([_response(rng) for _ in range(5)])
+    expected = [_original_decode_keys(data) for data in json.loads(raw)]
+    assert loads(raw) == expected
+    # The standard library path, taken when orjson is not installed
+    monkeypatch.setattr(decode_module, "orjson", None)
+    assert loads(raw) == expected
+    assert loads(raw.decode()) == expected
+    assert json.loads(dumps(expected)) == expected
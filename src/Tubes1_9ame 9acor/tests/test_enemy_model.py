@@ -0,0 +1,60 @@
+import copy
+
+import numpy as np
+import pytest
+from game.board_state import BoardState
+from game.enemy_model import EnemyTracker
+from tests.boards import board, bot
+
+
+def _enemy(x=5, y=5):
+    return bot(2, "enemy", x, y, can_tackle=True)
+
+
+def _tracked(*bots):
+    tracker = EnemyTracker()
+    state = BoardState()
+    state.subscribe(tracker.on_board_update)
+    state.update(board(list(bots)))
+    return tracker, state
+
+
+def test_clock_ticking_down_is_not_observed_again():
+    tracker, state = _tracked(bot(1, "me", 0, 0), _enemy())
+    stamp = tracker.enemies[2].stamp
+
+    second = copy.deepcopy(state.board.game_objects)
+    for item in second:
+        item.properties.milliseconds_left -= 200
+    diff = state.update(board(second))
+    assert len(diff.changed) == 2
+    assert tracker.enemies[2].stamp is stamp
+
+    third = copy.deepcopy(second)
+    third[1].properties.diamonds = 2
+    state.update(board(third))
+    assert tracker.enemies[2].stamp is not stamp
+    assert tracker.enemies[2].diamonds == 2
+
+
+def test_threat_map_is_a_read_only_view():
+    tracker, state = _tracked(bot(1, "me", 0, 0), _enemy())
+    threat = tracker.threat_map()
+    assert np.shares_memory(threat, tracker.threat)
+    with pytest.raises(ValueError):
+        threat[0, 0] = 1.0
+
+    state.update(board([bot(1, "me", 0, 0), _enemy(6, 5)]))
+    assert threat[5, 6] > 0
+
+
+def test_ignored_bot_is_left_out_of_the_maps():
+    me = bot(1, "me", 4, 4, can_tackle=True)
+    tracker, _ = _tracked(me, _enemy())
+    excluded = tracker.threat_map((1,))
+    assert not np.shares_memory(excluded, tracker.threat)
+
+    tracker.ignore(1)
+    assert np.allclose(tracker.threat_map(), excluded)
+    assert tracker.threat_at(me.position) == tracker.threat_at(me.position, (1,))
+    assert (tracker.threat >= 0).all()
@@ -0,0 +1,70 @@
+from game.board_state import BoardState
+from game.logic.gacorbot import gacorbot
+from game.models import Position
+from tests.boards import board, bot, diamond
+
+
+def _chase_board():
+    me = bot(1, "me", 2, 2, base=Position(y=2, x=2), can_tackle=True)
+    enemy = bot(2, "enemy", 4, 2, base=Position(y=9, x=9), diamonds=3, can_tackle=True)
+    return me, board([me, enemy, diamond(3, 8, 0)])
+
+
+def test_chase_pauses_after_too_many_ticks():
+    me, b = _chase_board()
+    logic = gacorbot(pelacak=True)
+    chasing = []
+    for _ in range(14):
+        logic.next_move(me, b)
+        chasing.append(logic.langkah > 0)
+    # Six ticks of chasing, one to give up, five of cooldown, then again
+    assert chasing == [True] * 6 + [False] * 6 + [True] * 2
+
+
+def test_no_chase_far_from_base():
+    me = bot(1, "me", 2, 2, base=Position(y=2, x=0), can_tackle=True)
+    enemy = bot(2, "enemy", 4, 2, base=Position(y=9, x=9), diamonds=3, can_tackle=True)
+    b = board([me, enemy, diamond(3, 8, 0)])
+    logic = gacorbot(pelacak=True, jarak_base=1)
+    logic.next_move(me, b)
+    assert logic.langkah == 0
+
+
+def test_avoids_threatened_cells_when_carrying():
+    state = BoardState()
+    logic = gacorbot(pelacak=True)
+    state.subscribe(logic.on_board_update)
+    enemy_base = Position(y=9, x=0)
+    # The enemy keeps heading east, its next cell is most likely (4, 3)
+    for x in (1, 2, 3):
+        me = bot(1, "me", 5, 5, diamonds=2, can_tackle=True)
+        enemy = bot(2, "enemy", x, 3, base=enemy_base, can_tackle=True)
+        state.update(board([me, enemy]))
+    assert Position(y=3, x=4) in logic.sel_ancaman(me, Position(y=0, x=0))
+    empty = bot(1, "me", 5, 5, can_tackle=True)
+    assert logic.sel_ancaman(empty, Position(y=0, x=0)) == []
+
+
+def test_diamond_threshold_is_separate_from_chase_radius():
+    me = bot(1, "me", 2, 2, base=Position(y=9, x=9), diamonds=3)
+    b = board([me, diamond(2, 4, 2)])
+    logic = gacorbot(batas_kejar=0, batas_diamond=3)
+    logic.next_move(me, b)
+    assert logic.goal_position == Position(y=2, x=4)
+    logic = gacorbot(batas_kejar=9, batas_diamond=1)
+    logic.next_move(me, b)
+    assert logic.goal_position == me.properties.base
+
+
+def test_cluster_searched_once_per_tick():
+    me = bot(1, "me", 0, 0, base=Position(y=9, x=9))
+    b = board([me, diamond(2, 4, 4), diamond(3, 5, 4), diamond(4, 0, 9)])
+    logic = gacorbot(klaster=3, jangkauan_klaster=8)
+    calls = []
+    search = logic.diamond_klaster
+    logic.diamond_klaster = lambda *args: calls.append(args) or search(*args)
+    logic.next_move(me, b)
+    assert len(calls) == 1
+    assert logic.goal_position == Position(y=4, x=4)
+    logic = gacorbot(klaster=3, jangkauan_klaster=2)
+    assert logic.diamond_klaster(me, b) is None
@@ -0,0 +1,43 @@
+import random
+
+from game.heatmap import DiamondHeatmap
+from game.models import Position
+from tests.boards import board, diamond
+
+
+def test_rectangles_match_brute_force():
+    rng = random.Random(3)
+    for _ in range(100):
+        diamonds = [
+            diamond(i, rng.randrange(10), rng.randrange(10), rng.choice((1, 2)))
+            for i in range(rng.randrange(30))
+        ]
+        heatmap = DiamondHeatmap(board(diamonds))
+        for _ in range(20):
+            x0, y0 = rng.randrange(-2, 10), rng.randrange(-2, 10)
+            x1, y1 = x0 + rng.randrange(6), y0 + rng.randrange(6)
+            inside = [
+                item
+                for item in diamonds
+                if x0 <= item.position.x <= x1 and y0 <= item.position.y <= y1
+            ]
+            assert heatmap.count_in(x0, y0, x1, y1) == len(inside)
+            assert heatmap.points_in(x0, y0, x1, y1) == sum(
+                item.properties.points for item in inside
+            )
+
+
+def test_best_region_within_reach():
+    diamonds = [
+        diamond(1, 8, 8, 2),
+        diamond(2, 9, 9, 2),
+        diamond(3, 1, 1),
+        diamond(4, 2, 1),
+    ]
+    heatmap = DiamondHeatmap(board(diamonds))
+    origin = Position(y=0, x=0)
+    assert heatmap.best_region(2, origin).points == 4
+    region = heatmap.best_region(2, origin, reach=3)
+    assert (region.points, region.count, region.distance) == (2, 2, 1)
+    assert region.contains(Position(y=1, x=1))
+    assert heatmap.best_region(2, Position(y=0, x=9), reach=0) is None
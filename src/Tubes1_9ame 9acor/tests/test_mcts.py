@@ -0,0 +1,48 @@
+import time
+
+from game.logic.mcts import MctsLogic
+from game.models import Position
+from tests.boards import board, bot, diamond
+
+
+def _at_base(milliseconds_left, x=0, y=0):
+    me = bot(1, "me", x, y, milliseconds_left=milliseconds_left)
+    return me, board([me, diamond(2, 5, 5)])
+
+
+def test_at_base_without_time_still_moves():
+    for milliseconds_left in (0, 150):
+        me, b = _at_base(milliseconds_left)
+        logic = MctsLogic(iterations=50, seed=1)
+        dx, dy = logic.next_move(me, b)
+        assert b.is_valid_move(me.position, dx, dy)
+
+
+def test_at_base_in_corner_avoids_other_bots():
+    me, b = _at_base(0, x=0, y=0)
+    other = bot(3, "other", 1, 0, base=Position(y=9, x=9))
+    b = board([me, other, diamond(2, 5, 5)])
+    dx, dy = MctsLogic(iterations=50, seed=1).next_move(me, b)
+    assert (dx, dy) == (0, 1)
+
+
+def test_search_returns_legal_move():
+    me = bot(1, "me", 4, 4, base=Position(y=0, x=0))
+    b = board([me, diamond(2, 5, 4), diamond(3, 8, 8, points=2)])
+    logic = MctsLogic(iterations=200, seed=1)
+    dx, dy = logic.next_move(me, b)
+    assert b.is_valid_move(me.position, dx, dy)
+    assert logic.playouts == 200
+
+
+def test_search_stops_at_deadline_of_game_loop():
+    me = bot(1, "me", 4, 4, base=Position(y=0, x=0))
+    b = board([me, diamond(2, 5, 4), diamond(3, 8, 8, points=2)])
+    logic = MctsLogic(time_budget=10, seed=1)
+    logic.deadline = time.monotonic() - 1
+    start = time.monotonic()
+    dx, dy = logic.next_move(me, b)
+    assert time.monotonic() - start < 1
+    # One batch of playouts even though the deadline has passed
+    assert logic.playouts == 16
+    assert b.is_valid_move(me.position, dx, dy)
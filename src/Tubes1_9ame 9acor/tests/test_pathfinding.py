@@ -0,0 +1,58 @@
+import random
+
+from game.models import Position
+from game.pathfinding import PathFinder
+from tests.boards import board, bot, diamond, teleporter
+
+
+def _random_board(rng):
+    objects = [diamond(i, rng.randrange(12), rng.randrange(12)) for i in range(15)]
+    objects += [
+        bot(100 + i, "bot{}".format(i), rng.randrange(12), rng.randrange(12))
+        for i in range(5)
+    ]
+    objects += [
+        teleporter(200, rng.randrange(12), rng.randrange(12), 1),
+        teleporter(201, rng.randrange(12), rng.randrange(12), 1),
+    ]
+    return board(objects, width=12, height=12)
+
+
+def test_path_stopping_at_goal_matches_full_search():
+    rng = random.Random(7)
+    for _ in range(200):
+        b = _random_board(rng)
+        finder = PathFinder(b, [item.position for item in b.bots[1:]])
+        start = b.bots[0].position
+        full = finder.field(start)
+        for _ in range(10):
+            goal = Position(y=rng.randrange(12), x=rng.randrange(12))
+            assert finder.path(start, goal) == full.path_to(goal)
+
+
+def test_teleporter_shortcut():
+    b = board([teleporter(1, 1, 0, 2), teleporter(2, 8, 0, 1)], width=10, height=1)
+    path = PathFinder(b).path(Position(y=0, x=0), Position(y=0, x=9))
+    assert path.next_step == (1, 0)
+    assert path.length == 2
+
+
+def test_distances_to_goal_match_searches_from_every_cell():
+    rng = random.Random(8)
+    for _ in range(20):
+        b = _random_board(rng)
+        finder = PathFinder(b, [item.position for item in b.bots[1:]])
+        goal = Position(y=rng.randrange(12), x=rng.randrange(12))
+        to_goal = finder.field_to(goal)
+        for cell in range(12 * 12):
+            start = Position(y=cell // 12, x=cell % 12)
+            assert to_goal.distance(start) == finder.field(start).distance(goal)
+
+
+def test_teleporter_is_one_way_per_move():
+    b = board([teleporter(1, 1, 0, 2), teleporter(2, 8, 0, 1)], width=10, height=1)
+    finder = PathFinder(b)
+    # Onto the teleporter next to it, and from its exit only by stepping off
+    # and back on
+    assert finder.field(Position(y=0, x=0)).distance(Position(y=0, x=8)) == 1
+    assert finder.field_to(Position(y=0, x=0)).distance(Position(y=0, x=8)) == 3
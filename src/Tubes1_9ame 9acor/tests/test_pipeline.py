@@ -0,0 +1,78 @@
+import copy
+import time
+
+from game.board_state import BoardState
+from game.logic.gacorbot import gacorbot
+from game.logic.mcts import MctsLogic
+from game.logic.random import RandomLogic
+from game.models import Position
+from game.pipeline import MovePipeline, predict_board
+from tests.boards import board, bot, diamond
+
+
+def test_strict_by_default_for_logics_reading_bots():
+    assert MovePipeline(gacorbot(), speculative=False).strict
+    assert not MovePipeline(RandomLogic(), speculative=False).strict
+    assert not MovePipeline(gacorbot(), speculative=False, strict=False).strict
+
+
+def test_gacorbot_copy_has_own_tracker():
+    logic = gacorbot(pelacak=True)
+    state = BoardState()
+    state.subscribe(logic.on_board_update)
+    me = bot(1, "me", 0, 0)
+    state.update(board([me, bot(2, "enemy", 5, 5, can_tackle=True)]))
+    clone = copy.copy(logic)
+    threat = clone.pelacak.threat.copy()
+    history = list(clone.pelacak.enemies[2].history)
+
+    state.update(board([me, bot(2, "enemy", 6, 5, can_tackle=True)]))
+    assert (clone.pelacak.threat == threat).all()
+    assert list(clone.pelacak.enemies[2].history) == history
+    assert list(logic.pelacak.enemies[2].history) == history + [(6, 5)]
+
+
+def test_speculation_discarded_when_other_bot_moved():
+    me = bot(1, "me", 0, 0, base=Position(y=0, x=0))
+    enemy = bot(2, "enemy", 5, 5)
+    first = board([me, enemy, diamond(3, 3, 0)])
+    pipeline = MovePipeline(gacorbot())
+    try:
+        move = pipeline.next_move(me, first)
+        pipeline.speculate(first, me, *move)
+        predicted = predict_board(first, me, *move)
+        moved_me = predicted.index.bots_by_id[1]
+        # Same as predicted, except the enemy stepped next to us
+        second = board([moved_me, bot(2, "enemy", 2, 0), diamond(3, 3, 0)])
+        pipeline.next_move(moved_me, second)
+        assert (pipeline.hits, pipeline.misses) == (0, 1)
+
+        pipeline.speculate(second, moved_me, 1, 0)
+        third = predict_board(second, moved_me, 1, 0)
+        pipeline.next_move(third.index.bots_by_id[1], third)
+        assert (pipeline.hits, pipeline.misses) == (1, 1)
+    finally:
+        pipeline.close()
+
+
+def test_mcts_speculation_searches_its_own_tree():
+    me = bot(1, "me", 4, 4, base=Position(y=0, x=0))
+    b = board([me, diamond(2, 6, 4), diamond(3, 4, 7)])
+    logic = MctsLogic(time_budget=0.05, seed=1)
+    move = logic.next_move(me, b)
+    root, model, visits = logic._root, logic._model, logic._root.visits
+    playouts = logic.playouts
+    # Left over from the live search, long past by the time the copy runs
+    logic.deadline = time.monotonic() - 1
+    pipeline = MovePipeline(logic)
+    try:
+        pipeline.speculate(b, me, *move)
+        speculation = pipeline._pending.result()
+    finally:
+        pipeline.close()
+
+    assert logic._root is root and logic._model is model
+    assert root.visits == visits
+    assert speculation.logic._model is not model
+    # Not cut off after the first batch of playouts
+    assert speculation.logic.playouts - playouts > 16
@@ -0,0 +1,48 @@
+from game.logic.planner import PlannerLogic
+from game.models import Position
+from game.pathfinding import PathFinder
+from tests.boards import board, bot, teleporter
+
+WIDTH, HEIGHT = 6, 3
+# Entering the pair at (4, 2) from the goal at (3, 2) lands on (2, 1), so
+# (2, 1) is one move away seen from the goal. From (2, 1) the goal is two
+# moves away.
+TELEPORTERS = [teleporter(10, 2, 1, 11), teleporter(11, 4, 2, 10)]
+GOAL = Position(y=2, x=3)
+
+
+def _after(finder, position, dx, dy):
+    x, y = position.x + dx, position.y + dy
+    cell = y * WIDTH + x
+    landed = finder.teleports.get(cell, cell)
+    return Position(y=y, x=x), Position(y=landed // WIDTH, x=landed % WIDTH)
+
+
+def test_steps_follow_distances_to_the_goal():
+    finder = PathFinder(board(TELEPORTERS, WIDTH, HEIGHT))
+    logic = PlannerLogic()
+    goal = GOAL.y * WIDTH + GOAL.x
+    for cell in range(WIDTH * HEIGHT):
+        start = Position(y=cell // WIDTH, x=cell % WIDTH)
+        distance = finder.field(start).distance(GOAL)
+        if start == GOAL or distance is None:
+            continue
+        me = bot(1, "me", start.x, start.y)
+        b = board([me] + TELEPORTERS, WIDTH, HEIGHT)
+        entered, landed = _after(finder, start, *logic._step(b, me, finder, goal))
+        left = 0 if GOAL in (entered, landed) else finder.field(landed).distance(GOAL)
+        assert left == distance - 1, start
+
+
+def test_goes_home_in_the_fewest_moves():
+    for x, y in ((4, 1), (5, 1), (1, 1), (0, 0)):
+        me = bot(1, "me", x, y, base=GOAL, diamonds=5)
+        b = board([me] + TELEPORTERS, WIDTH, HEIGHT)
+        finder = PathFinder(b)
+        expected = finder.field(me.position).distance(GOAL)
+        logic = PlannerLogic()
+        moves = 0
+        while me.position != GOAL and moves < 20:
+            _, me.position = _after(finder, me.position, *logic.next_move(me, b))
+            moves += 1
+        assert moves == expected, (x, y)
@@ -0,0 +1,50 @@
+from game.logic.random import RandomLogic
+from game.replay import ReplayReader, ReplayWriter
+from game.simulator import SimulationConfig, Simulator
+
+TICKS = 8
+
+
+def _record(path):
+    simulator = Simulator(SimulationConfig(width=8, height=8), seed=2)
+    bot_id = simulator.add_bot("me", RandomLogic())
+    simulator.add_bot("other", RandomLogic())
+    boards, sizes = [], []
+    with ReplayWriter(str(path), metadata={"seed": 2}) as writer:
+        for tick in range(TICKS):
+            board = simulator.board()
+            boards.append(board)
+            board_bot = board.index.bots_by_id[bot_id]
+            writer.record(board, board_bot, tick % 2, 1 - tick % 2, timestamp=tick)
+            # Records are flushed as they are written
+            sizes.append(path.stat().st_size)
+            simulator.step()
+    return boards, bot_id, sizes
+
+
+def test_frames_read_back_equal(tmp_path):
+    path = tmp_path / "game.replay"
+    boards, bot_id, _ = _record(path)
+    with ReplayReader(str(path)) as reader:
+        assert reader.metadata == {"seed": 2}
+        assert len(reader) == TICKS
+        for tick, (frame, board) in enumerate(zip(reader, boards)):
+            assert frame.board == board
+            assert frame.bot_id == bot_id
+            assert frame.time == tick
+            assert frame.move == (tick % 2, 1 - tick % 2)
+        assert reader[-1].board == boards[-1]
+
+
+def test_truncated_trailing_record_is_skipped(tmp_path):
+    path = tmp_path / "game.replay"
+    boards, _, sizes = _record(path)
+    data = path.read_bytes()
+    # Cut right after the previous frame, a few bytes in and one byte short
+    start = sizes[-2]
+    for end in (start + 1, start + 3, len(data) - 1):
+        truncated = tmp_path / "cut.replay"
+        truncated.write_bytes(data[:end])
+        with ReplayReader(str(truncated)) as reader:
+            assert len(reader) == TICKS - 1
+            assert [frame.board for frame in reader] == boards[:-1]
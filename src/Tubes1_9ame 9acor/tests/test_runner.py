@@ -0,0 +1,83 @@
+import asyncio
+
+import aiohttp
+
+from game import runner
+from game.models import Bot
+from game.runner import BotConfig, run_bot
+from tests.boards import board, bot
+
+ME = Bot(name="me", email="me@email.com", id="token")
+
+
+class FakeAsyncApi:
+    def __init__(self):
+        self.last_statuses = {}
+
+
+class FakeBotHandler:
+    def __init__(self, moves):
+        # Each entry is a board, None with a status, or an exception
+        self.api = FakeAsyncApi()
+        self.moves = list(moves)
+        self.sent = 0
+
+    async def get_my_info(self, token):
+        return ME
+
+    async def join(self, token, board_id):
+        self.api.last_statuses[token] = 200
+        return True
+
+    async def move(self, token, board_id, dx, dy):
+        self.sent += 1
+        answer = self.moves.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        result, self.api.last_statuses[token] = answer
+        return result
+
+
+class FakeBoardHandler:
+    def __init__(self, boards):
+        self.boards = list(boards)
+
+    async def get_board(self, board_id):
+        return self.boards.pop(0)
+
+
+def _playing(milliseconds_left=60000):
+    return board([bot(1, "me", 3, 3, milliseconds_left=milliseconds_left)], delay=0)
+
+
+def _run(moves, boards, monkeypatch):
+    failed = []
+    original = runner.MoveScheduler.failed
+
+    def record(scheduler, status=None):
+        failed.append(status)
+        original(scheduler, status)
+
+    monkeypatch.setattr(runner.MoveScheduler, "failed", record)
+    bot_handler = FakeBotHandler(moves)
+    config = BotConfig(logic="Random", token="token")
+    asyncio.run(run_bot(config, bot_handler, FakeBoardHandler(boards), 1))
+    return bot_handler, failed
+
+
+def test_failed_move_passes_status_to_scheduler(monkeypatch):
+    # Rate limited on the last move, after which the game is over
+    boards = [_playing(milliseconds_left=0), board([], delay=0)]
+    bot_handler, failed = _run([(None, 429)], boards, monkeypatch)
+    assert failed == [429]
+    assert bot_handler.sent == 1
+
+
+def test_connection_error_does_not_end_game(monkeypatch):
+    bot_handler, failed = _run(
+        [aiohttp.ClientConnectionError(), (board([], delay=0), 200)],
+        [_playing(), _playing()],
+        monkeypatch,
+    )
+    assert failed == [None]
+    assert bot_handler.sent == 2
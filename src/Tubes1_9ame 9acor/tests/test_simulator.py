@@ -0,0 +1,69 @@
+import random
+
+from game.simulator import SimulationConfig, Simulator
+
+
+def _simulator(can_tackle=True, teleport_pairs=0):
+    config = SimulationConfig(
+        width=6,
+        height=6,
+        can_tackle=can_tackle,
+        teleport_pairs=teleport_pairs,
+        diamond_button=False,
+        generation_ratio=0.0,
+    )
+    return Simulator(config, seed=0)
+
+
+def _place(simulator, name, cell, base=None):
+    bot_id = simulator.add_bot(name)
+    bot = next(item for item in simulator._bots if item.id == bot_id)
+    bot.cell, bot.base = cell, base or cell
+    return bot
+
+
+def _teleporters(simulator, a, b):
+    simulator._teleports = {a: b, b: a}
+    simulator._teleport_ids = {a: (900, "1"), b: (901, "1")}
+
+
+def test_teleport_to_taken_cell_does_nothing():
+    simulator = _simulator()
+    _teleporters(simulator, (1, 0), (4, 4))
+    mover = _place(simulator, "mover", (0, 0))
+    _place(simulator, "blocker", (4, 4))
+    assert simulator.apply_move(mover.id, 1, 0)
+    assert mover.cell == (1, 0)
+
+
+def test_teleport_to_free_cell():
+    simulator = _simulator()
+    _teleporters(simulator, (1, 0), (4, 4))
+    mover = _place(simulator, "mover", (0, 0))
+    assert simulator.apply_move(mover.id, 1, 0)
+    assert mover.cell == (4, 4)
+
+
+def test_tackled_bot_goes_next_to_taken_base():
+    simulator = _simulator()
+    tackler = _place(simulator, "tackler", (0, 0))
+    tackled = _place(simulator, "tackled", (1, 0), base=(3, 3))
+    tackled.diamonds = 2
+    _place(simulator, "squatter", (3, 3))
+    assert simulator.apply_move(tackler.id, 1, 0)
+    assert tackler.cell == (1, 0) and tackler.diamonds == 2
+    assert tackled.diamonds == 0
+    assert tackled.cell != (3, 3)
+    assert abs(tackled.cell[0] - 3) + abs(tackled.cell[1] - 3) == 1
+
+
+def test_bots_never_share_a_cell():
+    rng = random.Random(1)
+    for game in range(20):
+        simulator = _simulator(teleport_pairs=2)
+        bots = [simulator.add_bot("bot{}".format(i)) for i in range(6)]
+        for _ in range(300):
+            dx, dy = rng.choice(((1, 0), (0, 1), (-1, 0), (0, -1)))
+            simulator.apply_move(rng.choice(bots), dx, dy)
+            cells = [bot.cell for bot in simulator._bots]
+            assert len(set(cells)) == len(cells)
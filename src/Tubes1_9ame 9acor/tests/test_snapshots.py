@@ -0,0 +1,161 @@
+import asyncio
+
+import pytest
+
+from game.board_state import BoardState
+from game.snapshots import SnapshotService
+from tests.boards import board, bot
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeBoardHandler:
+    def __init__(self):
+        self.requests = []
+
+    async def get_board(self, board_id):
+        future = asyncio.get_running_loop().create_future()
+        self.requests.append(future)
+        return await future
+
+
+def _service():
+    clock = Clock()
+    handler = FakeBoardHandler()
+    return SnapshotService(handler, max_age=0.1, clock=clock), handler, clock
+
+
+def _board():
+    return board([bot(1, "me", 0, 0)])
+
+
+async def _settle():
+    # Lets the waiters and the request tasks they start run
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def _run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_concurrent_gets_share_one_request():
+    async def scenario():
+        service, handler, clock = _service()
+        waiters = [asyncio.ensure_future(service.get(1)) for _ in range(5)]
+        await _settle()
+        assert len(handler.requests) == 1
+        shared = _board()
+        handler.requests[0].set_result(shared)
+        boards = await asyncio.gather(*waiters)
+        assert service.fetches == 1 and service.shared == 4
+        # Every caller has its own view of the same game objects
+        assert len({id(item) for item in boards}) == 5
+        assert all(item.game_objects == shared.game_objects for item in boards)
+        assert all(item.game_objects is not shared.game_objects for item in boards)
+
+    _run(scenario())
+
+
+def test_pending_request_sent_too_early_is_not_shared():
+    async def scenario():
+        service, handler, clock = _service()
+        first = asyncio.ensure_future(service.get(1))
+        await _settle()
+        clock.now += 1
+        second = asyncio.ensure_future(service.get(1, since=clock.now))
+        await _settle()
+        assert len(handler.requests) == 2
+        for request in handler.requests:
+            request.set_result(_board())
+        await asyncio.gather(first, second)
+        assert service.shared == 0
+
+    _run(scenario())
+
+
+def test_recent_snapshot_is_reused_until_too_old():
+    async def scenario():
+        service, handler, clock = _service()
+        service.offer(1, _board(), clock.now)
+        assert await service.get(1) is not None
+        assert handler.requests == [] and service.shared == 1
+        clock.now += 0.5
+        waiter = asyncio.ensure_future(service.get(1))
+        await _settle()
+        assert len(handler.requests) == 1
+        handler.requests[0].set_result(_board())
+        await waiter
+
+    _run(scenario())
+
+
+def test_offer_keeps_newest():
+    service, handler, clock = _service()
+    newer, older = _board(), board([bot(1, "me", 1, 0)])
+    assert service.offer(1, newer, 10.0)
+    assert not service.offer(1, older, 9.0)
+    assert not service.offer(1, older, 10.0)
+    assert service.latest(1).board == newer
+    assert service.offer(1, older, 11.0)
+    assert service.latest(1).board == older
+
+
+def test_error_reaches_every_waiter():
+    async def scenario():
+        service, handler, clock = _service()
+        waiters = [asyncio.ensure_future(service.get(1)) for _ in range(3)]
+        await _settle()
+        handler.requests[0].set_exception(ConnectionError("engine down"))
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        assert all(isinstance(result, ConnectionError) for result in results)
+        assert service.fetches == 0
+        # The failed request is forgotten, the next get asks again
+        waiter = asyncio.ensure_future(service.get(1))
+        await _settle()
+        assert len(handler.requests) == 2
+        handler.requests[1].set_result(_board())
+        assert await waiter is not None
+
+    _run(scenario())
+
+
+def test_cancelled_waiter_does_not_cancel_request():
+    async def scenario():
+        service, handler, clock = _service()
+        cancelled = asyncio.ensure_future(service.get(1))
+        other = asyncio.ensure_future(service.get(1))
+        await _settle()
+        cancelled.cancel()
+        await _settle()
+        handler.requests[0].set_result(_board())
+        assert await other is not None
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+
+    _run(scenario())
+
+
+def test_offered_board_is_not_changed_by_later_updates():
+    async def scenario():
+        service, _, clock = _service()
+        state = BoardState()
+        first = _board()
+        state.update(first)
+        # A move response: the bot is where it was, equal but a new instance
+        second = _board()
+        service.offer(1, second, clock())
+        offered = list(second.game_objects)
+        state.update(second)
+        assert second.game_objects[0] is first.game_objects[0]
+
+        for snapshot in (service.latest(1).board, await service.get(1)):
+            assert all(a is b for a, b in zip(snapshot.game_objects, offered))
+
+    _run(scenario())
@@ -0,0 +1,334 @@
+import asyncio
+import random
+
+import aiohttp
+import pytest
+import requests
+
+from game.models import Bot
+from game.snapshots import SnapshotService
+from game.supervisor import (
+    DISCONNECTED,
+    FATAL,
+    REJECTED,
+    TRANSIENT,
+    AsyncSupervisor,
+    Supervisor,
+    classify,
+)
+from tests.boards import board, bot
+
+ME = Bot(name="me", email="me@email.com", id="token")
+
+
+class FakeApi:
+    last_status = None
+
+
+class FakeBotHandler:
+    def __init__(self, moves=(), joins=()):
+        # Each entry is a board, None with a status, or an exception
+        self.api = FakeApi()
+        self.moves = list(moves)
+        self.joins = list(joins)
+        self.joined = 0
+
+    def move(self, token, board_id, dx, dy):
+        return self._answer(self.moves.pop(0))
+
+    def join(self, token, board_id):
+        self.joined += 1
+        return self._answer(self.joins.pop(0) if self.joins else (True, 200))
+
+    def _answer(self, answer):
+        if isinstance(answer, Exception):
+            raise answer
+        result, self.api.last_status = answer
+        return result
+
+
+class FakeBoardHandler:
+    def __init__(self, bot_handler, boards):
+        self.bot_handler = bot_handler
+        self.boards = list(boards)
+        self.reads = 0
+
+    def get_board(self, board_id):
+        self.reads += 1
+        return self.bot_handler._answer(self.boards.pop(0))
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def _supervisor(moves=(), boards=(), joins=(), **kwargs):
+    clock = Clock()
+    bot_handler = FakeBotHandler(moves, joins)
+    board_handler = FakeBoardHandler(bot_handler, boards)
+    supervisor = Supervisor(
+        bot_handler,
+        board_handler,
+        ME,
+        1,
+        interval=0.2,
+        rng=random.Random(0),
+        sleep=clock.sleep,
+        clock=clock,
+        **kwargs,
+    )
+    return supervisor, clock
+
+
+def _playing(milliseconds_left=60000):
+    me = bot(1, "me", 3, 3, milliseconds_left=milliseconds_left)
+    return me, board([me])
+
+
+def test_classify():
+    assert classify(503).kind == TRANSIENT
+    assert classify(429).kind == TRANSIENT
+    assert classify(None).kind == TRANSIENT
+    assert classify(403).kind == DISCONNECTED
+    assert classify(404).kind == DISCONNECTED
+    assert classify(400).kind == REJECTED
+    assert classify(error=requests.ConnectionError()).kind == TRANSIENT
+    assert classify(error=requests.Timeout()).kind == TRANSIENT
+    assert classify(error=ValueError("not json")).kind == TRANSIENT
+    assert classify(error=aiohttp.ClientConnectionError()).kind == TRANSIENT
+    assert classify(error=asyncio.TimeoutError()).kind == TRANSIENT
+    assert classify(error=KeyError("id")).kind == FATAL
+
+
+def test_read_retries_with_growing_jittered_delays():
+    me, b = _playing()
+    supervisor, clock = _supervisor(
+        boards=[requests.Timeout(), (None, 503), requests.ConnectionError(), (b, 200)]
+    )
+    delays = []
+    supervisor.sleep = delays.append
+    assert supervisor.board() is b
+    assert supervisor.retries == 3
+    for attempt, delay in enumerate(delays):
+        limit = min(supervisor.max_delay, supervisor.base_delay * 2**attempt)
+        assert limit / 2 <= delay <= limit
+
+
+def test_read_gives_up():
+    supervisor, clock = _supervisor(boards=[(None, 503)] * 4)
+    assert supervisor.board() is None
+    assert supervisor.board_handler.reads == supervisor.attempts
+
+
+def test_read_stops_when_disconnected():
+    supervisor, clock = _supervisor(boards=[(None, 404)])
+    assert supervisor.board() is None
+    assert supervisor.board_handler.reads == 1
+
+
+def test_read_raises_fatal_errors():
+    supervisor, clock = _supervisor(boards=[KeyError("id")])
+    with pytest.raises(KeyError):
+        supervisor.board()
+
+
+def test_move_succeeds():
+    me, b = _playing()
+    supervisor, clock = _supervisor(moves=[(b, 200)])
+    result = supervisor.move(me, 1, 0)
+    assert result.board is b and result.fault is None
+    assert supervisor.lost_ticks == 0
+
+
+def test_failed_move_reads_board_and_counts_lost_ticks():
+    me, b = _playing()
+    supervisor, clock = _supervisor(
+        moves=[requests.ConnectionError()],
+        boards=[(None, 503), (None, 503), (b, 200)],
+    )
+    result = supervisor.move(me, 1, 0)
+    assert result.board is b
+    assert result.fault.kind == TRANSIENT
+    # Recovery slept two backoffs, less than one interval
+    assert clock.now < supervisor.interval
+    assert supervisor.lost_ticks == 1
+
+
+def test_lost_ticks_include_time_spent_recovering():
+    me, b = _playing()
+    supervisor, clock = _supervisor(
+        moves=[(None, 503)],
+        boards=[(None, 503)] * 3 + [(b, 200)],
+        base_delay=0.4,
+    )
+    supervisor.move(me, 1, 0)
+    assert clock.now >= supervisor.interval
+    assert supervisor.lost_ticks == 1 + int(clock.now / supervisor.interval)
+
+
+def test_fatal_move_error_ends_game():
+    me, b = _playing()
+    supervisor, clock = _supervisor(moves=[KeyError("direction")])
+    result = supervisor.move(me, 1, 0)
+    assert result.board is None
+    assert result.fault.kind == FATAL
+
+
+def test_rejoins_bot_that_left_early():
+    me, b = _playing()
+    gone = board([])
+    supervisor, clock = _supervisor(
+        moves=[(None, 403)], boards=[(gone, 200), (b, 200)]
+    )
+    result = supervisor.move(me, 1, 0)
+    assert result.board is b
+    assert result.fault.kind == DISCONNECTED
+    assert supervisor.rejoins == 1
+    assert supervisor.lost_ticks == 1
+
+
+def test_rejoins_are_limited():
+    me, b = _playing()
+    gone = board([])
+    supervisor, clock = _supervisor(
+        moves=[(None, 403)] * 3,
+        boards=[(gone, 200), (b, 200)] * 2 + [(gone, 200)],
+        max_rejoins=2,
+    )
+    supervisor.move(me, 1, 0)
+    supervisor.move(me, 1, 0)
+    result = supervisor.move(me, 1, 0)
+    assert supervisor.rejoins == 2
+    assert supervisor.bot_handler.joined == 2
+    assert result.board is gone
+
+
+def test_no_rejoin_when_game_is_over():
+    me, b = _playing(milliseconds_left=100)
+    gone = board([])
+    supervisor, clock = _supervisor(moves=[(None, 403)], boards=[(gone, 200)])
+    result = supervisor.move(me, 1, 0)
+    assert result.board is gone
+    assert supervisor.rejoins == 0
+    # Not lost, the game ended
+    assert supervisor.lost_ticks == 0
+
+
+def test_skip_reads_fresh_board():
+    me, b = _playing()
+    supervisor, clock = _supervisor(boards=[(b, 200)])
+    assert supervisor.skip(me) is b
+    assert supervisor.lost_ticks == 1
+
+
+
+class FakeAsyncApi:
+    def __init__(self):
+        self.last_statuses = {}
+
+
+class FakeAsyncBotHandler(FakeBotHandler):
+    def __init__(self, clock, moves=(), joins=()):
+        super().__init__(moves, joins)
+        self.api = FakeAsyncApi()
+        self.clock = clock
+
+    async def move(self, token, board_id, dx, dy):
+        return self._answer(token, self.moves.pop(0))
+
+    async def join(self, token, board_id):
+        self.joined += 1
+        return self._answer(token, self.joins.pop(0) if self.joins else (True, 200))
+
+    def _answer(self, token, answer):
+        # Every request takes a moment
+        self.clock.now += 0.01
+        if isinstance(answer, Exception):
+            raise answer
+        result, self.api.last_statuses[token] = answer
+        return result
+
+
+class FakeAsyncBoardHandler:
+    def __init__(self, boards):
+        self.boards = list(boards)
+        self.reads = 0
+
+    async def get_board(self, board_id):
+        self.reads += 1
+        answer = self.boards.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+def _async_supervisor(moves=(), boards=(), joins=(), **kwargs):
+    clock = Clock()
+
+    async def sleep(seconds):
+        clock.sleep(seconds)
+
+    snapshots = SnapshotService(FakeAsyncBoardHandler(boards), clock=clock)
+    supervisor = AsyncSupervisor(
+        FakeAsyncBotHandler(clock, moves, joins),
+        snapshots,
+        ME,
+        1,
+        interval=0.2,
+        rng=random.Random(0),
+        sleep=sleep,
+        **kwargs,
+    )
+    return supervisor, clock
+
+
+def test_async_rejected_move_reads_board_with_status():
+    me, b = _playing()
+    supervisor, clock = _async_supervisor(moves=[(None, 400)], boards=[b])
+    result = asyncio.run(supervisor.move(me, 1, 0))
+    assert result.board == b
+    assert (result.fault.kind, result.fault.status) == (REJECTED, 400)
+    assert supervisor.lost_ticks == 1
+
+
+def test_async_connection_error_is_transient_and_reads_retried():
+    me, b = _playing()
+    supervisor, clock = _async_supervisor(
+        moves=[aiohttp.ClientConnectionError()],
+        boards=[asyncio.TimeoutError(), b],
+    )
+    result = asyncio.run(supervisor.move(me, 1, 0))
+    assert result.board == b
+    assert result.fault.kind == TRANSIENT
+    assert supervisor.retries == 1
+
+
+def test_async_rejoins_bot_that_left_early():
+    me, b = _playing()
+    supervisor, clock = _async_supervisor(moves=[(None, 403)], boards=[board([]), b])
+    result = asyncio.run(supervisor.move(me, 1, 0))
+    assert result.board == b
+    assert result.fault.kind == DISCONNECTED
+    assert supervisor.rejoins == 1 and supervisor.bot_handler.joined == 1
+
+
+def test_async_fatal_move_error_ends_game():
+    me, b = _playing()
+    supervisor, clock = _async_supervisor(moves=[KeyError("direction")])
+    result = asyncio.run(supervisor.move(me, 1, 0))
+    assert result.board is None
+    assert result.fault.kind == FATAL
+
+
+def test_async_skip_reads_fresh_board():
+    me, b = _playing()
+    supervisor, clock = _async_supervisor(boards=[b])
+    assert asyncio.run(supervisor.skip(me)) == b
+    assert supervisor.lost_ticks == 1
@@ -0,0 +1,114 @@
+import argparse
+import json
+
+from colorama import Fore, Style, init
+from game.controllers import CONTROLLERS
+from game.simulator import SimulationConfig
+from game.tournament import Entrant, run_tournament
+
+init()
+
+
+def parse_entrant(value: str) -> Entrant:
+    """
+    Parse name=logic:key=value,key=value. Both the name and the parameters
+    are optional, values are read as JSON and fall back to plain strings.
+    """
+    head, _, params_spec = value.partition(":")
+    name, _, logic = head.rpartition("=")
+    params = {}
+    for pair in filter(None, params_spec.split(",")):
+        key, sep, raw = pair.partition("=")
+        if not sep:
+            raise argparse.ArgumentTypeError("Invalid parameter {}".format(pair))
+        try:
+            params[key] = json.loads(raw)
+        except json.JSONDecodeError:
+            params[key] = raw
+    if logic not in CONTROLLERS:
+        raise argparse.ArgumentTypeError("Unknown logic controller {}".format(logic))
+    return Entrant(name or logic, logic, params)
+
+
+###############################################################################
+#
+# Parse command line arguments
+#
+###############################################################################
+parser = argparse.ArgumentParser(
+    description="Play many simulated Diamonds games between logic controllers"
+)
+parser.add_argument(
+    "--entrant",
+    help="name=logic:key=value,... e.g. tuned=gacorbot:jarak_base=5. May be repeated. Valid logic options are: {}".format(
+        ", ".join(list(CONTROLLERS.keys()))
+    ),
+    type=parse_entrant,
+    action="append",
+    required=True,
+)
+parser.add_argument("--games", help="Number of games to play", default=100, type=int)
+parser.add_argument("--seed", help="Seed of the first game", default=0, type=int)
+parser.add_argument(
+    "--workers", help="Worker processes. Default: every core", default=None, type=int
+)
+parser.add_argument(
+    "--output", help="Write the standings to this JSON file", action="store"
+)
+group = parser.add_argument_group("Board")
+group.add_argument("--width", default=15, type=int)
+group.add_argument("--height", default=15, type=int)
+group.add_argument("--seconds", help="Game length", default=60, type=int)
+group.add_argument(
+    "--delay", help="Minimum delay between moves in ms", default=1000, type=int
+)
+group.add_argument("--inventory-size", default=5, type=int)
+group.add_argument("--teleport-pairs", default=1, type=int)
+group.add_argument("--can-tackle", action="store_true")
+args = parser.parse_args()
+
+config = SimulationConfig(
+    width=args.width,
+    height=args.height,
+    seconds=args.seconds,
+    minimum_delay_between_moves=args.delay,
+    inventory_size=args.inventory_size,
+    teleport_pairs=args.teleport_pairs,
+    can_tackle=args.can_tackle,
+)
+standings = run_tournament(
+    args.entrant, args.games, seed=args.seed, config=config, workers=args.workers
+)
+
+print(
+    Fore.BLUE
+    + Style.BRIGHT
+    + "{:<16} {:>8} {:>17} {:>10} {:>8} {:>17}".format(
+        "name", "score", "95% CI", "dia/move", "win", "95% CI"
+    )
+    + Style.RESET_ALL
+)
+for standing in standings:
+    print(
+        "{:<16} {:>8.2f} {:>8.2f}-{:<8.2f} {:>10.4f} {:>7.1%} {:>7.1%}-{:<7.1%}".format(
+            standing.name,
+            standing.mean_score,
+            *standing.score_ci,
+            standing.diamonds_per_move,
+            standing.win_rate,
+            *standing.win_rate_ci,
+        )
+    )
+
+if args.output:
+    with open(args.output, "w") as f:
+        json.dump(
+            {
+                "games": args.games,
+                "seed": args.seed,
+                "entrants": [vars(entrant) for entrant in args.entrant],
+                "standings": [vars(standing) for standing in standings],
+            },
+            f,
+            indent=2,
+        )